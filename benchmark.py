@@ -0,0 +1,159 @@
+# benchmark.py
+import os
+import json
+import math
+import time
+import argparse
+import tempfile
+
+from mock_saitro import MockSaitroServer
+from saitro_automation import SaitroAutomation
+from saitro_network import ResourceBlocker
+from saitro_metrics import StepRecorder
+
+# --- Constants and Configuration ---
+BENCHMARK_CSV_PATH = 'dummy.csv'
+PERCENTILES = (50, 90, 99)
+SEED_ICCIDS = ['89555480000057782381', '89555480000066712270']
+
+
+def _seed_cart(server: MockSaitroServer):
+    server.state.cart[:] = SEED_ICCIDS
+    server.state.cart_product = 'TIM 50MB R&T TIM Comp 30 IOT'
+
+
+def _seed_requests(server: MockSaitroServer):
+    server.state.requests.append({'id': str(len(server.state.requests) + 1), 'iccid': SEED_ICCIDS[0], 'status': 'Pendente'})
+
+
+# Each workflow: (setup of the mock state before the run, the step executed once logged in)
+WORKFLOWS = {
+    'clear_cart': (_seed_cart, lambda automation: automation._clear_cart()),
+    'set_cart': (lambda server: server.state.cart.clear(), lambda automation: automation._upload_cart_file(BENCHMARK_CSV_PATH)),
+    'confirm_cart': (_seed_cart, lambda automation: automation._confirm_cart('Benchmark', 'furukawaelectric.com.br')),
+    'clear_requests': (_seed_requests, lambda automation: automation._cancel_request()),
+}
+
+
+def percentile(samples: list, rank: int) -> float:
+    '''
+    Nearest-rank percentile of a list of samples.
+    '''
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, math.ceil(rank / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_workflow(server: MockSaitroServer, name: str, iterations: int, state_path: str,
+                 headless: bool = True, reuse_session: bool = False, block_resources: bool = False,
+                 recorder: StepRecorder = None) -> dict:
+    '''
+    Runs one workflow end to end (launch, login, action, close) several times against the mock server.
+
+    Returns:
+        dict: Per-step latency samples in milliseconds and the number of failed runs.
+    '''
+    setup, action = WORKFLOWS[name]
+    samples = {'launch': [], 'login': [], 'action': [], 'close': [], 'total': []}
+    failures = 0
+    for _ in range(iterations):
+        setup(server)
+        started = time.monotonic()
+        blocker = ResourceBlocker(sizes_path=None, first_party_domains=('127.0.0.1',)) if block_resources else None
+        automation = SaitroAutomation(headless=headless, slow_mo=0, reuse_session=reuse_session,
+                                      resource_blocker=blocker, base_url=server.base_url, state_path=state_path,
+                                      recorder=recorder)
+        step_started = time.monotonic()
+        samples['launch'].append((step_started - started) * 1000)
+        ok = False
+        try:
+            ok = automation.ensure_logged_in()
+            samples['login'].append((time.monotonic() - step_started) * 1000)
+            if ok:
+                step_started = time.monotonic()
+                ok = bool(action(automation))
+                samples['action'].append((time.monotonic() - step_started) * 1000)
+        except Exception as e:
+            print(f'[] Benchmark run of \'{name}\' failed: {e}')
+            ok = False
+        finally:
+            step_started = time.monotonic()
+            automation.close()
+            samples['close'].append((time.monotonic() - step_started) * 1000)
+        samples['total'].append((time.monotonic() - started) * 1000)
+        failures += 0 if ok else 1
+    return {'samples': samples, 'failures': failures}
+
+
+def summarize(results: dict) -> dict:
+    '''
+    Reduces the samples of every workflow to latency percentiles per step.
+    '''
+    summary = {}
+    for name, result in results.items():
+        summary[name] = {'failures': result['failures'], 'steps': {}}
+        for step, samples in result['samples'].items():
+            summary[name]['steps'][step] = {f'p{rank}': round(percentile(samples, rank), 1) for rank in PERCENTILES}
+            summary[name]['steps'][step]['runs'] = len(samples)
+    return summary
+
+
+def print_summary(summary: dict, baseline: dict = None):
+    '''
+    Prints the percentiles of each step, with the difference to a baseline when given.
+    '''
+    header = ''.join(f'{f"p{rank} (ms)":>14}' for rank in PERCENTILES)
+    for name, workflow in summary.items():
+        print(f'\n{name} (failures: {workflow["failures"]})')
+        print(f'{"step":<10}{header}')
+        for step, values in workflow['steps'].items():
+            cells = ''
+            for rank in PERCENTILES:
+                value = values[f'p{rank}']
+                reference = (baseline or {}).get(name, {}).get('steps', {}).get(step, {}).get(f'p{rank}')
+                delta = f'{value - reference:+.0f}' if reference is not None else ''
+                cells += f'{f"{value:.0f} {delta}":>14}'
+            print(f'{step:<10}{cells}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline benchmark of the SaitroAutomation workflows.')
+    parser.add_argument('-n', '--iterations', type=int, default=5, help='Runs per workflow')
+    parser.add_argument('--latency-ms', type=int, default=50, help='Artificial latency of the mock server')
+    parser.add_argument('--workflows', nargs='+', choices=sorted(WORKFLOWS), default=list(WORKFLOWS))
+    parser.add_argument('--headed', action='store_true', help='Show the browser')
+    parser.add_argument('--reuse-session', action='store_true', help='Reuse the saved login state between runs')
+    parser.add_argument('--block-resources', action='store_true', help='Enable the ResourceBlocker')
+    parser.add_argument('--output', help='Write the percentiles to this JSON file (e.g. a new baseline)')
+    parser.add_argument('--baseline', help='JSON file of a previous run to compare against')
+    parser.add_argument('--spans', help='Append the step spans to this JSONL file')
+    parser.add_argument('--prometheus', help='Write the step metrics to this file in the Prometheus text format')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+
+    recorder = StepRecorder(args.spans)
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir, MockSaitroServer(latency_ms=args.latency_ms) as server:
+        # Never overwrite the real tim_login_state.json with mock cookies
+        state_path = os.path.join(work_dir, 'mock_login_state.json')
+        for workflow in args.workflows:
+            results[workflow] = run_workflow(server, workflow, args.iterations, state_path,
+                                             headless=not args.headed, reuse_session=args.reuse_session,
+                                             block_resources=args.block_resources, recorder=recorder)
+    recorder.close()
+
+    summary = summarize(results)
+    print_summary(summary, baseline)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(summary, output_file, indent=2)
+        print(f'\nResults written to {args.output}')
+    if args.prometheus:
+        recorder.write_prometheus(args.prometheus)
+        print(f'Step metrics written to {args.prometheus}')
@@ -8,9 +8,6 @@ def get_credentials():
     
     return data
 
-print('-' * 30)
-print('Robotic Process Automation - RPA')
-
 def clear_cart():
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=False, slow_mo=100)
@@ -81,13 +78,15 @@ def clear_cart():
         # Aguarda o botão "Sim" aparecer visivelmente
         page.wait_for_selector('button.btn-send:text("Sim")', timeout=5000)
 
-        # Clica no botão "Sim"
-        page.click('button.btn-send:text("Sim")')
+        # Clica no botão "Sim" e aguarda a resposta do servidor
+        with page.expect_response(lambda r: r.request.method == "POST" and "/customer_care/" in r.url, timeout=30000):
+            page.click('button.btn-send:text("Sim")')
 
         print("[✅] Carrinho excluído com sucesso.")
-
-        # Opcional: esperar para ver resultado
-        page.wait_for_timeout(10000)
         browser.close()
 
-clear_cart()
+# Executa apenas quando chamado diretamente (o import não dispara o fluxo)
+if __name__ == "__main__":
+    print('-' * 30)
+    print('Robotic Process Automation - RPA')
+    clear_cart()
@@ -8,9 +8,6 @@ def get_credentials():
     
     return data
 
-print('-' * 30)
-print('Robotic Process Automation - RPA')
-
 def clear_requests():
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=False, slow_mo=100)
@@ -51,10 +48,13 @@ def clear_requests():
         page.click("a.icon-red[data-original-title='Cancelar Solicitação']")
 
         page.wait_for_selector("button.btn-send >> text=Sim", timeout=5000)
-        page.click("button.btn-send >> text=Sim")
-
-        # Opcional: esperar para ver resultado
-        page.wait_for_timeout(10000)
+        # Aguarda a resposta do servidor ao cancelamento
+        with page.expect_response(lambda r: r.request.method == "POST" and "/customer_care/" in r.url, timeout=30000):
+            page.click("button.btn-send >> text=Sim")
         browser.close()
 
-clear_requests()
+# Executa apenas quando chamado diretamente (o import não dispara o fluxo)
+if __name__ == "__main__":
+    print('-' * 30)
+    print('Robotic Process Automation - RPA')
+    clear_requests()
@@ -0,0 +1,466 @@
+# mock_saitro.py
+import re
+import json
+import time
+import uuid
+import argparse
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlsplit
+
+# --- Constants and Configuration ---
+# Local stand-in for tim.saitro.com: same paths, same form field names, in-memory state.
+# The pages follow the browser flows; the post endpoints follow saitro_http.HTTP_ENDPOINTS,
+# which were never checked against the platform.
+SESSION_COOKIE = 'gsimtim'
+MOCK_PRODUCTS = {
+    '101': 'TIM 50MB R&T TIM Comp 30 IOT',
+    '102': 'TIM 100MB R&T TIM Comp 30 IOT',
+}
+MOCK_APNS = {
+    '1': 'furukawaelectric.com.br',
+    '2': 'iot.tim.br',
+}
+# Rows per page of the requests listing
+MOCK_REQUESTS_PAGE_SIZE = 10
+
+# Shared front-end behaviour of the fixtures: AJAX posts, toasts, modals and the
+# "Sim" confirmation dialog, mimicking the admin theme of the platform.
+COMMON_SCRIPT = '''<script>
+function post(url, data) {
+  return fetch(url, {method: 'POST', body: data, credentials: 'same-origin',
+                     headers: {'X-Requested-With': 'XMLHttpRequest'}}).then(r => r.json());
+}
+function toast(payload) {
+  var t = document.createElement('div');
+  t.className = payload.status ? 'toast-success' : 'toast-error';
+  t.textContent = payload.msg || '';
+  document.body.appendChild(t);
+  setTimeout(function () { t.remove(); }, 3000);
+}
+function openModal(id) {
+  var m = document.getElementById(id);
+  m.classList.add('in'); m.style.display = 'block';
+}
+function closeModals() {
+  document.querySelectorAll('div.modal.in').forEach(function (m) {
+    m.classList.remove('in'); m.style.display = 'none';
+  });
+}
+function confirmDialog(action) {
+  window.pendingAction = action;
+  openModal('confirm-modal');
+}
+document.addEventListener('keydown', function (e) { if (e.key === 'Escape') closeModals(); });
+document.addEventListener('DOMContentLoaded', function () {
+  var sim = document.querySelector('#confirm-modal button.btn-send');
+  if (!sim) return;
+  sim.addEventListener('click', function () {
+    closeModals();
+    window.pendingAction();
+  });
+});
+</script>'''
+
+CONFIRM_MODAL_HTML = '''<div class="modal" id="confirm-modal" style="display:none">
+  <div class="modal-dialog"><p>Confirma?</p>
+  <button type="button" class="btn btn-send">Sim</button>
+  <button type="button" class="btn" onclick="closeModals()">Não</button></div>
+</div>'''
+
+LOGIN_PAGE_HTML = f'''<!DOCTYPE html>
+<html><head><title>Saitro - Login</title>{COMMON_SCRIPT}</head>
+<body>
+<form id="login-form">
+  <input type="text" id="login" name="login">
+  <input type="password" id="senha" name="senha">
+  <div class="g-recaptcha"></div>
+  <button type="button" data-post="ajax-login">Entrar</button>
+</form>
+<script>
+document.querySelector("button[data-post='ajax-login']").addEventListener('click', function () {{
+  post('/sistema/login/ajax-login/', new FormData(document.getElementById('login-form'))).then(function (payload) {{
+    if (payload.status) {{ window.location.href = payload.redirect; }} else {{ toast(payload); }}
+  }});
+}});
+</script>
+</body></html>'''
+
+DASHBOARD_HTML = '<!DOCTYPE html><html><head><title>Saitro - Dashboard</title></head><body><h1>Dashboard</h1></body></html>'
+
+
+def _render_options(options: dict) -> str:
+    return ''.join(f'<option value="{value}">{label}</option>' for value, label in options.items())
+
+
+def render_activation_page(cart: list) -> str:
+    '''
+    Renders the activation page: product select, cart/upload buttons, the cart modal
+    (Limpar Carrinho, processar, info_cliente, bootstrap-select-like APN dropdown)
+    and the "Adicionar via Carga" upload modal.
+    '''
+    apn_items = ''.join(f'<li data-value="{value}"><a>{label}</a></li>' for value, label in MOCK_APNS.items())
+    return f'''<!DOCTYPE html>
+<html><head><title>Saitro - Ativação</title>{COMMON_SCRIPT}</head>
+<body>
+<select name="id_produto"><option value="">Selecione</option>{_render_options(MOCK_PRODUCTS)}</select>
+<a href="#" class="btn" data-original-title="Visualizar">Carrinho (<span id="cart-count">{len(cart)}</span>)</a>
+<a href="#" class="btn" data-original-title="Adicionar via Carga">Carga</a>
+
+<div class="modal" id="cart-modal" style="display:none">
+  <div class="modal-body">
+    <table class="table" id="cart-table"><thead><tr><th>ICCID</th><th>Produto</th></tr></thead><tbody></tbody></table>
+    <a href="#" class="btn" data-original-title="Limpar Carrinho">Limpar</a>
+    <button type="button" id="processar">Processar</button>
+    <form id="process-form" style="display:none">
+      <input type="text" name="info_cliente">
+      <select id="apns" name="apns" style="display:none"><option value="">Selecione</option>{_render_options(MOCK_APNS)}</select>
+      <div class="bootstrap-select">
+        <button type="button" class="dropdown-toggle" data-id="apns" title="Selecione">Selecione</button>
+        <div class="dropdown-menu open" style="display:none"><ul class="dropdown-menu inner">{apn_items}</ul></div>
+      </div>
+      <button type="button" id="submitButton">Confirmar</button>
+    </form>
+  </div>
+</div>
+
+<div class="modal" id="upload-modal" style="display:none">
+  <div class="modal-body">
+    <form id="upload-form"><input type="file" name="arquivo"><button type="button" id="send">Enviar</button></form>
+  </div>
+</div>
+{CONFIRM_MODAL_HTML}
+
+<script>
+function product() {{ return document.querySelector("select[name='id_produto']").value; }}
+function refreshCart() {{
+  fetch('/customer_care/ativacao/carrinho/', {{credentials: 'same-origin'}}).then(r => r.json()).then(function (cart) {{
+    document.getElementById('cart-count').textContent = cart.iccids.length;
+    // Same empty row as the DataTables plugin of the platform
+    document.querySelector('#cart-table tbody').innerHTML = cart.iccids.length ? cart.iccids.map(function (iccid) {{
+      return '<tr><td>' + iccid + '</td><td>' + cart.produto + '</td></tr>';
+    }}).join('') : '<tr><td colspan="2" class="dataTables_empty">Nenhum registro encontrado</td></tr>';
+  }});
+}}
+document.querySelector("a[data-original-title='Visualizar']").addEventListener('click', function (e) {{
+  e.preventDefault();
+  document.getElementById('process-form').style.display = 'none';
+  refreshCart();
+  openModal('cart-modal');
+}});
+document.querySelector("a[data-original-title='Adicionar via Carga']").addEventListener('click', function (e) {{
+  e.preventDefault();
+  openModal('upload-modal');
+}});
+document.querySelector("a[data-original-title='Limpar Carrinho']").addEventListener('click', function (e) {{
+  e.preventDefault();
+  confirmDialog(function () {{
+    var data = new FormData(); data.append('id_produto', product());
+    post('/customer_care/ativacao/limpar_carrinho/', data).then(function (payload) {{ toast(payload); refreshCart(); }});
+  }});
+}});
+document.getElementById('processar').addEventListener('click', function () {{
+  document.getElementById('process-form').style.display = 'block';
+}});
+document.querySelector("button.dropdown-toggle[data-id='apns']").addEventListener('click', function () {{
+  var menu = document.querySelector('div.dropdown-menu.open');
+  menu.style.display = menu.style.display === 'none' ? 'block' : 'none';
+}});
+document.querySelectorAll('ul.dropdown-menu.inner li').forEach(function (item) {{
+  item.addEventListener('click', function () {{
+    document.getElementById('apns').value = item.dataset.value;
+    document.querySelector("button.dropdown-toggle[data-id='apns']").textContent = item.textContent;
+    document.querySelector('div.dropdown-menu.open').style.display = 'none';
+  }});
+}});
+document.getElementById('submitButton').addEventListener('click', function () {{
+  confirmDialog(function () {{
+    var data = new FormData(document.getElementById('process-form'));
+    data.append('id_produto', product());
+    post('/customer_care/ativacao/processar/', data).then(function (payload) {{ toast(payload); refreshCart(); }});
+  }});
+}});
+document.getElementById('send').addEventListener('click', function () {{
+  var data = new FormData(document.getElementById('upload-form'));
+  data.append('id_produto', product());
+  post('/customer_care/ativacao/carga/', data).then(function (payload) {{ closeModals(); toast(payload); refreshCart(); }});
+}});
+</script>
+</body></html>'''
+
+
+def render_request_page(requests: list, page: int = 1) -> str:
+    '''
+    Renders one page of the requests listing (newest first), with one cancel link
+    (and "Sim" confirmation) per open request and a pagination bar.
+    '''
+    page_count = max(1, -(-len(requests) // MOCK_REQUESTS_PAGE_SIZE))
+    page = min(max(1, page), page_count)
+    first = (page - 1) * MOCK_REQUESTS_PAGE_SIZE
+    rows = ''.join(
+        f'<tr data-id="{request["id"]}"><td>{request["id"]}</td><td>{request["iccid"]}</td>'
+        f'<td>{request.get("created", "")}</td><td>{request["status"]}</td><td>'
+        + (f'<a href="#" class="icon-red" data-original-title="Cancelar Solicitação" '
+           f'data-url="/customer_care/solicitacao/cancelar/{request["id"]}/"></a>' if request['status'] == 'Pendente' else '')
+        + '</td></tr>'
+        for request in list(reversed(requests))[first:first + MOCK_REQUESTS_PAGE_SIZE]
+    )
+    next_item = (f'<li class="next"><a href="?page={page + 1}">&raquo;</a></li>' if page < page_count
+                 else '<li class="next disabled"><a href="#">&raquo;</a></li>')
+    return f'''<!DOCTYPE html>
+<html><head><title>Saitro - Solicitações</title>{COMMON_SCRIPT}</head>
+<body><table class="table">
+<thead><tr><th>#</th><th>ICCID</th><th>Data</th><th>Status</th><th></th></tr></thead>
+<tbody>{rows}</tbody></table>
+<ul class="pagination"><li class="active"><a href="#">{page}</a></li>{next_item}</ul>
+{CONFIRM_MODAL_HTML}
+<script>
+document.querySelectorAll("a.icon-red[data-original-title='Cancelar Solicitação']").forEach(function (link) {{
+  link.addEventListener('click', function (e) {{
+    e.preventDefault();
+    confirmDialog(function () {{
+      post(link.dataset.url, new FormData()).then(function (payload) {{
+        toast(payload);
+        if (payload.status) {{ link.closest('tr').remove(); }}
+      }});
+    }});
+  }});
+}});
+</script>
+</body></html>'''
+
+
+class MockSaitroState:
+    '''
+    In-memory state of the stand-in server (sessions, cart, requests) and its switches.
+
+    Attributes:
+        latency_ms (int): Artificial latency added to every response.
+        captcha (bool): If True, the login endpoint answers with a captcha challenge.
+        credentials (tuple | None): Accepted (user, password); None accepts any non-empty pair.
+    '''
+    def __init__(self, latency_ms: int = 0, captcha: bool = False, credentials: tuple = None):
+        self.latency_ms = latency_ms
+        self.captcha = captcha
+        self.credentials = credentials
+        self.sessions = set()
+        self.cart = []
+        self.cart_product = ''
+        self.requests = []
+        self.hits = {}
+        self.lock = threading.Lock()
+
+    def expire_sessions(self):
+        '''
+        Invalidates every session, as the platform does when a session times out.
+        '''
+        with self.lock:
+            self.sessions.clear()
+
+
+class MockSaitroHandler(BaseHTTPRequestHandler):
+    '''
+    Request handler mimicking the Saitro pages and form/AJAX endpoints.
+    '''
+    protocol_version = 'HTTP/1.1' # Keep-alive, like the real platform
+    disable_nagle_algorithm = True # Headers and body are written separately
+    server_version = 'MockSaitro/1.0'
+
+    @property
+    def state(self) -> MockSaitroState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        # Keep the output of benchmark and manual runs readable
+        pass
+
+    def _session(self):
+        cookies = self.headers.get('Cookie', '')
+        match = re.search(rf'{SESSION_COOKIE}=([^;]+)', cookies)
+        if match and match.group(1) in self.state.sessions:
+            return match.group(1)
+        return None
+
+    def _send(self, status: int, body: str, content_type: str = 'text/html; charset=utf-8', headers: dict = None):
+        if self.state.latency_ms:
+            time.sleep(self.state.latency_ms / 1000)
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_json(self, payload: dict, status: int = 200, headers: dict = None):
+        self._send(status, json.dumps(payload), 'application/json', headers)
+
+    def _redirect_to_login(self):
+        self._send(302, '', headers={'Location': '/sistema/login/'})
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def _form(self) -> dict:
+        body = self._read_body()
+        content_type = self.headers.get('Content-Type', '')
+        if content_type.startswith('multipart/form-data'):
+            message = BytesParser(policy=HTTP).parsebytes(
+                f'Content-Type: {content_type}\r\n\r\n'.encode('utf-8') + body)
+            fields = {}
+            for part in message.iter_parts():
+                name = part.get_param('name', header='content-disposition')
+                fields[name] = part.get_content() if part.get_filename() is None else part.get_payload(decode=True)
+            return fields
+        return {name: values[0] for name, values in parse_qs(body.decode('utf-8')).items()}
+
+    def _count(self, path: str):
+        with self.state.lock:
+            self.state.hits[path] = self.state.hits.get(path, 0) + 1
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        self._count(path)
+        if path == '/sistema/login/':
+            return self._send(200, LOGIN_PAGE_HTML)
+        if not self._session():
+            return self._redirect_to_login()
+        if path.startswith('/dashboard/'):
+            return self._send(200, DASHBOARD_HTML)
+        if path == '/customer_care/ativacao/index/':
+            return self._send(200, render_activation_page(self.state.cart))
+        if path == '/customer_care/ativacao/carrinho/':
+            return self._send_json({'iccids': list(self.state.cart), 'produto': self.state.cart_product})
+        if path == '/customer_care/solicitacao/index/':
+            page = parse_qs(urlsplit(self.path).query).get('page', ['1'])[0]
+            return self._send(200, render_request_page(self.state.requests, int(page) if page.isdigit() else 1))
+        self._send(404, 'Not found')
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        self._count(path)
+        form = self._form()
+        if path == '/sistema/login/ajax-login/':
+            return self._login(form)
+        if not self._session():
+            return self._redirect_to_login()
+        with self.state.lock:
+            if path == '/customer_care/ativacao/carga/':
+                return self._upload(form)
+            if path == '/customer_care/ativacao/limpar_carrinho/':
+                self.state.cart.clear()
+                return self._send_json({'status': True, 'msg': 'Carrinho limpo'})
+            if path == '/customer_care/ativacao/processar/':
+                return self._process(form)
+            match = re.fullmatch(r'/customer_care/solicitacao/cancelar/(\w+)/', path)
+            if match:
+                return self._cancel(match.group(1))
+        self._send(404, 'Not found')
+
+    def _login(self, form: dict):
+        if self.state.captcha:
+            return self._send_json({'status': False, 'msg': 'Captcha inválido'})
+        user, password = form.get('login', ''), form.get('senha', '')
+        accepted = (user, password) == self.state.credentials if self.state.credentials else bool(user and password)
+        if not accepted:
+            return self._send_json({'status': False, 'msg': 'Usuário ou senha inválidos'})
+        session = uuid.uuid4().hex
+        with self.state.lock:
+            self.state.sessions.add(session)
+        self._send_json({'status': True, 'redirect': '/dashboard/'},
+                        headers={'Set-Cookie': f'{SESSION_COOKIE}={session}; Path=/; HttpOnly'})
+
+    def _upload(self, form: dict):
+        if form.get('id_produto') not in MOCK_PRODUCTS:
+            return self._send_json({'status': False, 'msg': 'Produto inválido'})
+        content = form.get('arquivo') or b''
+        iccids = [line.strip() for line in content.decode('utf-8').splitlines() if line.strip()]
+        if not iccids:
+            return self._send_json({'status': False, 'msg': 'Arquivo vazio'})
+        self.state.cart.extend(iccid for iccid in iccids if iccid not in self.state.cart)
+        self.state.cart_product = MOCK_PRODUCTS[form['id_produto']]
+        self._send_json({'status': True, 'msg': f'{len(iccids)} ICCIDs adicionados ao carrinho'})
+
+    def _process(self, form: dict):
+        if not self.state.cart:
+            return self._send_json({'status': False, 'msg': 'Carrinho vazio'})
+        if form.get('apns') not in MOCK_APNS or not form.get('info_cliente'):
+            return self._send_json({'status': False, 'msg': 'Dados incompletos'})
+        for iccid in self.state.cart:
+            self.state.requests.append({'id': str(len(self.state.requests) + 1), 'iccid': iccid, 'status': 'Pendente',
+                                        'created': time.strftime('%d/%m/%Y %H:%M')})
+        count = len(self.state.cart)
+        self.state.cart.clear()
+        self._send_json({'status': True, 'msg': f'{count} solicitações criadas'})
+
+    def _cancel(self, request_id: str):
+        for request in self.state.requests:
+            if request['id'] == request_id and request['status'] == 'Pendente':
+                request['status'] = 'Cancelada'
+                return self._send_json({'status': True, 'msg': 'Solicitação cancelada'})
+        self._send_json({'status': False, 'msg': 'Solicitação não encontrada'})
+
+
+class MockSaitroServer:
+    '''
+    Runs the stand-in server in a background thread.
+
+    Example:
+        with MockSaitroServer(latency_ms=50) as server:
+            automation = SaitroHttpAutomation(base_url=server.base_url)
+    '''
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency_ms: int = 0, captcha: bool = False,
+                 credentials: tuple = None):
+        '''
+        Args:
+            host (str): Interface to listen on.
+            port (int): Port to listen on; 0 picks a free port.
+            latency_ms (int): Artificial latency added to every response, in milliseconds.
+            captcha (bool): If True, the login endpoint answers with a captcha challenge.
+            credentials (tuple | None): Accepted (user, password); None accepts any non-empty pair.
+        '''
+        self.httpd = ThreadingHTTPServer((host, port), MockSaitroHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = MockSaitroState(latency_ms, captcha, credentials)
+        self.thread = None
+
+    @property
+    def state(self) -> MockSaitroState:
+        return self.httpd.state
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'MockSaitroServer':
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> 'MockSaitroServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local stand-in for the Saitro platform.')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency-ms', type=int, default=0)
+    parser.add_argument('--captcha', action='store_true', help='Answer the login with a captcha challenge')
+    args = parser.parse_args()
+    server = MockSaitroServer(port=args.port, latency_ms=args.latency_ms, captcha=args.captcha)
+    print(f'Mock Saitro server listening on {server.base_url}')
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,8 @@
+import sys
+from saitro_cli import main
+
+if __name__ == '__main__':
+    # Clear cart -> upload CSV -> confirm -> cancel stale requests, with a single login
+    sys.exit(main(['--headed', '--slow-mo', '100', 'activate', 'dummy.csv',
+                   '--client-info', 'Robotic Process Automation - Confirmed Order',
+                   '--apn', 'furukawaelectric.com.br', '--clear-requests']))
\ No newline at end of file
@@ -0,0 +1,6 @@
+import sys
+from saitro_cli import main
+
+if __name__ == '__main__':
+    # Usage: python run_activation_pool.py <batch1.csv> [batch2.csv ...]
+    sys.exit(main(['pool', '--concurrency', '4'] + (sys.argv[1:] or ['dummy.csv'])))
\ No newline at end of file
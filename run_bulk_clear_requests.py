@@ -0,0 +1,6 @@
+import sys
+from saitro_cli import main
+
+if __name__ == '__main__':
+    # Usage: python run_bulk_clear_requests.py [--older-than-days N] [--status S ...] [--iccids FILE]
+    sys.exit(main(['--headed', '--slow-mo', '100', 'clear-requests', '--bulk'] + sys.argv[1:]))
\ No newline at end of file
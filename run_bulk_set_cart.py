@@ -0,0 +1,10 @@
+import sys
+from saitro_cli import main
+
+if __name__ == '__main__':
+    # Usage: python run_bulk_set_cart.py <iccid_file.csv> [batch_size]
+    # Re-running the same command after a crash resumes from the ledger.
+    file_path = sys.argv[1] if len(sys.argv) > 1 else 'dummy.csv'
+    batch_size = sys.argv[2] if len(sys.argv) > 2 else '1000'
+    sys.exit(main(['--headed', '--slow-mo', '100', 'bulk-set-cart', file_path,
+                   '--batch-size', batch_size, '--resume', '--retries', '1']))
\ No newline at end of file
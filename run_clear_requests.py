@@ -1,9 +1,5 @@
-from saitro_automation import SaitroAutomation
+import sys
+from saitro_cli import main
 
 if __name__ == '__main__':
-    automation = SaitroAutomation(headless=False, slow_mo=100)
-    try:
-        automation.clear_requests()
-    finally:
-        if automation.browser and not automation.browser.is_closed():
-            automation.close()
\ No newline at end of file
+    sys.exit(main(['--headed', '--slow-mo', '100', 'clear-requests']))
\ No newline at end of file
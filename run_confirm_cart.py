@@ -1,13 +1,8 @@
-from saitro_automation import SaitroAutomation
+import sys
+from saitro_cli import main
 
 if __name__ == '__main__':
-    automation = SaitroAutomation(headless=False, slow_mo=100)
-    try:
-        # You can customize client_info and apn here
-        automation.confirm_shopping_cart(
-            client_info='Robotic Process Automation - Confirmed Order',
-            apn='furukawaelectric.com.br'
-        )
-    finally:
-        if automation.browser and not automation.browser.is_closed():
-            automation.close()
\ No newline at end of file
+    # You can customize client_info and apn here
+    sys.exit(main(['--headed', '--slow-mo', '100', 'confirm-cart',
+                   '--client-info', 'Robotic Process Automation - Confirmed Order',
+                   '--apn', 'furukawaelectric.com.br']))
\ No newline at end of file
@@ -1,4 +1,5 @@
-from saitro_automation import greet_thanks
+import sys
+from saitro_cli import main
 
 if __name__ == '__main__':
-    greet_thanks()
\ No newline at end of file
+    sys.exit(main(['greet']))
\ No newline at end of file
@@ -1,16 +1,7 @@
-from saitro_automation import SaitroAutomation
-import os
+import sys
+from saitro_cli import main
 
 if __name__ == '__main__':
-    automation = SaitroAutomation(headless=False, slow_mo=100)
-    try:
-        # Intermediate Refactoring: Capable of reading the CSV file name
-        # You can prompt the user for the file name:
-        csv_file_name = input('Please enter the name of the CSV file to upload (e.g., dummy.csv): ')
-        # Or, you can hardcode it for specific automated runs:
-        # csv_file_name = 'dummy.csv'
-
-        automation.set_shopping_cart(file_path=csv_file_name)
-    finally:
-        if automation.browser and not automation.browser.is_closed():
-            automation.close()
\ No newline at end of file
+    # Usage: python run_set_cart.py <iccid_file.csv>
+    csv_file_name = sys.argv[1] if len(sys.argv) > 1 else 'dummy.csv'
+    sys.exit(main(['--headed', '--slow-mo', '100', 'set-cart', csv_file_name]))
\ No newline at end of file
@@ -0,0 +1,264 @@
+# saitro_accounts.py
+import os
+import json
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+
+from saitro_automation import (
+    SaitroAutomation, ActionResult, BulkUploadReport, iter_iccid_batches, _stream_source,
+    USER_CREDENTIALS_PATH, LOGIN_STATE_PATH, DEFAULT_BATCH_SIZE, DEFAULT_CLIENT_INFO, DEFAULT_APN,
+)
+from saitro_ledger import ActivationLedger
+from saitro_metrics import StepRecorder, METRICS_JSONL_PATH
+from saitro_timeouts import TimeoutPolicy, CircuitBreaker, TIMEOUTS_PATH
+from saitro_governor import Governor, KIND_POST, DEFAULT_RATES, governors_prometheus_text
+from saitro_lifecycle import ContextLifecycle, lifecycles_prometheus_text
+
+# --- Constants and Configuration ---
+# Operator accounts: a JSON list of {"name", "user", "pwd"} objects, with optional "rates"
+# overriding the governor limits of the account ({"post": [per_minute, burst], ...}) and
+# "actions_per_minute" (the rate of its posts). Without it, the single account of
+# USER_CREDENTIALS_PATH is used.
+ACCOUNTS_PATH = 'accounts.json'
+# Login storage state of each account ({name} is replaced by the account name)
+ACCOUNT_STATE_PATH = 'tim_login_state.{name}.json'
+
+
+@dataclass
+class Account:
+    '''
+    An operator account of the platform.
+
+    Attributes:
+        name (str): Short name, used in the file names and reports.
+        user (str): Login of the account.
+        pwd (str): Password of the account.
+        state_path (str): File of the login storage state of the account (its own session and cart).
+        governor (Governor): Paces the logins, navigations and posts of the account.
+        lifecycle (ContextLifecycle): Recycles the browser context of the account during long runs.
+    '''
+    name: str
+    user: str
+    pwd: str
+    state_path: str
+    governor: Optional[Governor] = None
+    lifecycle: Optional[ContextLifecycle] = None
+
+    def __post_init__(self):
+        if self.governor is None:
+            self.governor = Governor(self.name)
+        if self.lifecycle is None:
+            self.lifecycle = ContextLifecycle(self.name)
+
+    @property
+    def credentials(self) -> dict:
+        return {'user': self.user, 'pwd': self.pwd}
+
+
+def load_accounts(path: str = ACCOUNTS_PATH) -> list:
+    '''
+    Reads the operator accounts.
+
+    Args:
+        path (str): JSON list of accounts. If the file does not exist, the single account of
+                    USER_CREDENTIALS_PATH is returned, with the usual LOGIN_STATE_PATH session.
+
+    Returns:
+        list: The Account objects.
+
+    Raises:
+        ValueError: If two accounts share a name or an entry has no user or password.
+    '''
+    if not os.path.exists(path):
+        with open(USER_CREDENTIALS_PATH, 'r') as user_file:
+            credentials = json.load(user_file)
+        return [Account('default', credentials['user'], credentials['pwd'], LOGIN_STATE_PATH)]
+
+    with open(path, 'r', encoding='utf-8') as accounts_file:
+        entries = json.load(accounts_file)
+    accounts = []
+    for index, entry in enumerate(entries):
+        if not entry.get('user') or not entry.get('pwd'):
+            raise ValueError(f'Account #{index} of \'{path}\' has no user or password')
+        name = str(entry.get('name') or entry['user'])
+        if any(account.name == name for account in accounts):
+            raise ValueError(f'Duplicated account name \'{name}\' in \'{path}\'')
+        rates = {kind: tuple(limit) for kind, limit in entry.get('rates', {}).items()}
+        if 'actions_per_minute' in entry:
+            rates[KIND_POST] = (entry['actions_per_minute'], rates.get(KIND_POST, DEFAULT_RATES[KIND_POST])[1])
+        accounts.append(Account(name, entry['user'], entry['pwd'], ACCOUNT_STATE_PATH.format(name=name),
+                                Governor(name, rates)))
+    return accounts
+
+
+def shard_batches(file_path: str, accounts: list, batch_size: int = DEFAULT_BATCH_SIZE,
+                  only_batches: Optional[set] = None, validate: bool = True) -> list:
+    '''
+    Deals the batches of an ICCID file to the accounts, round-robin: batch i of the file
+    goes to account i % len(accounts). Nothing is written: every account reads its batches
+    from the file itself, with their index in the file, so the ledger records them under the
+    same lot and batch as a single-account run would.
+
+    Args:
+        only_batches (set | None): If given, only these batches of the file are dealt.
+        validate (bool): If True, the batches are cut from the valid ICCIDs of the file,
+                         as SaitroAutomation.bulk_set_shopping_cart cuts them.
+
+    Returns:
+        list: (account, set of batch indexes) for every account, in order.
+    '''
+    shards = [(account, set()) for account in accounts]
+    for batch_index, _ in iter_iccid_batches(_stream_source(file_path, validate), batch_size):
+        if only_batches is None or batch_index in only_batches:
+            shards[batch_index % len(accounts)][1].add(batch_index)
+    return shards
+
+
+@dataclass
+class ShardedUploadReport(BulkUploadReport):
+    '''
+    Outcome of a bulk upload sharded across accounts. The inherited fields are merged from
+    every account; like them, they use the batch indexes of the whole file, so
+    `failed_batches` can be passed back as `only_batches`.
+
+    Attributes:
+        accounts (dict): Name of every account mapped to the BulkUploadReport of its batches.
+    '''
+    accounts: dict = field(default_factory=dict)
+
+
+class AccountPool:
+    '''
+    Runs a large activation workload across several operator accounts in parallel.
+
+    The batches of the ICCID file are dealt between the accounts, and every account runs the
+    bulk upload of its batches in its own thread, browser and session: each account has its
+    own cart, so the batches never mix, and its own governor (rate limits and captcha
+    backoff). The timeouts, circuit breaker, step metrics and ledger are shared. Every
+    account records its batches under the input file as their lot, with their index in the
+    file, so a run can be resumed with or without the accounts.
+    '''
+    def __init__(self, accounts: Optional[list] = None, headless: bool = True, slow_mo: int = 0,
+                 ledger: Optional[ActivationLedger] = None, recorder: Optional[StepRecorder] = None):
+        '''
+        Args:
+            accounts (list | None): Account objects. Defaults to load_accounts().
+            headless (bool): If True, the browsers run in headless mode.
+            slow_mo (int): Slows down Playwright operations, in milliseconds.
+            ledger (ActivationLedger | None): Ledger written by every account (needed to resume).
+            recorder (StepRecorder | None): Recorder shared by every account. Defaults to a
+                                            recorder appending to METRICS_JSONL_PATH.
+        '''
+        self.accounts = accounts if accounts is not None else load_accounts()
+        if not self.accounts:
+            raise ValueError('At least one account is needed')
+        self.headless = headless
+        self.slow_mo = slow_mo
+        self.ledger = ledger
+        self.owns_recorder = recorder is None
+        self.recorder = recorder or StepRecorder(METRICS_JSONL_PATH)
+        self.timeout_policy = TimeoutPolicy(TIMEOUTS_PATH)
+        self.circuit_breaker = CircuitBreaker()
+        self.recorder.listeners.extend([self.timeout_policy.observe, self.circuit_breaker.observe])
+        self.recorder.collectors.append(self.prometheus_text)
+
+    def _run_shard(self, account: Account, file_path: str, batches: set, options: dict, reports: dict):
+        '''
+        Worker thread: bulk upload of the batches of the file dealt to one account.
+        '''
+        report = BulkUploadReport(options['batch_size'])
+        if batches:
+            try:
+                automation = SaitroAutomation(
+                    headless=self.headless, slow_mo=self.slow_mo, reuse_session=True,
+                    state_path=account.state_path, credentials=account.credentials,
+                    governor=account.governor, lifecycle=account.lifecycle, recorder=self.recorder, ledger=self.ledger,
+                    timeout_policy=self.timeout_policy, circuit_breaker=self.circuit_breaker)
+                report = automation.bulk_set_shopping_cart(file_path, only_batches=batches, **options)
+            except Exception as e:
+                print(f'[] Account \'{account.name}\' stopped: {e}')
+        # Batches never reached (e.g. failed login) are reported as failed, so they are retried
+        for batch_index in sorted(batches):
+            if batch_index not in report.succeeded and batch_index not in report.failed:
+                report.failed[batch_index] = ActionResult('bulk_set_cart', False,
+                                                          message=f'Not processed by account \'{account.name}\'')
+        reports[account.name] = report
+
+    def bulk_set_shopping_cart(self, file_path: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                               client_info: str = DEFAULT_CLIENT_INFO, apn: str = DEFAULT_APN,
+                               only_batches: Optional[set] = None, validate: bool = True,
+                               resume: bool = False) -> ShardedUploadReport:
+        '''
+        Uploads and confirms a large ICCID file in batches, spread across the accounts.
+
+        Args:
+            file_path (str): The absolute or relative path to the ICCID file.
+            batch_size (int): Number of ICCIDs per batch.
+            client_info (str): The client information to fill in the 'Info Cliente' field.
+            apn (str): The APN to select from the dropdown.
+            only_batches (set | None): If given, only these batches of the file are processed.
+            validate (bool): If True, the ICCIDs are validated and deduplicated while the
+                             file is read (by every account, in memory).
+            resume (bool): Requires a ledger. If True, every account resumes its shard.
+
+        Returns:
+            ShardedUploadReport: The merged report, and the report of every account.
+        '''
+        merged = ShardedUploadReport(batch_size)
+        if not os.path.exists(file_path):
+            print(f'Error: File not found at \'{os.path.abspath(file_path)}\'. Automation aborted.')
+            return merged
+        shards = shard_batches(file_path, self.accounts, batch_size, only_batches, validate)
+        if not any(batches for _, batches in shards):
+            print(f'Automation stopped: No valid ICCID to upload in \'{file_path}\'.')
+            return merged
+
+        options = dict(batch_size=batch_size, client_info=client_info, apn=apn, validate=validate,
+                       resume=resume, lot=os.path.abspath(file_path))
+        reports = {}
+        workers = []
+        for account, batches in shards:
+            print(f'[] Account \'{account.name}\': {len(batches)} batches.')
+            worker = threading.Thread(target=self._run_shard, name=f'saitro-account-{account.name}',
+                                      args=(account, file_path, batches, options, reports))
+            worker.start()
+            workers.append(worker)
+        for worker in workers:
+            worker.join()
+
+        for account in self.accounts:
+            report = reports[account.name]
+            merged.accounts[account.name] = report
+            merged.iccid_count += report.iccid_count
+            merged.succeeded.extend(report.succeeded)
+            merged.failed.update(report.failed)
+        merged.succeeded.sort()
+        print(f'[] Sharded upload finished: {len(merged.succeeded)} batches succeeded, {len(merged.failed)} failed '
+              f'({", ".join(f"{name}: {len(report.succeeded)}/{len(report.succeeded) + len(report.failed)}" for name, report in merged.accounts.items())}).')
+        return merged
+
+    def prometheus_text(self) -> str:
+        '''
+        Exports the governor state and the context counters of every account in the
+        Prometheus text format.
+        '''
+        return (governors_prometheus_text([account.governor for account in self.accounts])
+                + lifecycles_prometheus_text([account.lifecycle for account in self.accounts]))
+
+    def close(self):
+        '''
+        Saves the learned timeouts and closes the shared recorder if the pool created it.
+        '''
+        for listener in (self.timeout_policy.observe, self.circuit_breaker.observe):
+            self.recorder.listeners.remove(listener)
+        self.recorder.collectors.remove(self.prometheus_text)
+        self.timeout_policy.save()
+        if self.owns_recorder:
+            self.recorder.close()
+
+    def __enter__(self) -> 'AccountPool':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,684 @@
+# saitro_async.py
+import os
+import json
+import time
+import asyncio
+import functools
+from typing import Iterable, Optional
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright, Response
+
+from saitro_automation import (
+    SaitroBase, ActionResult, IccidSource, _is_action_response, _interpret_action_payload, _upload_source,
+    _iter_file_iccids, upload_payload, ICCID_PATTERN, LOGIN_STATE_PATH, LOGIN_DEBUG_HTML_PATH, BASE_URL,
+    DEFAULT_PRODUCT_LABEL, DEFAULT_CLIENT_INFO, DEFAULT_APN, CANCEL_REQUEST_SELECTOR,
+    FEEDBACK_SELECTOR, FEEDBACK_ERROR_CLASSES, FEEDBACK_SEEN_SCRIPT, FRESH_FEEDBACK_SELECTOR, ACTION_TIMEOUT,
+    SCRAPE_SELECTS_SCRIPT, SET_SELECT_SCRIPT,
+)
+from saitro_catalog import ProductCatalog, UnknownOptionError, PRODUCT_SELECT, APN_SELECT
+from saitro_governor import Governor, KIND_LOGIN, KIND_NAVIGATION, KIND_POST, detect_challenge
+from saitro_ledger import ActivationLedger, STATUS_CONFIRMED, STATUS_CLEARED
+from saitro_metrics import StepRecorder
+from saitro_session import SessionExpiredError
+from saitro_timeouts import TimeoutPolicy, CircuitBreaker
+
+# --- Constants and Configuration ---
+UPLOAD_INPUT_SELECTOR = 'input[type=\'file\'][name=\'arquivo\']' # 'arquivo' is HTML attribute, kept as is
+
+
+async def _parse_action_response(response: Response) -> tuple:
+    '''
+    Interprets the body of an AJAX response (async counterpart of the sync helper).
+
+    Returns:
+        tuple: (ok, message) where ok is False for HTTP errors or error payloads.
+    '''
+    try:
+        payload = await response.json()
+    except Exception:
+        # Not JSON (or body no longer available after a navigation): rely on the status
+        payload = None
+    return _interpret_action_payload(response.status, payload)
+
+
+def _async_session_guarded(step):
+    '''
+    Coroutine counterpart of saitro_automation._session_guarded: a step that loses the
+    session is replayed once, after the session has been renewed for every instance sharing
+    the login state.
+    '''
+    @functools.wraps(step)
+    async def guarded(self, *args, **kwargs):
+        if self._guard_depth:
+            # Called from another guarded step, which recovers for both
+            return await step(self, *args, **kwargs)
+        self._guard_depth += 1
+        try:
+            self._session_lost = False
+            try:
+                result = await step(self, *args, **kwargs)
+                if result or not self._session_expired():
+                    return result
+            except Exception as e:
+                if not self._session_expired():
+                    raise
+                print(f'[] Step interrupted: {e}')
+            print(f'[] Session expired during \'{step.__name__.lstrip("_")}\'. Logging in again...')
+            if not await self._reauthenticate():
+                raise SessionExpiredError('The session expired and the login failed')
+            self._session_lost = False
+            return await step(self, *args, **kwargs)
+        finally:
+            self._guard_depth -= 1
+    return guarded
+
+
+class AsyncSaitroAutomation(SaitroBase):
+    '''
+    Asyncio counterpart of SaitroAutomation, built on playwright.async_api. Both share the
+    hooks of SaitroBase (governor, session guard, recorder, learned timeouts, circuit breaker,
+    catalog), so a step is timed, paced and recovered the same way in either.
+
+    The operations are coroutines, so many pages can be driven concurrently from a single
+    event loop. Unlike SaitroAutomation, the workflows do not close the browser when they
+    finish: use `async with` or call `close()` once the instance is no longer needed.
+
+    Example:
+        async with await AsyncSaitroAutomation.create(headless=True, reuse_session=True) as automation:
+            workers = [automation] + [await automation.new_worker() for _ in range(3)]
+            await asyncio.gather(*(w.set_shopping_cart(f) for w, f in zip(workers, csv_files)))
+    '''
+    def __init__(self, playwright: Optional[Playwright], browser: Browser, context: BrowserContext,
+                 page: Page, reuse_session: bool = False, owns_browser: bool = True,
+                 base_url: str = BASE_URL, state_path: str = LOGIN_STATE_PATH,
+                 owns_context: bool = True, governor: Optional[Governor] = None,
+                 recorder: Optional[StepRecorder] = None, ledger: Optional[ActivationLedger] = None,
+                 catalog: Optional[ProductCatalog] = None, timeout_policy: Optional[TimeoutPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None, credentials: Optional[dict] = None,
+                 session_name: Optional[str] = None):
+        '''
+        Use `AsyncSaitroAutomation.create()` (or `new_worker()`, `new_page()`) instead of calling this directly.
+        '''
+        super().__init__(reuse_session, base_url, state_path, recorder, ledger, catalog, timeout_policy,
+                         circuit_breaker, credentials, governor, session_name)
+        self._guard_depth = 0
+        self.playwright = playwright
+        self.browser = browser
+        self.context = context
+        self.page = page
+        self.owns_browser = owns_browser
+        self.owns_context = owns_context
+        if owns_context:
+            self.context.on('response', self._on_governed_response)
+        # Per page: a page sharing the context must not see the session lost by another one
+        self.page.on('response', self._on_session_response)
+
+    @classmethod
+    async def create(cls, headless: bool = False, slow_mo: int = 100, reuse_session: bool = False,
+                     base_url: str = BASE_URL, state_path: str = LOGIN_STATE_PATH,
+                     governor: Optional[Governor] = None, recorder: Optional[StepRecorder] = None,
+                     ledger: Optional[ActivationLedger] = None, catalog: Optional[ProductCatalog] = None,
+                     timeout_policy: Optional[TimeoutPolicy] = None,
+                     circuit_breaker: Optional[CircuitBreaker] = None,
+                     credentials: Optional[dict] = None) -> 'AsyncSaitroAutomation':
+        '''
+        Starts Playwright, launches Chromium and opens a context and a page.
+
+        Args:
+            headless (bool): If True, the browser runs in headless mode (no UI).
+            slow_mo (int): Slows down Playwright operations by the specified amount of milliseconds.
+            reuse_session (bool): If True, the context is created from the saved login state
+                                  and the login form is only used when that session has expired.
+            base_url (str): Scheme and host of the platform (or of a local stand-in server).
+            state_path (str): File where the login storage state is saved and read back.
+            governor, recorder, ledger, catalog, timeout_policy, circuit_breaker, credentials:
+                See SaitroAutomation. The instances opened by `new_worker()` and `new_page()`
+                share them.
+
+        Returns:
+            AsyncSaitroAutomation: The new instance.
+        '''
+        print('-' * 30)
+        print('Robotic Process Automation - Saitro (async)')
+        playwright = await async_playwright().start()
+        browser = await playwright.chromium.launch(headless=headless, slow_mo=slow_mo)
+        storage_state = state_path if reuse_session and os.path.exists(state_path) else None
+        context = await browser.new_context(storage_state=storage_state)
+        page = await context.new_page()
+        return cls(playwright, browser, context, page, reuse_session, base_url=base_url, state_path=state_path,
+                   governor=governor, recorder=recorder, ledger=ledger, catalog=catalog,
+                   timeout_policy=timeout_policy, circuit_breaker=circuit_breaker, credentials=credentials)
+
+    def _child_hooks(self) -> dict:
+        '''
+        Returns the hooks of an instance opened from this one. It works with the same session,
+        so it renews it through the saved login state like this one.
+        '''
+        return dict(self._hooks(), reuse_session=True)
+
+    async def new_worker(self) -> 'AsyncSaitroAutomation':
+        '''
+        Opens another isolated context in the same browser, seeded with the current session,
+        so that it can run workflows concurrently with this instance.
+
+        Returns:
+            AsyncSaitroAutomation: An instance sharing this browser. Closing it only closes its context.
+        '''
+        storage_state = await self.context.storage_state()
+        context = await self.browser.new_context(storage_state=storage_state)
+        page = await context.new_page()
+        return AsyncSaitroAutomation(None, self.browser, context, page, owns_browser=False, **self._child_hooks())
+
+    async def new_page(self) -> 'AsyncSaitroAutomation':
+        '''
+        Opens another page in the same context (same session and same cart), so that two
+        stages of a workflow can drive the platform at the same time.
+
+        Returns:
+            AsyncSaitroAutomation: An instance sharing this context. Closing it only closes its page.
+        '''
+        page = await self.context.new_page()
+        return AsyncSaitroAutomation(None, self.browser, self.context, page, owns_browser=False, owns_context=False,
+                                     **self._child_hooks())
+
+    async def _acquire(self, kind: str):
+        '''
+        Waits for the governor without blocking the other coroutines of the event loop.
+        '''
+        await asyncio.to_thread(self.governor.acquire, kind)
+
+    async def _load_saved_session(self) -> bool:
+        '''
+        Loads into this context the cookies of the login state saved by another instance.
+
+        Returns:
+            bool: True if they hold a valid session.
+        '''
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as state_file:
+                cookies = json.load(state_file).get('cookies', [])
+        except (OSError, ValueError):
+            return False
+        await self.context.clear_cookies()
+        await self.context.add_cookies(cookies)
+        return await self.is_session_valid()
+
+    async def _reauthenticate(self) -> bool:
+        '''
+        Renews an expired session through the single-flight guard of the state file (see
+        SaitroAutomation._reauthenticate).
+
+        Returns:
+            bool: True if the context is authenticated again.
+        '''
+        generation = await self.session_guard.refresh_async(self.session_generation, self.login,
+                                                            self._load_saved_session, shared=self.reuse_session)
+        if generation is None:
+            return False
+        print(f'[] Session renewed (generation {generation}).')
+        self.session_generation = generation
+        return True
+
+    async def login(self) -> bool:
+        '''
+        Performs the login operation on the Saitro platform.
+
+        Returns:
+            bool: True if login is successful and redirected to dashboard, False otherwise.
+        '''
+        print('[1] Opening login page...')
+        await self._acquire(KIND_NAVIGATION)
+        with self._step('login.open', url=self.login_url):
+            await self.page.goto(self.login_url)
+
+        print('[2] Filling login form...')
+        credentials = self._get_credentials()
+        with self._step('login.fill', selector='input#login, input#senha'):
+            await self.page.fill('input#login', credentials['user'])
+            await self.page.fill('input#senha', credentials['pwd'])
+
+        print('[3] Clicking login button...')
+        await self._acquire(KIND_LOGIN)
+        with self._step('login.submit', selector='button[data-post=\'ajax-login\']'):
+            await self.page.click('button[data-post=\'ajax-login\']')
+
+        print('[4] Waiting for redirect or dashboard...')
+        try:
+            with self._step('login.redirect', url='**/dashboard/**'):
+                await self.page.wait_for_url('**/dashboard/**', timeout=self._timeout('login.redirect', 10000))
+            print('[] Login succeeded! Current URL:', self.page.url)
+            await self.context.storage_state(path=self.state_path)
+            return True
+        except Exception as e:
+            print(f'[] Login did not redirect. Still at: {self.page.url}. Error: {e}')
+            content = await self.page.content()
+            with open(LOGIN_DEBUG_HTML_PATH, 'w', encoding='utf-8') as f:
+                f.write(content)
+            # A captcha or throttling page: slow down before the next attempt
+            reason = detect_challenge(content)
+            if reason:
+                self.governor.report_challenge(reason)
+            return False
+
+    async def is_session_valid(self) -> bool:
+        '''
+        Checks with a single GET request (no page load) whether the context is still authenticated.
+
+        Returns:
+            bool: True if the activation page is served for the current session, False otherwise.
+        '''
+        await self._acquire(KIND_NAVIGATION)
+        with self._step('session.check', url=self.activation_url) as span:
+            try:
+                response = await self.context.request.get(self.activation_url, max_redirects=0)
+            except Exception as e:
+                print(f'[] Session check failed: {e}')
+                span['outcome'] = 'error'
+                return False
+            body = await response.text() if response.status == 200 else ''
+            valid = response.status == 200 and 'name="senha"' not in body and "name='senha'" not in body
+            if not valid:
+                span['outcome'] = 'failed'
+            return valid
+
+    async def ensure_logged_in(self) -> bool:
+        '''
+        Makes sure the context is authenticated, reusing the saved session when enabled.
+
+        Returns:
+            bool: True if the context is authenticated, False otherwise.
+        '''
+        if self.reuse_session and os.path.exists(self.state_path):
+            print('[1] Checking saved session...')
+            if await self.is_session_valid():
+                print('[] Saved session is still valid. Skipping login form.')
+                return True
+            print('[] Saved session expired. Logging in again...')
+            # Workers starting together with an expired session log in only once
+            return await self._reauthenticate()
+        return await self.login()
+
+    async def select_product(self, product_label: str = DEFAULT_PRODUCT_LABEL):
+        '''
+        Selects a specific product from the dropdown on the activation page.
+
+        Args:
+            product_label (str): The label of the product to select.
+        '''
+        print(f'[6] Selecting the product: \'{product_label}\'...')
+        with self._step('activation.select_product', selector='select[name=\'id_produto\']'):
+            await self.page.wait_for_selector('select[name=\'id_produto\']', state='attached')
+            await self._set_select(PRODUCT_SELECT, product_label)
+
+    async def _refresh_catalog(self):
+        '''
+        Scrapes the product and APN options of the activation page into the catalog.
+        '''
+        with self._step('catalog.refresh', url=self.page.url):
+            self.catalog.update(await self.page.evaluate(SCRAPE_SELECTS_SCRIPT, [PRODUCT_SELECT, APN_SELECT]))
+        print(f'[] Catalog refreshed: {len(self.catalog.options(PRODUCT_SELECT))} products, '
+              f'{len(self.catalog.options(APN_SELECT))} APNs.')
+
+    async def _set_select(self, select_name: str, label: str):
+        '''
+        Sets the value of a select of the activation page from its option label, using the
+        catalog (scraped from the page when outdated). Must be called on the activation page.
+
+        Raises:
+            UnknownOptionError: If the label is not among the options of the select.
+        '''
+        selector = f'select[name=\'{select_name}\']'
+        for attempt in range(2):
+            try:
+                value = self.catalog.value(select_name, label)
+            except UnknownOptionError:
+                if attempt:
+                    raise
+                value = None
+            if value is not None and await self.page.eval_on_selector(selector, SET_SELECT_SCRIPT, value):
+                return
+            if not attempt:
+                # Not cached yet, or the cached options no longer match the page: scrape them once
+                await self._refresh_catalog()
+        raise UnknownOptionError(f'Unknown {select_name} option \'{label}\'')
+
+    async def open_activation_page(self, product_label: str = DEFAULT_PRODUCT_LABEL, reload: bool = False):
+        '''
+        Makes sure the page shows the activation page with the given product selected,
+        without reloading it when it already does.
+
+        Args:
+            product_label (str): The label of the product to select.
+            reload (bool): If True, the page is loaded again even when it already shows the
+                           activation page (e.g. to see a cart changed from another page).
+        '''
+        if reload or not self.page.url.startswith(self.activation_url):
+            print('[5] Accessing activation page...')
+            await self._acquire(KIND_NAVIGATION)
+            with self._step('activation.open', url=self.activation_url):
+                await self.page.goto(self.activation_url)
+        elif await self.page.eval_on_selector(
+                'select[name=\'id_produto\']',
+                'select => select.selectedOptions.length ? select.selectedOptions[0].label.trim() : \'\'') == product_label:
+            await self._dismiss_open_modal()
+            return
+        await self._dismiss_open_modal()
+        await self.select_product(product_label)
+
+    async def _dismiss_open_modal(self):
+        '''
+        Closes a modal left open by a previous step.
+        '''
+        open_modal = self.page.locator('div.modal.in, div.modal.show')
+        if await open_modal.count() and await open_modal.first.is_visible():
+            await self.page.keyboard.press('Escape')
+            await open_modal.first.wait_for(state='hidden', timeout=5000)
+
+    async def _submit_and_wait(self, action: str, selector: str, timeout: Optional[int] = None) -> ActionResult:
+        '''
+        Clicks a submitting element and returns as soon as the AJAX response of the post it
+        triggers, or the success/error toast, is observed.
+
+        Args:
+            action (str): Name of the action, used in the returned result.
+            selector (str): Selector of the element to click.
+            timeout (int | None): Maximum time to wait for the answer, in milliseconds.
+                                  Defaults to the timeout learned for the step, or ACTION_TIMEOUT.
+
+        Returns:
+            ActionResult: The outcome of the action.
+        '''
+        timeout = timeout or self._timeout(f'{action}.submit', ACTION_TIMEOUT)
+        await self._acquire(KIND_POST)
+        started = time.monotonic()
+        with self._step(f'{action}.submit', selector=selector, url=self.page.url) as span:
+            await self.page.eval_on_selector_all(FEEDBACK_SELECTOR, FEEDBACK_SEEN_SCRIPT)
+            response_wait = asyncio.ensure_future(
+                self.page.wait_for_event('response', _is_action_response, timeout=timeout))
+            feedback_wait = asyncio.ensure_future(
+                self.page.wait_for_selector(FRESH_FEEDBACK_SELECTOR, state='visible', timeout=timeout))
+            try:
+                await self.page.click(selector)
+                pending = {response_wait, feedback_wait}
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    elapsed_ms = (time.monotonic() - started) * 1000
+                    if response_wait in done and not response_wait.exception():
+                        response = response_wait.result()
+                        ok, message = await _parse_action_response(response)
+                        span['outcome'] = 'ok' if ok else 'failed'
+                        return ActionResult(action, ok, response.status, message, elapsed_ms)
+                    if feedback_wait in done and not feedback_wait.exception():
+                        feedback = feedback_wait.result()
+                        classes = (await feedback.get_attribute('class') or '').split()
+                        ok = not any(name in classes for name in FEEDBACK_ERROR_CLASSES)
+                        span['outcome'] = 'ok' if ok else 'failed'
+                        return ActionResult(action, ok, None, (await feedback.inner_text()).strip(), elapsed_ms)
+            finally:
+                for waiter in (response_wait, feedback_wait):
+                    if not waiter.done():
+                        waiter.cancel()
+                # Retrieve exceptions so that asyncio does not log them as never retrieved
+                await asyncio.gather(response_wait, feedback_wait, return_exceptions=True)
+            span['outcome'] = 'timeout'
+        return ActionResult(action, False, None, f'No answer from the server after {timeout} ms',
+                            (time.monotonic() - started) * 1000)
+
+    @_async_session_guarded
+    async def _clear_cart(self, product_label: str = DEFAULT_PRODUCT_LABEL) -> ActionResult:
+        '''
+        Clears the shopping cart through the cart modal. Assumes the user is logged in.
+        '''
+        await self.open_activation_page(product_label)
+
+        print('[7] Shopping cart...')
+        with self._step('clear_cart.open_cart', selector='a[data-original-title=\'Visualizar\']'):
+            await self.page.click('a[data-original-title=\'Visualizar\']')
+
+        print('[9] Clearing shopping cart (inside modal)...')
+        with self._step('clear_cart.clear', selector='div.modal-body a[data-original-title=\'Limpar Carrinho\']'):
+            await self.page.wait_for_selector('div.modal-body', state='visible', timeout=self._timeout('clear_cart.clear', 5000))
+            clear_cart_button_modal = self.page.locator('div.modal-body a[data-original-title=\'Limpar Carrinho\']')
+            await clear_cart_button_modal.wait_for(state='visible', timeout=self._timeout('clear_cart.clear', 5000))
+            await clear_cart_button_modal.scroll_into_view_if_needed()
+            await clear_cart_button_modal.click(force=True)
+
+        print('[10] Confirming shopping cart clear...')
+        with self._step('clear_cart.dialog', selector='button.btn-send:text(\'Sim\')'):
+            await self.page.wait_for_selector('button.btn-send:text(\'Sim\')', timeout=self._timeout('clear_cart.dialog', 5000))
+        result = await self._submit_and_wait('clear_cart', 'button.btn-send:text(\'Sim\')')
+        print(f'[] Clear cart: ok={result.ok} ({result.elapsed_ms:.0f} ms) {result.message}')
+        if result and self.ledger:
+            self.ledger.mark_cart(STATUS_CLEARED, self.cart)
+        return result
+
+    async def _upload_cart_file(self, file_path: str, product_label: str = DEFAULT_PRODUCT_LABEL,
+                                lot: Optional[str] = None, batch: Optional[int] = None) -> ActionResult:
+        '''
+        Uploads a CSV file through the "Add via Upload" modal. Assumes the user is logged in.
+
+        Args:
+            lot (str | None): Lot recorded in the ledger for the uploaded ICCIDs.
+            batch (int | None): Batch index recorded in the ledger for the uploaded ICCIDs.
+        '''
+        absolute_file_path = os.path.abspath(file_path)
+        if not os.path.exists(absolute_file_path):
+            print(f'Error: File not found at \'{absolute_file_path}\'. Automation aborted.')
+            return ActionResult('set_cart', False, message=f'File not found: {absolute_file_path}')
+
+        await self._open_upload(product_label)
+        return await self._send_upload(absolute_file_path, product_label, _iter_file_iccids(absolute_file_path), lot, batch)
+
+    @_async_session_guarded
+    async def _open_upload(self, product_label: str = DEFAULT_PRODUCT_LABEL):
+        '''
+        Opens the "Add via Upload" modal, up to the file input. Nothing is sent to the cart.
+        '''
+        await self.open_activation_page(product_label)
+
+        print('[8] Clicking on \'Add via Upload\' button...')
+        with self._step('set_cart.open_upload', selector='a[data-original-title=\'Adicionar via Carga\']'):
+            await self.page.click('a[data-original-title=\'Adicionar via Carga\']')
+
+            print('[9] Waiting for file input to appear...')
+            await self.page.wait_for_selector(UPLOAD_INPUT_SELECTOR, timeout=self._timeout('set_cart.open_upload', 10000))
+
+    @_async_session_guarded
+    async def _send_upload(self, files, product_label: str = DEFAULT_PRODUCT_LABEL,
+                           iccids: Optional[Iterable[str]] = None, lot: Optional[str] = None,
+                           batch: Optional[int] = None) -> ActionResult:
+        '''
+        Selects a file in the upload modal opened by `_open_upload` and submits it to the cart.
+        The modal is opened again when it is not (e.g. when the step is replayed after the
+        session was renewed).
+
+        Args:
+            files (str | dict): Absolute path of the file, or an in-memory file (see upload_payload).
+            product_label (str): The product the upload modal is opened for.
+            iccids (iterable | None): The ICCIDs of the file, recorded in the ledger once uploaded.
+            lot (str | None): Lot recorded in the ledger for the uploaded ICCIDs.
+            batch (int | None): Batch index recorded in the ledger for the uploaded ICCIDs.
+        '''
+        if not await self.page.locator(UPLOAD_INPUT_SELECTOR).first.is_visible():
+            await self._open_upload(product_label)
+
+        print(f'[10] Selecting the file \'{files["name"] if isinstance(files, dict) else os.path.basename(files)}\'...')
+        with self._step('set_cart.select_file', selector=UPLOAD_INPUT_SELECTOR):
+            await self.page.set_input_files(UPLOAD_INPUT_SELECTOR, files)
+
+        print('[11] Clicking the \'Submit\' button...')
+        result = await self._submit_and_wait('set_cart', 'button#send')
+        print(f'[] Upload: ok={result.ok} ({result.elapsed_ms:.0f} ms) {result.message}')
+        if result and self.ledger and iccids is not None:
+            self.ledger.record_uploaded(iccids, lot, batch, self.cart)
+        return result
+
+    @_async_session_guarded
+    async def _confirm_cart(self, client_info: str, apn: str, product_label: str = DEFAULT_PRODUCT_LABEL,
+                            reload: bool = False) -> ActionResult:
+        '''
+        Processes the shopping cart, fills in client information and selects an APN.
+        Assumes the user is logged in.
+
+        Args:
+            reload (bool): If True, the activation page is loaded again first (e.g. to see a
+                           cart changed from another page).
+        '''
+        await self.open_activation_page(product_label, reload)
+
+        print('[8] Clicking on the shopping cart...')
+        with self._step('confirm_cart.open_cart', selector='a[data-original-title=\'Visualizar\']'):
+            await self.page.click('a[data-original-title=\'Visualizar\']')
+
+        print('[9] Process shopping cart...')
+        with self._step('confirm_cart.process', selector='button[id=\'processar\']'):
+            await self.page.click('button[id=\'processar\']')
+
+        print('[10] Filling information...')
+        with self._step('confirm_cart.fill', selector='input[name=\'info_cliente\']'):
+            await self.page.fill('input[name=\'info_cliente\']', client_info)
+
+        print(f'[11] Selecting APN \'{apn}\'...')
+        with self._step('confirm_cart.select_apn', selector='select[name=\'apns\']'):
+            if await self.page.locator('select[name=\'apns\']').count():
+                # Sets the select hidden behind the bootstrap-select dropdown directly
+                await self._set_select(APN_SELECT, apn)
+            else:
+                await self.page.click('button.dropdown-toggle[data-id=\'apns\']')
+                await self.page.click(f'ul.dropdown-menu.inner li:text(\'{apn}\')',
+                                      timeout=self._timeout('confirm_cart.select_apn', 5000))
+
+        print('[12] Confirming processing')
+        with self._step('confirm_cart.dialog', selector='button[id=\'submitButton\']'):
+            await self.page.click('button[id=\'submitButton\']')
+            await self.page.wait_for_selector('button.btn-send:text(\'Sim\')', timeout=self._timeout('confirm_cart.dialog', 5000))
+        result = await self._submit_and_wait('confirm_cart', 'button.btn-send:text(\'Sim\')')
+        print(f'[] Confirmation: ok={result.ok} ({result.elapsed_ms:.0f} ms) {result.message}')
+        if result and self.ledger:
+            self.ledger.mark_cart(STATUS_CONFIRMED, self.cart)
+        return result
+
+    @_async_session_guarded
+    async def _cancel_request(self) -> ActionResult:
+        '''
+        Cancels the first outstanding request on the requests page. Assumes the user is logged in.
+        '''
+        print('[5] Accessing request page...')
+        await self._acquire(KIND_NAVIGATION)
+        with self._step('clear_requests.open', url=self.request_url):
+            await self.page.goto(self.request_url)
+
+        print('[7] Clicking on \'Cancel Request\' button...')
+        with self._step('clear_requests.cancel', selector=CANCEL_REQUEST_SELECTOR):
+            await self.page.wait_for_selector(CANCEL_REQUEST_SELECTOR, timeout=self._timeout('clear_requests.cancel', 5000))
+            iccid = await self._request_row_iccid(CANCEL_REQUEST_SELECTOR) if self.ledger else None
+            await self.page.click(CANCEL_REQUEST_SELECTOR)
+            await self.page.wait_for_selector('button.btn-send:text(\'Sim\')', timeout=self._timeout('clear_requests.cancel', 5000))
+        result = await self._submit_and_wait('clear_requests', 'button.btn-send:text(\'Sim\')')
+        print(f'[] Cancel request: ok={result.ok} ({result.elapsed_ms:.0f} ms) {result.message}')
+        if result and iccid:
+            self.ledger.record_cancelled(iccid)
+        return result
+
+    async def _request_row_iccid(self, selector: str) -> Optional[str]:
+        '''
+        Returns the ICCID shown in the listing row of the first element matching the selector.
+        '''
+        row_text = await self.page.eval_on_selector(selector, 'link => (link.closest(\'tr\') || link.parentElement).innerText')
+        match = ICCID_PATTERN.search(row_text or '')
+        return match.group(0) if match else None
+
+    async def clear_shopping_cart(self, product_label: str = DEFAULT_PRODUCT_LABEL) -> ActionResult:
+        '''
+        Selects a product on the activation page and clears the shopping cart.
+
+        Returns:
+            ActionResult: The outcome reported by the server.
+        '''
+        if not await self.ensure_logged_in():
+            return ActionResult('login', False, message='Login failed')
+        return await self._clear_cart(product_label)
+
+    async def set_shopping_cart(self, file_path: IccidSource, product_label: str = DEFAULT_PRODUCT_LABEL,
+                                validate: bool = True) -> ActionResult:
+        '''
+        Selects a product on the activation page and uploads a CSV file to the shopping cart.
+
+        Args:
+            file_path (str | bytes | iterable): The absolute or relative path to the CSV file to
+                                                upload, or the ICCIDs themselves, sent as an
+                                                in-memory file.
+            validate (bool): If True, malformed, duplicated and (with a ledger) already
+                             confirmed ICCIDs are removed before the upload, like
+                             SaitroAutomation.set_shopping_cart does. A file is read and
+                             sent from memory either way.
+
+        Returns:
+            ActionResult: The outcome reported by the server.
+        '''
+        try:
+            self._check_options(product_label)
+        except UnknownOptionError as e:
+            return ActionResult('set_cart', False, message=str(e))
+        exclude = self.ledger.is_confirmed if self.ledger else None
+        iccids, lot, error = _upload_source(file_path, validate, exclude)
+        if error is not None:
+            return error
+        if not await self.ensure_logged_in():
+            return ActionResult('login', False, message='Login failed')
+        await self._open_upload(product_label)
+        return await self._send_upload(upload_payload(iccids), product_label, iccids, lot)
+
+    async def confirm_shopping_cart(self, client_info: str = DEFAULT_CLIENT_INFO, apn: str = DEFAULT_APN,
+                                    product_label: str = DEFAULT_PRODUCT_LABEL) -> ActionResult:
+        '''
+        Processes the shopping cart, fills in client information and selects an APN.
+
+        Args:
+            client_info (str): The client information to fill in the 'Info Cliente' field.
+            apn (str): The APN to select from the dropdown.
+
+        Returns:
+            ActionResult: The outcome reported by the server.
+        '''
+        try:
+            self._check_options(product_label, apn)
+        except UnknownOptionError as e:
+            return ActionResult('confirm_cart', False, message=str(e))
+        if not await self.ensure_logged_in():
+            return ActionResult('login', False, message='Login failed')
+        return await self._confirm_cart(client_info, apn, product_label)
+
+    async def clear_requests(self) -> ActionResult:
+        '''
+        Cancels the first outstanding request on the requests page.
+
+        Returns:
+            ActionResult: The outcome reported by the server.
+        '''
+        if not await self.ensure_logged_in():
+            return ActionResult('login', False, message='Login failed')
+        return await self._cancel_request()
+
+    async def close(self):
+        '''
+        Closes the context of this instance, and the browser and Playwright when it owns them.
+        The hooks it created (recorder, learned timeouts) are released; shared ones are left
+        to the instance that opened it.
+        '''
+        if self.owns_context:
+            await self.context.close()
+        else:
+            await self.page.close()
+        self._release_hooks()
+        if self.owns_browser:
+            await self.browser.close()
+            if self.playwright:
+                await self.playwright.stop()
+            print('Automation finished. Browser closed.')
+            print('-' * 30)
+
+    async def __aenter__(self) -> 'AsyncSaitroAutomation':
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
@@ -1,7 +1,28 @@
 # saitro_automation.py
+from __future__ import annotations
+
 import os
+import re
 import json
-from playwright.sync_api import sync_playwright, Page, BrowserContext
+import time
+import functools
+from datetime import datetime, timedelta
+from dataclasses import dataclass, field
+from urllib.parse import urljoin
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Optional, Union
+from saitro_network import ResourceBlocker
+from saitro_metrics import StepRecorder, METRICS_JSONL_PATH
+from saitro_iccid import clean_iccids, normalize_iccid, iter_clean_iccids
+from saitro_catalog import ProductCatalog, UnknownOptionError, CATALOG_PATH, PRODUCT_SELECT, APN_SELECT
+from saitro_timeouts import TimeoutPolicy, CircuitBreaker, TIMEOUTS_PATH
+from saitro_governor import Governor, KIND_LOGIN, KIND_NAVIGATION, KIND_POST, UNLIMITED_RATES, detect_challenge
+from saitro_session import SessionGuard, SessionExpiredError, AUTH_FAILURE_STATUSES
+from saitro_lifecycle import ContextLifecycle, page_memory, SCOPE_CONTEXT
+from saitro_ledger import ActivationLedger, STATUS_CONFIRMED, STATUS_CLEARED, BATCH_STARTED, BATCH_CONFIRMED, BATCH_FAILED
+
+if TYPE_CHECKING:
+    # Playwright is only imported once a browser is started (see SaitroAutomation.__init__)
+    from playwright.sync_api import Page, BrowserContext, Response
 
 # --- Constants and Configuration ---
 # All file paths and URLs are defined as constants for easy modification
@@ -12,16 +33,607 @@ LOGIN_DEBUG_HTML_PATH = 'login_debug.html'
 THANKS_NAMES_PATH = 'thanks.json'
 
 # URLs for the Saitro platform
-LOGIN_URL = 'https://tim.saitro.com/sistema/login/'
-ACTIVATION_URL = 'https://tim.saitro.com/customer_care/ativacao/index/'
-REQUEST_URL = 'https://tim.saitro.com/customer_care/solicitacao/index/'
+BASE_URL = 'https://tim.saitro.com'
+LOGIN_PATH = '/sistema/login/'
+ACTIVATION_PATH = '/customer_care/ativacao/index/'
+REQUEST_PATH = '/customer_care/solicitacao/index/'
+LOGIN_URL = BASE_URL + LOGIN_PATH
+ACTIVATION_URL = BASE_URL + ACTIVATION_PATH
+REQUEST_URL = BASE_URL + REQUEST_PATH
+
+# Default values for the activation workflows
+DEFAULT_PRODUCT_LABEL = 'TIM 50MB R&T TIM Comp 30 IOT'
+DEFAULT_CLIENT_INFO = 'Robotic Process Automation - RPA'
+DEFAULT_APN = 'furukawaelectric.com.br'
+
+# Completion detection for AJAX actions (upload, confirmations)
+# Toast/alert messages the admin theme shows once an action has been handled
+FEEDBACK_SELECTOR = 'div.toast-success, div.toast-error, div.alert-success, div.alert-danger'
+FEEDBACK_ERROR_CLASSES = ('toast-error', 'alert-danger')
+# Toasts already on screen before a click are marked, so a toast left by the previous
+# action on the same page is never taken as the answer to the next one
+FEEDBACK_SEEN_SCRIPT = 'nodes => nodes.forEach(node => node.setAttribute(\'data-saitro-seen\', \'\'))'
+FRESH_FEEDBACK_SELECTOR = ', '.join(f'{selector}:not([data-saitro-seen])' for selector in FEEDBACK_SELECTOR.split(', '))
+ACTION_TIMEOUT = 30000 # Maximum wait for the server to answer an action, in milliseconds
+ACTION_POLL_INTERVAL = 50 # Interval used to pump Playwright events while waiting, in milliseconds
+
+# Bulk upload: number of ICCIDs sent (and confirmed) per CSV batch
+DEFAULT_BATCH_SIZE = 1000
+# Name and type of the in-memory file sent through the "Adicionar via Carga" form
+UPLOAD_FILE_NAME = 'iccids.csv'
+UPLOAD_MIME_TYPE = 'text/csv'
+# ICCID shown in a row of the requests listing or of the cart table
+ICCID_PATTERN = re.compile(r'\b8955\d{15,16}\b')
+
+# Product/APN catalog: reads the options of the activation page selects, and sets a
+# select value directly (bootstrap-select is refreshed when present, no dropdown animation)
+SCRAPE_SELECTS_SCRIPT = '''names => Object.fromEntries(names.map(name => [name, Object.fromEntries(
+    Array.from(document.querySelectorAll(`select[name="${name}"] option`))
+        .filter(option => option.value)
+        .map(option => [option.label.trim(), option.value]))]))'''
+SET_SELECT_SCRIPT = '''(select, value) => {
+    if (!Array.from(select.options).some(option => option.value === value)) return false;
+    select.value = value;
+    select.dispatchEvent(new Event('change', {bubbles: true}));
+    if (window.jQuery && window.jQuery.fn.selectpicker) window.jQuery(select).selectpicker('refresh');
+    return true;
+}'''
+
+# Requests listing: cancel links, next page link (server-side or DataTables pagination)
+# and the date format of the creation column
+CANCEL_REQUEST_SELECTOR = 'a.icon-red[data-original-title=\'Cancelar Solicitação\']'
+NEXT_PAGE_SELECTOR = 'ul.pagination li.next:not(.disabled) a, a.paginate_button.next:not(.disabled)'
+REQUEST_DATE_PATTERN = re.compile(r'\b(\d{2}/\d{2}/\d{4})(?: (\d{2}:\d{2}))?')
+# Marks the cancel links of the rows read, so each one can be clicked without re-reading the page
+READ_REQUESTS_SCRIPT = '''links => links.map((link, index) => {
+    link.setAttribute('data-saitro-row', String(index));
+    const row = link.closest('tr');
+    return {marker: String(index), cells: row ? Array.from(row.cells).map(cell => cell.innerText.trim()) : []};
+})'''
+# Bulk cancellation: passes over the listing (cancelled rows may shift the pages of the next ones)
+DEFAULT_CANCEL_PASSES = 3
+
+# Cart modal: table of the ICCIDs in the cart. An empty cart shows a single
+# placeholder row (DataTables), so a row is always present once the table is loaded.
+CART_TABLE_SELECTOR = 'div.modal-body table'
+CART_ROWS_SELECTOR = 'div.modal-body table tbody tr'
+# Reads every row of the cart table in a single evaluation
+READ_CART_SCRIPT = '''table => {
+    const headers = Array.from(table.querySelectorAll('thead th')).map(th => th.innerText.trim().toLowerCase());
+    const productColumn = headers.findIndex(header => header.startsWith('produto'));
+    return Array.from(table.querySelectorAll('tbody tr')).map(row => {
+        const cells = Array.from(row.cells).map(cell => cell.innerText.trim());
+        return {cells: cells, product: productColumn >= 0 ? (cells[productColumn] || '') : ''};
+    });
+}'''
+
+
+@dataclass
+class ActionResult:
+    '''
+    Structured outcome of a workflow action, returned as soon as the server answers.
+
+    Attributes:
+        action (str): Name of the action (e.g. 'set_cart', 'confirm_cart').
+        ok (bool): True if the server accepted the action.
+        status (int | None): HTTP status of the AJAX response, None if only a toast was seen.
+        message (str): Message returned by the server or shown in the toast.
+        elapsed_ms (float): Time between the click and the answer, in milliseconds.
+    '''
+    action: str
+    ok: bool
+    status: Optional[int] = None
+    message: str = ''
+    elapsed_ms: float = 0.0
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+
+def _is_action_response(response: Response) -> bool:
+    '''
+    Tells whether a response answers a form/AJAX post of the Saitro platform.
+    '''
+    return response.request.method == 'POST' and '/customer_care/' in response.url
+
+
+def _parse_action_response(response: Response) -> tuple:
+    '''
+    Interprets the body of an AJAX response.
+
+    Returns:
+        tuple: (ok, message) where ok is False for HTTP errors or error payloads.
+    '''
+    try:
+        payload = response.json()
+    except Exception:
+        # Not JSON (or body no longer available after a navigation): rely on the status
+        payload = None
+    return _interpret_action_payload(response.status, payload)
+
+
+def _interpret_action_payload(status: int, payload) -> tuple:
+    '''
+    Interprets the HTTP status and decoded JSON payload (None if not JSON) of an AJAX response.
+
+    Returns:
+        tuple: (ok, message) where ok is False for HTTP errors or error payloads.
+    '''
+    ok = status < 400
+    message = ''
+    if isinstance(payload, dict):
+        message = str(payload.get('msg') or payload.get('mensagem') or payload.get('message') or '')
+        if payload.get('erro') or payload.get('error'):
+            ok = False
+        if payload.get('status') in (False, 0, 'error', 'erro'):
+            ok = False
+    return ok, message
+
+
+@dataclass
+class BulkUploadReport:
+    '''
+    Per-batch outcome of a bulk upload, used to retry only the batches that failed.
+
+    Attributes:
+        batch_size (int): Number of ICCIDs per batch.
+        succeeded (list): Indexes (0-based) of the batches uploaded and confirmed.
+        failed (dict): Index of each failed batch mapped to the ActionResult that failed it.
+        iccid_count (int): Number of ICCIDs sent in the processed batches.
+    '''
+    batch_size: int
+    succeeded: list = field(default_factory=list)
+    failed: dict = field(default_factory=dict)
+    iccid_count: int = 0
+
+    @property
+    def failed_batches(self) -> set:
+        '''
+        Indexes of the failed batches, ready to be passed back as `only_batches`.
+        '''
+        return set(self.failed)
+
+    def merge(self, retry: 'BulkUploadReport'):
+        '''
+        Folds in the report of a retry of the failed batches: the batches it confirmed move
+        from `failed` to `succeeded`, the ones that failed again keep their latest error.
+        '''
+        for batch_index in retry.succeeded:
+            self.failed.pop(batch_index, None)
+            if batch_index not in self.succeeded:
+                self.succeeded.append(batch_index)
+        self.succeeded.sort()
+        self.failed.update(retry.failed)
+        self.iccid_count += retry.iccid_count
+
+    def __bool__(self) -> bool:
+        return not self.failed
+
+
+@dataclass
+class CartContents:
+    '''
+    Contents of the shopping cart, as shown in the cart modal.
+
+    Attributes:
+        iccids (list): ICCIDs in the cart, in the order of the table.
+        products (dict): Label of each product in the cart mapped to its number of ICCIDs.
+    '''
+    iccids: list = field(default_factory=list)
+    products: dict = field(default_factory=dict)
+
+    @property
+    def count(self) -> int:
+        return len(self.iccids)
+
+
+@dataclass
+class RequestFilter:
+    '''
+    Selects the outstanding requests cancelled by bulk_clear_requests().
+    Every criterion left as None matches all requests.
+
+    Attributes:
+        older_than (timedelta | None): Only requests created longer ago than this.
+        statuses (set | None): Only requests showing one of these statuses (e.g. {'Pendente'}).
+        iccids (set | None): Only requests of these ICCIDs.
+    '''
+    older_than: Optional[timedelta] = None
+    statuses: Optional[set] = None
+    iccids: Optional[set] = None
+
+    def matches(self, cells: list, iccid: Optional[str], created: Optional[datetime]) -> bool:
+        '''
+        Tells whether a row of the listing (its cell texts, ICCID and creation date) is selected.
+        '''
+        if self.iccids is not None and iccid not in self.iccids:
+            return False
+        if self.statuses is not None:
+            wanted = {status.lower() for status in self.statuses}
+            if not any(cell.lower() in wanted for cell in cells):
+                return False
+        if self.older_than is not None:
+            # Rows without a readable date are kept out of age-based cancellations
+            if created is None or datetime.now() - created < self.older_than:
+                return False
+        return True
+
+
+@dataclass
+class CancellationReport:
+    '''
+    Outcome of a bulk cancellation of requests.
 
-class SaitroAutomation:
+    Attributes:
+        cancelled (list): ICCIDs (or row texts when no ICCID is shown) of the cancelled requests.
+        failed (list): (row, ActionResult) of the requests that could not be cancelled.
+        skipped (int): Outstanding requests left out by the filter.
+        pages (int): Listing pages visited.
+    '''
+    cancelled: list = field(default_factory=list)
+    failed: list = field(default_factory=list)
+    skipped: int = 0
+    pages: int = 0
+
+    def __bool__(self) -> bool:
+        return not self.failed
+
+
+def _parse_request_date(cells: list) -> Optional[datetime]:
+    '''
+    Returns the first dd/mm/yyyy [HH:MM] date found in the cells of a listing row.
+    '''
+    for cell in cells:
+        match = REQUEST_DATE_PATTERN.search(cell)
+        if match:
+            text = match.group(1) + ' ' + (match.group(2) or '00:00')
+            try:
+                return datetime.strptime(text, '%d/%m/%Y %H:%M')
+            except ValueError:
+                continue
+    return None
+
+
+# Where the upload workflows read ICCIDs from: the path of a file (one ICCID per line, like
+# dummy.csv), the bytes of such a file, or an iterable of ICCIDs (e.g. a generator, or a
+# database cursor whose rows start with the ICCID)
+IccidSource = Union[str, bytes, Iterable]
+
+
+def _iter_source_lines(source: IccidSource) -> Iterator[str]:
+    '''
+    Streams the raw lines (one ICCID each) of an ICCID source.
+    '''
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield from bytes(source).decode('utf-8-sig', errors='replace').splitlines()
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, 'r', encoding='utf-8-sig', errors='replace') as iccid_file:
+            yield from iccid_file
+    else:
+        for row in source:
+            # Database rows are tuples: the ICCID is the first column
+            yield str(row[0] if isinstance(row, (tuple, list)) else row)
+
+
+def _iter_file_iccids(source: IccidSource) -> Iterator[str]:
+    '''
+    Streams the normalized, non-blank ICCIDs of an upload file (or of any ICCID source).
+    '''
+    for line in _iter_source_lines(source):
+        iccid = normalize_iccid(line)
+        if iccid:
+            yield iccid
+
+
+def _source_iccids(source: IccidSource, validate: bool = True,
+                   exclude: Optional[Callable[[str], bool]] = None) -> list:
+    '''
+    Reads the ICCIDs of a source into memory, validated and deduplicated (see
+    saitro_iccid.clean_iccids) unless `validate` is False. The ICCIDs `exclude` returns
+    True for (e.g. ActivationLedger.is_confirmed) are dropped with them.
+    '''
+    if validate:
+        return clean_iccids(_iter_source_lines(source), exclude)
+    return list(_iter_file_iccids(source))
+
+
+def _upload_source(source: IccidSource, validate: bool = True,
+                   exclude: Optional[Callable[[str], bool]] = None) -> tuple:
+    '''
+    Reads the ICCIDs of a single upload into memory (see _source_iccids), for every kind of
+    source: a file is validated on the fly and sent as an in-memory file too, so nothing is
+    written to disk.
+
+    Returns:
+        tuple: (iccids, lot, error): lot is the absolute path of a file source (its lot in
+               the ledger), None for other sources; error is the failed ActionResult to return
+               when there is nothing to upload, None otherwise.
+    '''
+    lot = None
+    if isinstance(source, str):
+        lot = os.path.abspath(source)
+        if not os.path.exists(lot):
+            print(f'Error: File not found at \'{lot}\'. Automation aborted.')
+            return [], lot, ActionResult('set_cart', False, message=f'File not found: {lot}')
+    iccids = _source_iccids(source, validate, exclude)
+    if not iccids:
+        print('Automation stopped: No valid ICCID to upload.')
+        return iccids, lot, ActionResult('set_cart', False, message=f'No valid ICCID in {source}' if lot
+                                         else 'No valid ICCID to upload')
+    return iccids, lot, None
+
+
+def encode_iccid_csv(iccids: Iterable[str]) -> bytes:
+    '''
+    Encodes ICCIDs in the format of the upload form: one per line, UTF-8, ending with a newline.
+    '''
+    return ''.join(f'{iccid}\n' for iccid in iccids).encode('utf-8')
+
+
+def upload_payload(iccids: Iterable[str], name: str = UPLOAD_FILE_NAME) -> dict:
+    '''
+    Builds an in-memory file for `set_input_files`, so an upload does not touch the disk.
+
+    Returns:
+        dict: The file payload ({'name', 'mimeType', 'buffer'}).
+    '''
+    return {'name': name, 'mimeType': UPLOAD_MIME_TYPE, 'buffer': encode_iccid_csv(iccids)}
+
+
+def iter_iccid_batches(source: IccidSource, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[tuple]:
+    '''
+    Streams an ICCID file (one ICCID per line, like dummy.csv), or any other ICCID source,
+    in batches, without loading it whole into memory.
+
+    Args:
+        source (str | bytes | iterable): Path to the ICCID file, its bytes, or the ICCIDs.
+        batch_size (int): Maximum number of ICCIDs per batch.
+
+    Yields:
+        tuple: (batch_index, iccids) where iccids is a list of at most batch_size ICCIDs.
+    '''
+    if batch_size < 1:
+        raise ValueError('batch_size must be at least 1')
+    batch = []
+    batch_index = 0
+    for line in _iter_source_lines(source):
+        iccid = line.strip()
+        if not iccid:
+            continue
+        batch.append(iccid)
+        if len(batch) == batch_size:
+            yield batch_index, batch
+            batch_index += 1
+            batch = []
+    if batch:
+        yield batch_index, batch
+
+
+def _stream_source(source: IccidSource, validate: bool = True) -> Iterator[str]:
+    '''
+    Streams the ICCIDs of a source (a file included), validated and deduplicated on the fly
+    unless `validate` is False (the rejected values are dropped). Memory stays bounded by the
+    deduplication set, whatever the size of the source.
+    '''
+    lines = _iter_source_lines(source)
+    if not validate:
+        return lines
+    return (iccid for _, _, iccid, reason in iter_clean_iccids(lines) if reason is None)
+
+
+def _session_guarded(step):
+    '''
+    Guards a step of SaitroAutomation (a private method that assumes the user is logged in)
+    against the session expiring in the middle of it: the session is renewed once (see
+    SaitroAutomation._reauthenticate) and only that step is replayed.
+    '''
+    @functools.wraps(step)
+    def guarded(self, *args, **kwargs):
+        if self._guard_depth:
+            # Called from another guarded step, which recovers for both
+            return step(self, *args, **kwargs)
+        self._guard_depth += 1
+        try:
+            self._session_lost = False
+            try:
+                result = step(self, *args, **kwargs)
+                if result or not self._session_expired():
+                    return result
+            except Exception as e:
+                if not self._session_expired():
+                    raise
+                print(f'[] Step interrupted: {e}')
+            print(f'[] Session expired during \'{step.__name__.lstrip("_")}\'. Logging in again...')
+            if not self._reauthenticate():
+                raise SessionExpiredError('The session expired and the login failed')
+            self._session_lost = False
+            return step(self, *args, **kwargs)
+        finally:
+            self._guard_depth -= 1
+    return guarded
+
+
+class SaitroBase:
+    '''
+    Browser-independent part of SaitroAutomation and AsyncSaitroAutomation: platform URLs,
+    credentials, rate governor, session guard, step recorder, learned timeouts, circuit
+    breaker, product catalog and ledger. The subclasses drive the pages with the sync or the
+    async Playwright API, through the same hooks.
+    '''
+    def __init__(self, reuse_session: bool = False, base_url: str = BASE_URL, state_path: str = LOGIN_STATE_PATH,
+                 recorder: Optional[StepRecorder] = None, ledger: Optional[ActivationLedger] = None,
+                 catalog: Optional[ProductCatalog] = None, timeout_policy: Optional[TimeoutPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None, credentials: Optional[dict] = None,
+                 governor: Optional[Governor] = None, session_name: Optional[str] = None):
+        '''
+        See SaitroAutomation for the arguments. The hooks given by the caller are shared (and
+        left to it on close); the ones created here are released by `_release_hooks()`.
+        '''
+        self.reuse_session = reuse_session
+        self.base_url = base_url.rstrip('/')
+        # Local stand-in servers (mock_saitro.py) are not paced, and what is learned against
+        # them (timeouts, catalog) never mixes with the real platform
+        self.is_production = self.base_url == BASE_URL
+        self.state_path = state_path
+        self.credentials = credentials
+        self.session_name = session_name
+        self.owns_governor = governor is None
+        self.governor = governor or Governor(credentials['user'] if credentials else 'default',
+                                             None if self.is_production else UNLIMITED_RATES)
+        # Renews the session once per expiry for every instance sharing the state file
+        self.session_guard = SessionGuard.for_state(state_path)
+        self.session_generation = self.session_guard.generation
+        self._session_lost = False
+        self.owns_recorder = recorder is None
+        self.recorder = recorder or StepRecorder(METRICS_JSONL_PATH)
+        self.ledger = ledger
+        self.catalog = catalog or ProductCatalog(CATALOG_PATH, scope=self.base_url)
+        self.owns_timeout_policy = timeout_policy is None
+        # Durations measured against a local stand-in server are not persisted
+        self.timeout_policy = timeout_policy or TimeoutPolicy(TIMEOUTS_PATH if self.is_production else None)
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        # Both learn from the spans. Listeners already registered on a shared recorder (e.g. by
+        # the worker pool) are left to their owner; the ones added here are removed on close()
+        self.listeners = [listener for listener in (self.timeout_policy.observe, self.circuit_breaker.observe)
+                          if listener not in self.recorder.listeners]
+        self.recorder.listeners.extend(self.listeners)
+        if self.owns_governor:
+            # A shared governor is exported by its owner (pool, daemon)
+            self.recorder.collectors.append(self.governor.prometheus_text)
+        self.login_url = self.base_url + LOGIN_PATH
+        self.activation_url = self.base_url + ACTIVATION_PATH
+        self.request_url = self.base_url + REQUEST_PATH
+
+    def _hooks(self) -> dict:
+        '''
+        Returns:
+            dict: The hooks of this instance, as keyword arguments for another instance
+                  working with the same session (e.g. a second page).
+        '''
+        return dict(reuse_session=self.reuse_session, base_url=self.base_url, state_path=self.state_path,
+                    recorder=self.recorder, ledger=self.ledger, catalog=self.catalog,
+                    timeout_policy=self.timeout_policy, circuit_breaker=self.circuit_breaker,
+                    credentials=self.credentials, governor=self.governor, session_name=self.session_name)
+
+    @property
+    def cart(self) -> str:
+        '''
+        Key of the cart of this session in the ledger. Every login session has its own cart:
+        the key is the login of the account, whether its credentials were given or read from
+        USER_CREDENTIALS_PATH, followed by the session name when the account runs several
+        sessions at once (e.g. 'worker-2').
+        '''
+        login = self._get_credentials()['user']
+        return f'{login}/{self.session_name}' if self.session_name else login
+
+    def _release_hooks(self):
+        '''
+        Unregisters the listeners and collectors added by this instance, saves the learned
+        timeouts and closes the recorder, when this instance created them.
+        '''
+        for listener in self.listeners:
+            self.recorder.listeners.remove(listener)
+        self.listeners = []
+        if self.owns_governor:
+            self.recorder.collectors.remove(self.governor.prometheus_text)
+        if self.owns_timeout_policy:
+            self.timeout_policy.save()
+        if self.owns_recorder:
+            self.recorder.close()
+
+    def _on_governed_response(self, response: Response):
+        '''
+        Reports the throttling answers (HTTP 429) of the platform to the governor.
+        '''
+        reason = detect_challenge(status=response.status)
+        if reason:
+            self.governor.report_challenge(reason)
+
+    def _on_session_response(self, response: Response):
+        '''
+        Flags the session as lost when a post of the platform is refused for authentication,
+        or when a request is redirected to the login page.
+        '''
+        if response.status in AUTH_FAILURE_STATUSES and '/customer_care/' in response.url:
+            self._session_lost = True
+        elif 300 <= response.status < 400 and LOGIN_PATH in (response.headers.get('location') or ''):
+            self._session_lost = True
+
+    def _session_expired(self) -> bool:
+        '''
+        Tells whether the current step lost the session: an authentication failure was
+        answered, or the page ended up on the login page.
+        '''
+        return self._session_lost or LOGIN_PATH in self.page.url
+
+    def _get_credentials(self) -> dict:
+        '''
+        Reads user credentials from the user.json file, unless they were given to the constructor.
+
+        Returns:
+            dict: A dictionary containing 'user' and 'pwd'.
+        '''
+        if self.credentials:
+            return self.credentials
+        try:
+            with open(USER_CREDENTIALS_PATH, 'r') as user_file:
+                credentials = json.load(user_file)
+            return credentials
+        except FileNotFoundError:
+            print(f'Error: Credential file \'{USER_CREDENTIALS_PATH}\' not found.')
+            # Exit or raise an exception as credentials are essential
+            raise
+
+    def _step(self, step: str, selector: Optional[str] = None, url: Optional[str] = None):
+        '''
+        Times one step of a workflow with the instance's recorder.
+
+        Usage: `with self._step('cart.open', selector=...) as span:`; set span['outcome']
+        to 'failed' when the step completes but does not succeed.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open (the platform keeps timing out).
+        '''
+        self.circuit_breaker.check()
+        return self.recorder.span(step, selector, url)
+
+    def _timeout(self, step: str, default: int) -> int:
+        '''
+        Returns the timeout of a wait inside a step, learned from its past durations.
+
+        Args:
+            step (str): Name of the enclosing step.
+            default (int): Hard-coded timeout, in milliseconds, used until enough durations are known.
+        '''
+        return self.timeout_policy.timeout(step, default)
+
+    def _check_options(self, product_label: Optional[str] = None, apn: Optional[str] = None):
+        '''
+        Fails fast on a product or APN label missing from the cached catalog, before any page
+        is loaded (no-op when nothing is cached yet).
+
+        Raises:
+            UnknownOptionError: If a label is not among the cached options.
+        '''
+        if product_label is not None:
+            self.catalog.check(PRODUCT_SELECT, product_label)
+        if apn is not None:
+            self.catalog.check(APN_SELECT, apn)
+
+
+class SaitroAutomation(SaitroBase):
     '''
     A class to encapsulate Robotic Process Automation (RPA) tasks
     for the Saitro platform using Playwright.
     '''
-    def __init__(self, headless: bool = False, slow_mo: int = 100):
+    def __init__(self, headless: bool = False, slow_mo: int = 100, reuse_session: bool = False,
+                 cdp_endpoint: Optional[str] = None, resource_blocker: Optional[ResourceBlocker] = None,
+                 base_url: str = BASE_URL, state_path: str = LOGIN_STATE_PATH,
+                 recorder: Optional[StepRecorder] = None, ledger: Optional[ActivationLedger] = None,
+                 catalog: Optional[ProductCatalog] = None, timeout_policy: Optional[TimeoutPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None, credentials: Optional[dict] = None,
+                 governor: Optional[Governor] = None, lifecycle: Optional[ContextLifecycle] = None,
+                 session_name: Optional[str] = None):
         '''
         Initializes the SaitroAutomation instance.
 
@@ -30,32 +642,170 @@ class SaitroAutomation:
                              Defaults to False for visibility during development/debugging.
             slow_mo (int): Slows down Playwright operations by the specified amount of milliseconds.
                            Useful for debugging and observing actions. Defaults to 100ms.
+            reuse_session (bool): If True, the browser context is created from the storage state
+                                  saved by a previous login (state_path), and the login form
+                                  is only used when that session has expired. Defaults to False.
+            cdp_endpoint (str | None): If given, connects to an already running Chromium through
+                                       this CDP endpoint (e.g. 'http://127.0.0.1:9222') instead of
+                                       launching a new browser. Used by the worker pool.
+            resource_blocker (ResourceBlocker | None): If given, blocks the images, fonts and
+                                                       third-party scripts the automation does not
+                                                       need, and reports the savings on close().
+            base_url (str): Scheme and host of the platform. Defaults to BASE_URL; point it to a
+                            local stand-in server (mock_saitro.py) for offline runs.
+            state_path (str): File where the login storage state is saved and read back.
+                              Defaults to LOGIN_STATE_PATH.
+            recorder (StepRecorder | None): Records the duration and outcome of every step.
+                                            Share one recorder between instances to aggregate
+                                            their metrics. Defaults to a recorder appending to
+                                            METRICS_JSONL_PATH, closed with the instance.
+            ledger (ActivationLedger | None): If given, every ICCID uploaded, confirmed, cleared
+                                              or cancelled is recorded in it, which allows
+                                              bulk uploads to be resumed after a crash.
+            catalog (ProductCatalog | None): Cache of the product and APN options. Defaults to
+                                             the CATALOG_PATH cache of this base_url.
+            timeout_policy (TimeoutPolicy | None): Derives the timeout of every wait from the
+                                                   durations observed by the recorder. Defaults
+                                                   to the policy persisted in TIMEOUTS_PATH (in
+                                                   memory only for another base_url).
+            circuit_breaker (CircuitBreaker | None): Makes the steps fail fast after repeated
+                                                     timeouts. Share one between instances
+                                                     working against the same platform.
+            credentials (dict | None): 'user' and 'pwd' of the account to log in with. Defaults
+                                       to the account of USER_CREDENTIALS_PATH. Give every
+                                       account its own state_path.
+            governor (Governor | None): Paces the logins, navigations and posts of the account,
+                                        and backs off on captcha or throttling pages. Share
+                                        one between every instance using the same account.
+                                        Defaults to a governor of this instance only.
+            lifecycle (ContextLifecycle | None): Decides when the page or the context is
+                                                 replaced during long runs (see finish_job()).
+                                                 Defaults to the default limits, for this
+                                                 instance only.
+            session_name (str | None): Name of this session when the account runs several
+                                       sessions at once, each with its own state_path and
+                                       cart (e.g. 'worker-2' in the worker pool). Keeps the
+                                       cart of this session apart in the ledger (see cart).
         '''
         print('-' * 30)
         print('Robotic Process Automation - Saitro')
+        super().__init__(reuse_session, base_url, state_path, recorder, ledger, catalog, timeout_policy,
+                         circuit_breaker, credentials, governor, session_name)
+        self._guard_depth = 0
+        self.owns_lifecycle = lifecycle is None
+        self.lifecycle = lifecycle or ContextLifecycle(self.governor.name)
+        if self.owns_lifecycle:
+            self.recorder.collectors.append(self.lifecycle.prometheus_text)
+        from playwright.sync_api import sync_playwright
         self.playwright = sync_playwright().start()
-        # Launch Chromium browser with specified options
-        self.browser = self.playwright.chromium.launch(headless=headless, slow_mo=slow_mo)
-        # Create a new browser context
-        self.context: BrowserContext = self.browser.new_context()
+        if cdp_endpoint:
+            # Attach to a shared Chromium instance; closing only disconnects from it
+            self.browser = self.playwright.chromium.connect_over_cdp(cdp_endpoint, slow_mo=slow_mo)
+        else:
+            # Launch Chromium browser with specified options
+            self.browser = self.playwright.chromium.launch(headless=headless, slow_mo=slow_mo)
+        self.resource_blocker = resource_blocker
+        # Create a new browser context, seeded with the saved session when reusing it
+        self._open_context(state_path if reuse_session and os.path.exists(state_path) else None)
+
+    def _open_context(self, storage_state=None):
+        '''
+        Creates the browser context (from a storage state file or dict) and its page.
+        '''
+        self.context: BrowserContext = self.browser.new_context(storage_state=storage_state)
+        self.context.on('response', self._on_governed_response)
+        self.context.on('response', self._on_session_response)
+        if self.resource_blocker:
+            self.resource_blocker.attach(self.context)
         # Create a new page within the context
         self.page: Page = self.context.new_page()
+        self.lifecycle.context_opened()
 
-    def _get_credentials(self) -> dict:
+    def _load_saved_session(self) -> bool:
         '''
-        Reads user credentials from the user.json file.
+        Loads into this context the cookies of the login state saved by another instance.
 
         Returns:
-            dict: A dictionary containing 'user' and 'pwd'.
+            bool: True if they hold a valid session.
         '''
         try:
-            with open(USER_CREDENTIALS_PATH, 'r') as user_file:
-                credentials = json.load(user_file)
-            return credentials
-        except FileNotFoundError:
-            print(f'Error: Credential file \'{USER_CREDENTIALS_PATH}\' not found.')
-            # Exit or raise an exception as credentials are essential
-            raise
+            with open(self.state_path, 'r', encoding='utf-8') as state_file:
+                cookies = json.load(state_file).get('cookies', [])
+        except (OSError, ValueError):
+            return False
+        self.context.clear_cookies()
+        self.context.add_cookies(cookies)
+        return self.is_session_valid()
+
+    def _reauthenticate(self) -> bool:
+        '''
+        Renews an expired session through the single-flight guard of the state file: only
+        one instance logs in (and saves the state file), the others load the session it saved.
+        An instance that does not reuse the saved session owns its login, so it never loads
+        the session of another instance (that would merge their carts).
+
+        Returns:
+            bool: True if the context is authenticated again.
+        '''
+        generation = self.session_guard.refresh(self.session_generation, self.login, self._load_saved_session,
+                                                shared=self.reuse_session)
+        if generation is None:
+            return False
+        print(f'[] Session renewed (generation {generation}).')
+        self.session_generation = generation
+        return True
+
+    def memory_usage(self) -> dict:
+        '''
+        Returns:
+            dict: JS heap (MB) and DOM counters of the page (see saitro_lifecycle.page_memory),
+                  empty when the browser does not expose them.
+        '''
+        return page_memory(self.context, self.page)
+
+    def recycle_page(self, reason: str = 'manual'):
+        '''
+        Replaces the page by a new one in the same context: the DOM and JS heap of the old
+        page are released, the session is untouched.
+        '''
+        old_page = self.page
+        self.page = self.context.new_page()
+        old_page.close()
+        self.lifecycle.page_opened()
+        print(f'[] Page recycled ({reason}).')
+
+    def recycle_context(self, reason: str = 'manual'):
+        '''
+        Replaces the browser context by a new one created from its storage state: the
+        cookies and local storage are carried over, so the session goes on without a login.
+        '''
+        storage_state = self.context.storage_state()
+        old_context = self.context
+        self._open_context(storage_state)
+        old_context.close()
+        print(f'[] Context recycled ({reason}, generation {self.lifecycle.contexts}).')
+
+    def finish_job(self) -> Optional[str]:
+        '''
+        Counts a finished job (batch, daemon or pool job) and, if the lifecycle policy says
+        so, replaces the page or the context before the next one. Call it between jobs only:
+        the page is left blank.
+
+        Returns:
+            str | None: SCOPE_PAGE or SCOPE_CONTEXT if something was replaced.
+        '''
+        memory = self.memory_usage() if self.lifecycle.measures_memory else {}
+        decision = self.lifecycle.job_done(memory)
+        if decision is None:
+            return None
+        scope, reason = decision
+        if memory:
+            reason = f'{reason}: {memory["js_heap_mb"]:.0f} MB JS heap, {memory["dom_nodes"]} DOM nodes'
+        if scope == SCOPE_CONTEXT:
+            self.recycle_context(reason)
+        else:
+            self.recycle_page(reason)
+        return scope
 
     def login(self) -> bool:
         '''
@@ -65,32 +815,89 @@ class SaitroAutomation:
             bool: True if login is successful and redirected to dashboard, False otherwise.
         '''
         print('[1] Opening login page...')
-        self.page.goto(LOGIN_URL)
+        self.governor.acquire(KIND_NAVIGATION)
+        with self._step('login.open', url=self.login_url):
+            self.page.goto(self.login_url)
 
         print('[2] Filling login form...')
         credentials = self._get_credentials()
-        self.page.fill('input#login', credentials['user'])
-        self.page.fill('input#senha', credentials['pwd']) # 'senha' is an HTML attribute, kept as is
+        with self._step('login.fill', selector='input#login, input#senha'):
+            self.page.fill('input#login', credentials['user'])
+            self.page.fill('input#senha', credentials['pwd']) # 'senha' is an HTML attribute, kept as is
 
         print('[3] Clicking login button...')
-        self.page.click('button[data-post=\'ajax-login\']')
+        self.governor.acquire(KIND_LOGIN)
+        with self._step('login.submit', selector='button[data-post=\'ajax-login\']'):
+            self.page.click('button[data-post=\'ajax-login\']')
 
         print('[4] Waiting for redirect or dashboard...')
         try:
             # Wait for URL to contain 'dashboard' indicating successful login
-            self.page.wait_for_url('**/dashboard/**', timeout=10000)
+            with self._step('login.redirect', url='**/dashboard/**'):
+                self.page.wait_for_url('**/dashboard/**', timeout=self._timeout('login.redirect', 10000))
             print('[] Login succeeded! Current URL:', self.page.url)
             # Save the storage state (cookies, local storage) for potential future re-use
-            self.context.storage_state(path=LOGIN_STATE_PATH)
+            self.context.storage_state(path=self.state_path)
             return True
         except Exception as e:
             print(f'[] Login did not redirect. Still at: {self.page.url}. Error: {e}')
             # Save page content for debugging if login fails
+            content = self.page.content()
             with open(LOGIN_DEBUG_HTML_PATH, 'w', encoding='utf-8') as f:
-                f.write(self.page.content())
+                f.write(content)
+            # A captcha or throttling page: slow down before the next attempt
+            reason = detect_challenge(content)
+            if reason:
+                self.governor.report_challenge(reason)
             return False
 
-    def select_product(self, product_label: str = 'TIM 50MB R&T TIM Comp 30 IOT'):
+    def is_session_valid(self) -> bool:
+        '''
+        Checks whether the cookies of the current context still hold an authenticated session.
+
+        A single GET request is sent through the context's API client (no page load, no
+        redirects followed). An expired session is either redirected to the login page or
+        answered with the login form itself.
+
+        Returns:
+            bool: True if the activation page is served for the current session, False otherwise.
+        '''
+        self.governor.acquire(KIND_NAVIGATION)
+        with self._step('session.check', url=self.activation_url) as span:
+            try:
+                response = self.context.request.get(self.activation_url, max_redirects=0)
+            except Exception as e:
+                print(f'[] Session check failed: {e}')
+                span['outcome'] = 'error'
+                return False
+            body = response.text() if response.status == 200 else ''
+            # 'senha' is the password input of the login form, kept as is
+            valid = response.status == 200 and 'name="senha"' not in body and "name='senha'" not in body
+            if not valid:
+                span['outcome'] = 'failed'
+            return valid
+
+    def ensure_logged_in(self) -> bool:
+        '''
+        Makes sure the context is authenticated before a workflow starts.
+
+        When session reuse is enabled and the saved session is still valid, the login form is
+        skipped entirely. Otherwise this falls back to the regular form login.
+
+        Returns:
+            bool: True if the context is authenticated, False otherwise.
+        '''
+        if self.reuse_session and os.path.exists(self.state_path):
+            print('[1] Checking saved session...')
+            if self.is_session_valid():
+                print('[] Saved session is still valid. Skipping login form.')
+                return True
+            print('[] Saved session expired. Logging in again...')
+            # Workers starting together with an expired session log in only once
+            return self._reauthenticate()
+        return self.login()
+
+    def select_product(self, product_label: str = DEFAULT_PRODUCT_LABEL):
         '''
         Selects a specific product from the dropdown on the activation page.
 
@@ -98,100 +905,587 @@ class SaitroAutomation:
             product_label (str): The label of the product to select.
         '''
         print(f'[6] Selecting the product: \'{product_label}\'...')
-        self.page.wait_for_selector('select[name=\'id_produto\']') # 'id_produto' is an HTML attribute, kept as is
-        self.page.select_option('select[name=\'id_produto\']', label=product_label)
+        with self._step('activation.select_product', selector='select[name=\'id_produto\']'):
+            self.page.wait_for_selector('select[name=\'id_produto\']', state='attached') # 'id_produto' is an HTML attribute, kept as is
+            self._set_select(PRODUCT_SELECT, product_label)
 
-    def clear_shopping_cart(self):
+    def _refresh_catalog(self):
         '''
-        Navigates to the activation page, selects a product,
-        and clears the shopping cart through a modal.
+        Scrapes the product and APN options of the activation page into the catalog.
         '''
-        # Ensure user is logged in before proceeding
-        if not self.login():
-            print('Automation stopped: Login failed.')
+        with self._step('catalog.refresh', url=self.page.url):
+            self.catalog.update(self.page.evaluate(SCRAPE_SELECTS_SCRIPT, [PRODUCT_SELECT, APN_SELECT]))
+        print(f'[] Catalog refreshed: {len(self.catalog.options(PRODUCT_SELECT))} products, '
+              f'{len(self.catalog.options(APN_SELECT))} APNs.')
+
+    def _set_select(self, select_name: str, label: str):
+        '''
+        Sets the value of a select of the activation page from its option label, using the
+        catalog (scraped from the page when outdated). Must be called on the activation page.
+
+        Raises:
+            UnknownOptionError: If the label is not among the options of the select.
+        '''
+        selector = f'select[name=\'{select_name}\']'
+        for attempt in range(2):
+            try:
+                value = self.catalog.value(select_name, label)
+            except UnknownOptionError:
+                if attempt:
+                    raise
+                value = None
+            if value is not None and self.page.eval_on_selector(selector, SET_SELECT_SCRIPT, value):
+                return
+            if not attempt:
+                # Not cached yet, or the cached options no longer match the page: scrape them once
+                self._refresh_catalog()
+        raise UnknownOptionError(f'Unknown {select_name} option \'{label}\'')
+
+    def open_activation_page(self, product_label: str = DEFAULT_PRODUCT_LABEL):
+        '''
+        Makes sure the page shows the activation page with the given product selected.
+
+        The page is only (re)loaded when it is somewhere else, and the product is only
+        selected when the dropdown does not already show it, so consecutive steps of a
+        pipeline keep working on the same page.
+
+        Args:
+            product_label (str): The label of the product to select.
+        '''
+        if not self.page.url.startswith(self.activation_url):
+            print('[5] Accessing activation page...')
+            self.governor.acquire(KIND_NAVIGATION)
+            with self._step('activation.open', url=self.activation_url):
+                self.page.goto(self.activation_url)
+        elif self._selected_product_label() == product_label:
+            self._dismiss_open_modal()
             return
+        self._dismiss_open_modal()
+        self.select_product(product_label)
+
+    def _selected_product_label(self) -> str:
+        '''
+        Returns the label of the option currently selected in the product dropdown.
+        '''
+        return self.page.eval_on_selector(
+            'select[name=\'id_produto\']',
+            'select => select.selectedOptions.length ? select.selectedOptions[0].label.trim() : \'\''
+        )
+
+    def _dismiss_open_modal(self):
+        '''
+        Closes a modal left open by a previous step (e.g. the cart or upload modal),
+        so the activation page buttons can be clicked again.
+        '''
+        open_modal = self.page.locator('div.modal.in, div.modal.show')
+        if open_modal.count() and open_modal.first.is_visible():
+            self.page.keyboard.press('Escape')
+            open_modal.first.wait_for(state='hidden', timeout=5000)
+
+    def _submit_and_wait(self, action: str, selector: str, timeout: Optional[int] = None) -> ActionResult:
+        '''
+        Clicks a submitting element and waits until the server has handled the action.
+
+        Completion is detected by the AJAX response of the post triggered by the click, or
+        by the success/error toast the page shows, whichever comes first. There is no fixed
+        sleep: the result is returned as soon as one of them is observed.
+
+        Args:
+            action (str): Name of the action, used in the returned result.
+            selector (str): Selector of the element to click.
+            timeout (int | None): Maximum time to wait for the answer, in milliseconds.
+                                  Defaults to the timeout learned for the step, or ACTION_TIMEOUT.
+
+        Returns:
+            ActionResult: The outcome of the action.
+        '''
+        responses = []
+        def on_response(response: Response):
+            if _is_action_response(response):
+                responses.append(response)
 
-        print('[5] Accessing activation page...')
-        self.page.goto(ACTIVATION_URL)
-        self.select_product()
+        timeout = timeout or self._timeout(f'{action}.submit', ACTION_TIMEOUT)
+        self.governor.acquire(KIND_POST)
+        started = time.monotonic()
+        self.page.on('response', on_response)
+        with self._step(f'{action}.submit', selector=selector, url=self.page.url) as span:
+            try:
+                self.page.eval_on_selector_all(FEEDBACK_SELECTOR, FEEDBACK_SEEN_SCRIPT)
+                self.page.click(selector)
+                feedback = self.page.locator(FRESH_FEEDBACK_SELECTOR)
+                deadline = started + timeout / 1000
+                while time.monotonic() < deadline:
+                    if responses:
+                        ok, message = _parse_action_response(responses[0])
+                        span['outcome'] = 'ok' if ok else 'failed'
+                        return ActionResult(action, ok, responses[0].status, message, (time.monotonic() - started) * 1000)
+                    if feedback.count() and feedback.first.is_visible():
+                        classes = feedback.first.get_attribute('class') or ''
+                        ok = not any(name in classes.split() for name in FEEDBACK_ERROR_CLASSES)
+                        message = feedback.first.inner_text().strip()
+                        span['outcome'] = 'ok' if ok else 'failed'
+                        return ActionResult(action, ok, None, message, (time.monotonic() - started) * 1000)
+                    # Lets Playwright dispatch pending events (responses) while waiting
+                    self.page.wait_for_timeout(ACTION_POLL_INTERVAL)
+            finally:
+                self.page.remove_listener('response', on_response)
+            span['outcome'] = 'timeout'
+        return ActionResult(action, False, None, f'No answer from the server after {timeout} ms', (time.monotonic() - started) * 1000)
+
+    @_session_guarded
+    def _clear_cart(self, product_label: str = DEFAULT_PRODUCT_LABEL) -> ActionResult:
+        '''
+        Clears the shopping cart through the cart modal. Assumes the user is logged in.
+        '''
+        self.open_activation_page(product_label)
 
         print('[7] Shopping cart...')
-        self.page.wait_for_selector('a[data-original-title=\'Visualizar\']')
+        with self._step('clear_cart.open_cart', selector='a[data-original-title=\'Visualizar\']'):
+            self.page.wait_for_selector('a[data-original-title=\'Visualizar\']')
 
-        print('[8] Clicking on the shopping cart...')
-        self.page.click('a[data-original-title=\'Visualizar\']')
+            print('[8] Clicking on the shopping cart...')
+            self.page.click('a[data-original-title=\'Visualizar\']')
 
         print('[9] Clearing shopping cart (inside modal)...')
-        # Ensures the modal was opened after clicking "View"
-        self.page.wait_for_selector('div.modal-body', state='visible', timeout=5000)
-        # Selects specifically the "Clear Cart" button inside the modal
-        clear_cart_button_modal = self.page.locator('div.modal-body a[data-original-title=\'Limpar Carrinho\']')
-        # Waits for the button to be visible
-        clear_cart_button_modal.wait_for(state='visible', timeout=5000)
-        # Scrolls to make it visible
-        clear_cart_button_modal.scroll_into_view_if_needed()
-        # Clicks the correct button inside the modal using force click if necessary
-        clear_cart_button_modal.click(force=True)
+        with self._step('clear_cart.clear', selector='div.modal-body a[data-original-title=\'Limpar Carrinho\']'):
+            # Ensures the modal was opened after clicking "View"
+            self.page.wait_for_selector('div.modal-body', state='visible', timeout=self._timeout('clear_cart.clear', 5000))
+            # Selects specifically the "Clear Cart" button inside the modal
+            clear_cart_button_modal = self.page.locator('div.modal-body a[data-original-title=\'Limpar Carrinho\']')
+            # Waits for the button to be visible
+            clear_cart_button_modal.wait_for(state='visible', timeout=self._timeout('clear_cart.clear', 5000))
+            # Scrolls to make it visible
+            clear_cart_button_modal.scroll_into_view_if_needed()
+            # Clicks the correct button inside the modal using force click if necessary
+            clear_cart_button_modal.click(force=True)
 
         print('[10] Confirming shopping cart clear...')
         # Waits for the "Yes" button to appear visibly in the confirmation dialog
-        self.page.wait_for_selector('button.btn-send:text(\'Sim\')', timeout=5000)
-        # Clicks the "Yes" button
-        self.page.click('button.btn-send:text(\'Sim\')')
-        print('[] Cart successfully deleted.')
+        with self._step('clear_cart.dialog', selector='button.btn-send:text(\'Sim\')'):
+            self.page.wait_for_selector('button.btn-send:text(\'Sim\')', timeout=self._timeout('clear_cart.dialog', 5000))
+        # Clicks the "Yes" button and waits for the server to answer
+        result = self._submit_and_wait('clear_cart', 'button.btn-send:text(\'Sim\')')
+        if result:
+            print(f'[] Cart successfully deleted ({result.elapsed_ms:.0f} ms).')
+            if self.ledger:
+                self.ledger.mark_cart(STATUS_CLEARED, self.cart)
+        else:
+            print(f'[] Cart could not be deleted: {result.message}')
+        return result
 
-        # Optional: wait to observe the result before closing the browser
-        self.page.wait_for_timeout(10000)
-        self.close()
+    @_session_guarded
+    def _read_cart(self, product_label: str = DEFAULT_PRODUCT_LABEL) -> CartContents:
+        '''
+        Opens the cart modal and reads the whole cart table in one DOM evaluation.
+        Assumes the user is logged in.
+        '''
+        self.open_activation_page(product_label)
+
+        print('[7] Opening the shopping cart...')
+        with self._step('read_cart.open_cart', selector='a[data-original-title=\'Visualizar\']'):
+            self.page.wait_for_selector('a[data-original-title=\'Visualizar\']')
+            self.page.click('a[data-original-title=\'Visualizar\']')
+            self.page.wait_for_selector(CART_ROWS_SELECTOR, timeout=self._timeout('read_cart.open_cart', 10000))
+
+        print('[8] Reading the shopping cart...')
+        with self._step('read_cart.read', selector=CART_TABLE_SELECTOR):
+            rows = self.page.eval_on_selector(CART_TABLE_SELECTOR, READ_CART_SCRIPT)
+        cart = CartContents()
+        for row in rows:
+            iccid = next((cell for cell in row['cells'] if ICCID_PATTERN.fullmatch(cell)), None)
+            if not iccid:
+                # Placeholder row of an empty cart
+                continue
+            cart.iccids.append(iccid)
+            cart.products[row['product']] = cart.products.get(row['product'], 0) + 1
+        print(f'[] {cart.count} ICCIDs in the cart.')
+        return cart
 
-    def set_shopping_cart(self, file_path: str):
+    def _reconcile_cart(self, iccids: list, product_label: str = DEFAULT_PRODUCT_LABEL,
+                        lot: Optional[str] = None, batch: Optional[int] = None) -> ActionResult:
         '''
-        Navigates to the activation page, selects a product,
-        and uploads a CSV file to set the shopping cart.
+        Makes the cart hold exactly the given ICCIDs, uploading only the ones it is missing.
+
+        The cart is only cleared (and fully re-uploaded) when it holds ICCIDs outside the
+        desired set or ICCIDs of another product, since single entries cannot be removed.
+        Assumes the user is logged in.
 
         Args:
-            file_path (str): The absolute or relative path to the CSV file to upload.
+            iccids (list): The desired contents of the cart.
+            product_label (str): The product the ICCIDs are activated with.
+            lot (str | None): Lot recorded in the ledger for the uploaded ICCIDs.
+            batch (int | None): Batch index recorded in the ledger for the uploaded ICCIDs.
         '''
-        # Ensure user is logged in before proceeding
-        if not self.login():
-            print('Automation stopped: Login failed.')
-            return
+        cart = self._read_cart(product_label)
+        current = set(cart.iccids)
+        desired = set(iccids)
+        missing = [iccid for iccid in iccids if iccid not in current]
+        extra = current - desired
+        foreign_products = [label for label in cart.products if label and label != product_label]
+        if extra or foreign_products:
+            print(f'[] The cart holds {len(extra)} unexpected ICCIDs (products: {list(cart.products)}). Clearing it first...')
+            cleared = self._clear_cart(product_label)
+            if not cleared:
+                return cleared
+            missing = list(iccids)
+        elif self.ledger and current:
+            # Left by an earlier run: they will be confirmed with this upload
+            self.ledger.record_uploaded(current, lot, batch, self.cart)
+        if not missing:
+            print('[] The cart already holds every ICCID. Nothing to upload.')
+            return ActionResult('set_cart', True, message=f'{len(current)} ICCIDs already in the cart')
+        print(f'[] Uploading {len(missing)} missing ICCIDs ({len(desired) - len(missing)} already in the cart)...')
+        return self._upload_iccids(missing, product_label, lot, batch)
 
-        print('[5] Accessing activation page...')
-        self.page.goto(ACTIVATION_URL)
-        self.select_product()
+    def _upload_iccids(self, iccids: list, product_label: str = DEFAULT_PRODUCT_LABEL,
+                       lot: Optional[str] = None, batch: Optional[int] = None) -> ActionResult:
+        '''
+        Uploads a list of ICCIDs as an in-memory CSV file (nothing is written to disk).
+        Assumes the user is logged in.
+        '''
+        return self._send_cart_file(upload_payload(iccids), iccids, product_label, lot, batch)
 
-        print('[7] Waiting for buttons to appear...')
-        self.page.wait_for_selector('a[data-original-title=\'Adicionar via Carga\']')
-        print('[8] Clicking on \'Add via Upload\' button...')
-        self.page.click('a[data-original-title=\'Adicionar via Carga\']')
-        # The original script clicked twice, if necessary, uncomment the line below:
-        # self.page.click('a[data-original-title=\'Adicionar via Carga\']')
+    def _upload_cart_file(self, file_path: str, product_label: str = DEFAULT_PRODUCT_LABEL,
+                          lot: Optional[str] = None, batch: Optional[int] = None) -> ActionResult:
+        '''
+        Uploads a CSV file through the "Add via Upload" modal. Assumes the user is logged in.
 
-        print('[9] Waiting for file input to appear...')
-        self.page.wait_for_selector('input[type=\'file\'][name=\'arquivo\']', timeout=10000) # 'arquivo' is HTML attribute, kept as is
+        Args:
+            lot (str | None): Lot recorded in the ledger for the uploaded ICCIDs.
+            batch (int | None): Batch index recorded in the ledger for the uploaded ICCIDs.
 
+        Returns:
+            ActionResult: The outcome of the upload (not ok if the file does not exist).
+        '''
         # Resolve the absolute path of the file
         absolute_file_path = os.path.abspath(file_path)
-        print(f'[10] Selecting the file \'{os.path.basename(absolute_file_path)}\'...')
-
         # Check if the file exists before attempting to upload
         if not os.path.exists(absolute_file_path):
             print(f'Error: File not found at \'{absolute_file_path}\'. Automation aborted.')
-            self.close()
-            return
+            return ActionResult('set_cart', False, message=f'File not found: {absolute_file_path}')
+        return self._send_cart_file(absolute_file_path, _iter_file_iccids(absolute_file_path), product_label, lot, batch)
 
-        self.page.set_input_files('input[type=\'file\'][name=\'arquivo\']', absolute_file_path)
+    @_session_guarded
+    def _send_cart_file(self, files, iccids: Iterable[str], product_label: str = DEFAULT_PRODUCT_LABEL,
+                        lot: Optional[str] = None, batch: Optional[int] = None) -> ActionResult:
+        '''
+        Sends a file through the "Add via Upload" modal. Assumes the user is logged in.
+
+        Args:
+            files (str | dict): Absolute path of the file, or an in-memory file (see upload_payload).
+            iccids (iterable): The ICCIDs of the file, recorded in the ledger once uploaded.
+        '''
+        self.open_activation_page(product_label)
+
+        print('[7] Waiting for buttons to appear...')
+        with self._step('set_cart.open_upload', selector='a[data-original-title=\'Adicionar via Carga\']'):
+            self.page.wait_for_selector('a[data-original-title=\'Adicionar via Carga\']')
+            print('[8] Clicking on \'Add via Upload\' button...')
+            self.page.click('a[data-original-title=\'Adicionar via Carga\']')
+            # The original script clicked twice, if necessary, uncomment the line below:
+            # self.page.click('a[data-original-title=\'Adicionar via Carga\']')
+
+            print('[9] Waiting for file input to appear...')
+            self.page.wait_for_selector('input[type=\'file\'][name=\'arquivo\']', # 'arquivo' is HTML attribute, kept as is
+                                        timeout=self._timeout('set_cart.open_upload', 10000))
+
+        print(f'[10] Selecting the file \'{files["name"] if isinstance(files, dict) else os.path.basename(files)}\'...')
+        with self._step('set_cart.select_file', selector='input[type=\'file\'][name=\'arquivo\']'):
+            self.page.set_input_files('input[type=\'file\'][name=\'arquivo\']', files)
 
         print('[11] Clicking the \'Submit\' button...')
-        self.page.click('button#send')
-        print('[] File successfully uploaded.')
+        result = self._submit_and_wait('set_cart', 'button#send')
+        if result:
+            print(f'[] File successfully uploaded ({result.elapsed_ms:.0f} ms).')
+            if self.ledger:
+                self.ledger.record_uploaded(iccids, lot, batch, self.cart)
+        else:
+            print(f'[] File upload failed: {result.message}')
+        return result
+
+    @_session_guarded
+    def _confirm_cart(self, client_info: str, apn: str, product_label: str = DEFAULT_PRODUCT_LABEL) -> ActionResult:
+        '''
+        Processes the shopping cart, fills in client information and selects an APN.
+        Assumes the user is logged in.
+        '''
+        self.open_activation_page(product_label)
+
+        print('[7] Shopping cart...')
+        with self._step('confirm_cart.open_cart', selector='a[data-original-title=\'Visualizar\']'):
+            self.page.wait_for_selector('a[data-original-title=\'Visualizar\']')
+            print('[8] Clicking on the shopping cart...')
+            self.page.click('a[data-original-title=\'Visualizar\']')
+
+        print('[9] Process shopping cart...')
+        with self._step('confirm_cart.process', selector='button[id=\'processar\']'):
+            self.page.wait_for_selector('button[id=\'processar\']')
+            self.page.click('button[id=\'processar\']')
+
+        print('[10] Filling information...')
+        with self._step('confirm_cart.fill', selector='input[name=\'info_cliente\']'):
+            self.page.wait_for_selector('input[name=\'info_cliente\']') # 'info_cliente' is HTML attribute, kept as is
+            self.page.fill('input[name=\'info_cliente\']', client_info)
+
+        print(f'[11] Selecting APN \'{apn}\'...')
+        with self._step('confirm_cart.select_apn', selector='select[name=\'apns\']'):
+            if self.page.locator('select[name=\'apns\']').count():
+                # Sets the select hidden behind the bootstrap-select dropdown directly
+                self._set_select(APN_SELECT, apn)
+            else:
+                # [A] Click the dropdown button with title='Selecione'
+                self.page.click('button.dropdown-toggle[data-id=\'apns\']')
+                # [B] Wait for the desired item to become visible
+                self.page.wait_for_selector(f'ul.dropdown-menu.inner li:text(\'{apn}\')', timeout=self._timeout('confirm_cart.select_apn', 5000))
+                # [C] Click the item "furukawaelectric.com.br"
+                self.page.click(f'ul.dropdown-menu.inner li:text(\'{apn}\')')
+        print('[] APN selected successfully.')
+
+        print('[12] Confirming processing')
+        with self._step('confirm_cart.dialog', selector='button[id=\'submitButton\']'):
+            self.page.wait_for_selector('button[id=\'submitButton\']')
+            self.page.click('button[id=\'submitButton\']')
+            # Wait for the "Yes" button in the final confirmation dialog
+            self.page.wait_for_selector('button.btn-send:text(\'Sim\')', timeout=self._timeout('confirm_cart.dialog', 5000))
+        result = self._submit_and_wait('confirm_cart', 'button.btn-send:text(\'Sim\')')
+        if result:
+            print(f'[] Final confirmation completed successfully ({result.elapsed_ms:.0f} ms).')
+            if self.ledger:
+                self.ledger.mark_cart(STATUS_CONFIRMED, self.cart)
+        else:
+            print(f'[] Final confirmation failed: {result.message}')
+        return result
+
+    @_session_guarded
+    def _cancel_request(self) -> ActionResult:
+        '''
+        Cancels the first outstanding request on the requests page. Assumes the user is logged in.
+        '''
+        print('[5] Accessing request page...') # Corrected print message
+        self.governor.acquire(KIND_NAVIGATION)
+        with self._step('clear_requests.open', url=self.request_url):
+            self.page.goto(self.request_url)
+
+        print('[6] Waiting for \'Cancel Request\' button to appear...')
+        with self._step('clear_requests.cancel', selector=CANCEL_REQUEST_SELECTOR):
+            self.page.wait_for_selector(CANCEL_REQUEST_SELECTOR, timeout=self._timeout('clear_requests.cancel', 5000))
+            iccid = self._request_row_iccid(CANCEL_REQUEST_SELECTOR) if self.ledger else None
+            print('[7] Clicking on \'Cancel Request\' button...')
+            self.page.click(CANCEL_REQUEST_SELECTOR)
+
+            # Wait for and click the "Yes" button in the confirmation dialog
+            self.page.wait_for_selector('button.btn-send:text(\'Sim\')', timeout=self._timeout('clear_requests.cancel', 5000))
+        result = self._submit_and_wait('clear_requests', 'button.btn-send:text(\'Sim\')')
+        if result:
+            print(f'[] Request successfully cleared ({result.elapsed_ms:.0f} ms).')
+            if iccid:
+                self.ledger.record_cancelled(iccid)
+        else:
+            print(f'[] Request could not be cleared: {result.message}')
+        return result
+
+    def _request_row_iccid(self, selector: str) -> Optional[str]:
+        '''
+        Returns the ICCID shown in the listing row of the first element matching the selector.
+        '''
+        row_text = self.page.eval_on_selector(selector, 'link => (link.closest(\'tr\') || link.parentElement).innerText')
+        match = ICCID_PATTERN.search(row_text or '')
+        return match.group(0) if match else None
+
+    def _cancel_requests(self, request_filter: Optional[RequestFilter] = None,
+                         max_passes: int = DEFAULT_CANCEL_PASSES) -> CancellationReport:
+        '''
+        Walks every page of the requests listing and cancels the outstanding requests selected
+        by the filter, confirming each dialog on the page itself (no reload between rows).
+
+        The listing is walked again while a pass cancels something, in case the platform drops
+        cancelled requests from it and shifts the next ones to pages already visited.
+        Assumes the user is logged in.
+
+        Args:
+            request_filter (RequestFilter | None): Requests to cancel. Defaults to all of them.
+            max_passes (int): Maximum number of walks over the listing.
+        '''
+        request_filter = request_filter or RequestFilter()
+        report = CancellationReport()
+        failed_rows = set()
+        for pass_index in range(max_passes):
+            cancelled_before = len(report.cancelled)
+            self._cancel_requests_pass(pass_index, request_filter, report, failed_rows)
+            if len(report.cancelled) == cancelled_before:
+                break
+        print(f'[] Bulk cancellation finished: {len(report.cancelled)} cancelled, {len(report.failed)} failed, '
+              f'{report.skipped} left by the filter ({report.pages} pages read).')
+        return report
+
+    @_session_guarded
+    def _cancel_requests_pass(self, pass_index: int, request_filter: RequestFilter, report: CancellationReport,
+                              failed_rows: set) -> CancellationReport:
+        '''
+        Walks the listing once from its first page (replayed from the first page after a
+        session expiry; the requests already cancelled are no longer listed).
+        '''
+        report.skipped = 0
+        print(f'[5] Accessing request page (pass {pass_index + 1})...')
+        self.governor.acquire(KIND_NAVIGATION)
+        with self._step('bulk_clear_requests.open', url=self.request_url):
+            self.page.goto(self.request_url)
+        while True:
+            report.pages += 1
+            self._cancel_requests_on_page(request_filter, report, failed_rows)
+            if not self._next_requests_page():
+                break
+        return report
+
+    def _cancel_requests_on_page(self, request_filter: RequestFilter, report: CancellationReport, failed_rows: set):
+        '''
+        Cancels the selected requests of the listing page currently shown.
+        '''
+        with self._step('bulk_clear_requests.read', selector=CANCEL_REQUEST_SELECTOR):
+            rows = self.page.eval_on_selector_all(CANCEL_REQUEST_SELECTOR, READ_REQUESTS_SCRIPT)
+        for row in rows:
+            cells = row['cells']
+            iccid = next((match.group(0) for match in map(ICCID_PATTERN.search, cells) if match), None)
+            key = iccid or ' | '.join(cells)
+            if key in failed_rows:
+                continue
+            if not request_filter.matches(cells, iccid, _parse_request_date(cells)):
+                report.skipped += 1
+                continue
+            print(f'[6] Cancelling request {key}...')
+            link = f'[data-saitro-row=\'{row["marker"]}\']'
+            with self._step('bulk_clear_requests.cancel', selector=link):
+                self.page.click(link)
+                self.page.wait_for_selector('button.btn-send:text(\'Sim\')', timeout=self._timeout('bulk_clear_requests.cancel', 5000))
+            result = self._submit_and_wait('clear_requests', 'button.btn-send:text(\'Sim\')')
+            if result:
+                report.cancelled.append(key)
+                if self.ledger and iccid:
+                    self.ledger.record_cancelled(iccid)
+            else:
+                print(f'[] Request {key} could not be cancelled: {result.message}')
+                report.failed.append((key, result))
+                failed_rows.add(key)
+                self._dismiss_open_modal()
+
+    def _next_requests_page(self) -> bool:
+        '''
+        Moves the listing to its next page.
 
-        # Optional: wait to observe the result before closing the browser
-        self.page.wait_for_timeout(10000)
+        Returns:
+            bool: False on the last page.
+        '''
+        next_link = self.page.locator(NEXT_PAGE_SELECTOR)
+        if not next_link.count():
+            return False
+        href = next_link.first.get_attribute('href') or ''
+        self.governor.acquire(KIND_NAVIGATION)
+        with self._step('bulk_clear_requests.next_page', selector=NEXT_PAGE_SELECTOR):
+            if href and not href.startswith(('#', 'javascript')):
+                # Server-side pagination
+                self.page.goto(urljoin(self.page.url, href))
+            else:
+                # Client-side pagination: wait until the rows read on this page are replaced
+                next_link.first.click()
+                self.page.wait_for_function('() => !document.querySelector(\'[data-saitro-row]\')',
+                                            timeout=self._timeout('bulk_clear_requests.next_page', 10000))
+        return True
+
+    def clear_shopping_cart(self) -> ActionResult:
+        '''
+        Navigates to the activation page, selects a product,
+        and clears the shopping cart through a modal.
+
+        Returns:
+            ActionResult: The outcome reported by the server, as soon as it answers.
+        '''
+        # Ensure user is logged in before proceeding
+        if not self.ensure_logged_in():
+            print('Automation stopped: Login failed.')
+            return ActionResult('login', False, message='Login failed')
+
+        result = self._clear_cart()
         self.close()
+        return result
 
-    def confirm_shopping_cart(self, client_info: str = 'Robotic Process Automation - RPA', apn: str = 'furukawaelectric.com.br'):
+    def set_shopping_cart(self, file_path: IccidSource, validate: bool = True) -> ActionResult:
+        '''
+        Navigates to the activation page, selects a product,
+        and uploads a CSV file to set the shopping cart.
+
+        Example:
+            automation.set_shopping_cart(row[0] for row in cursor.execute('SELECT iccid FROM sims'))
+
+        Args:
+            file_path (str | bytes | iterable): The absolute or relative path to the CSV file to
+                             upload, or the ICCIDs themselves (the bytes of a CSV file, or an
+                             iterable such as a generator or a database cursor). The ICCIDs
+                             are read into memory and sent as an in-memory file, whatever
+                             their source: nothing is written to disk.
+            validate (bool): If True, malformed and duplicated ICCIDs are removed before the
+                             upload (see saitro_iccid.clean_iccids). With a ledger, the ICCIDs
+                             it records as confirmed are removed too.
+
+        Returns:
+            ActionResult: The outcome reported by the server, as soon as it answers.
+        '''
+        iccids, lot, error = _upload_source(file_path, validate, self.ledger.is_confirmed if self.ledger else None)
+        if error is not None:
+            self.close()
+            return error
+
+        # Ensure user is logged in before proceeding
+        if not self.ensure_logged_in():
+            print('Automation stopped: Login failed.')
+            return ActionResult('login', False, message='Login failed')
+
+        result = self._upload_iccids(iccids, lot=lot)
+        self.close()
+        return result
+
+    def read_shopping_cart(self, product_label: str = DEFAULT_PRODUCT_LABEL) -> Optional[CartContents]:
+        '''
+        Navigates to the activation page and reads the contents of the shopping cart.
+
+        Returns:
+            CartContents | None: The ICCIDs and products in the cart, None if the login failed.
+        '''
+        if not self.ensure_logged_in():
+            print('Automation stopped: Login failed.')
+            return None
+
+        cart = self._read_cart(product_label)
+        self.close()
+        return cart
+
+    def reconcile_shopping_cart(self, file_path: IccidSource, validate: bool = True) -> ActionResult:
+        '''
+        Makes the shopping cart hold the ICCIDs of a file, uploading only the ones missing
+        from it instead of clearing and re-uploading the whole cart.
+
+        Args:
+            file_path (str | bytes | iterable): The absolute or relative path to the ICCID file,
+                                                or the ICCIDs themselves (see set_shopping_cart).
+            validate (bool): If True, the file is validated and deduplicated first.
+
+        Returns:
+            ActionResult: The outcome of the upload of the missing ICCIDs (ok without any
+                          upload when the cart already holds all of them).
+        '''
+        iccids, lot, error = _upload_source(file_path, validate)
+        if error is not None:
+            self.close()
+            return error
+
+        if not self.ensure_logged_in():
+            print('Automation stopped: Login failed.')
+            return ActionResult('login', False, message='Login failed')
+
+        result = self._reconcile_cart(iccids, lot=lot)
+        self.close()
+        return result
+
+    def confirm_shopping_cart(self, client_info: str = DEFAULT_CLIENT_INFO, apn: str = DEFAULT_APN) -> ActionResult:
         '''
         Navigates to the activation page, selects a product,
         confirms the shopping cart, fills in client information,
@@ -200,75 +1494,240 @@ class SaitroAutomation:
         Args:
             client_info (str): The client information to fill in the 'Info Cliente' field.
             apn (str): The APN to select from the dropdown.
+
+        Returns:
+            ActionResult: The outcome reported by the server, as soon as it answers.
         '''
+        try:
+            self._check_options(DEFAULT_PRODUCT_LABEL, apn)
+        except UnknownOptionError as e:
+            print(f'Automation stopped: {e}')
+            self.close()
+            return ActionResult('confirm_cart', False, message=str(e))
+
         # Ensure user is logged in before proceeding
-        if not self.login():
+        if not self.ensure_logged_in():
             print('Automation stopped: Login failed.')
-            return
+            return ActionResult('login', False, message='Login failed')
 
-        print('[5] Accessing activation page...')
-        self.page.goto(ACTIVATION_URL)
-        self.select_product()
+        result = self._confirm_cart(client_info, apn)
+        self.close()
+        return result
 
-        print('[7] Shopping cart...')
-        self.page.wait_for_selector('a[data-original-title=\'Visualizar\']')
-        print('[8] Clicking on the shopping cart...')
-        self.page.click('a[data-original-title=\'Visualizar\']')
+    def clear_requests(self) -> ActionResult:
+        '''
+        Navigates to the requests page and clears outstanding requests.
 
-        print('[9] Process shopping cart...')
-        self.page.wait_for_selector('button[id=\'processar\']')
-        self.page.click('button[id=\'processar\']')
+        Returns:
+            ActionResult: The outcome reported by the server, as soon as it answers.
+        '''
+        # Ensure user is logged in before proceeding
+        if not self.ensure_logged_in():
+            print('Automation stopped: Login failed.')
+            return ActionResult('login', False, message='Login failed')
 
-        print('[10] Filling information...')
-        self.page.wait_for_selector('input[name=\'info_cliente\']') # 'info_cliente' is HTML attribute, kept as is
-        self.page.fill('input[name=\'info_cliente\']', client_info)
+        result = self._cancel_request()
+        self.close()
+        return result
 
-        print(f'[11] Selecting APN \'{apn}\'...')
-        # [A] Click the dropdown button with title='Selecione'
-        self.page.click('button.dropdown-toggle[data-id=\'apns\']')
-        # [B] Wait for the desired item to become visible
-        self.page.wait_for_selector(f'ul.dropdown-menu.inner li:text(\'{apn}\')', timeout=5000)
-        # [C] Click the item "furukawaelectric.com.br"
-        self.page.click(f'ul.dropdown-menu.inner li:text(\'{apn}\')')
-        print('[] APN selected successfully.')
+    def bulk_clear_requests(self, request_filter: Optional[RequestFilter] = None,
+                            max_passes: int = DEFAULT_CANCEL_PASSES) -> CancellationReport:
+        '''
+        Cancels every outstanding request matching a filter, across all pages of the listing,
+        in a single browser session.
 
-        print('[12] Confirming processing')
-        self.page.wait_for_selector('button[id=\'submitButton\']')
-        self.page.click('button[id=\'submitButton\']')
-        # Wait for the "Yes" button in the final confirmation dialog
-        self.page.wait_for_selector('button.btn-send:text(\'Sim\')', timeout=5000)
-        self.page.click('button.btn-send:text(\'Sim\')')
-        print('[] Final confirmation completed successfully.')
-
-        # Optional: wait to observe the result before closing the browser
-        self.page.wait_for_timeout(10000)
-        self.close()
+        Example:
+            automation.bulk_clear_requests(RequestFilter(older_than=timedelta(days=7)))
 
-    def clear_requests(self):
+        Args:
+            request_filter (RequestFilter | None): Requests to cancel (age, status, ICCIDs).
+                                                   Defaults to every outstanding request.
+            max_passes (int): Maximum number of walks over the listing.
+
+        Returns:
+            CancellationReport: How many requests were cancelled, failed or left by the filter.
         '''
-        Navigates to the requests page and clears outstanding requests.
+        if not self.ensure_logged_in():
+            print('Automation stopped: Login failed.')
+            return CancellationReport(failed=[('login', ActionResult('login', False, message='Login failed'))])
+
+        try:
+            return self._cancel_requests(request_filter, max_passes)
+        finally:
+            self.close()
+
+    def track_activations(self, iccids: Optional[Iterable[str]] = None, lot: Optional[str] = None,
+                          timeout: Optional[float] = None, on_event=None,
+                          csv_path: Optional[str] = None, jsonl_path: Optional[str] = None):
         '''
-        # Ensure user is logged in before proceeding
-        if not self.login():
+        Follows the activation requests of confirmed ICCIDs until they all finish (or the
+        timeout), then writes the CSV/JSONL report. See saitro_tracker.ActivationTracker.
+
+        Example:
+            summary = SaitroAutomation(ledger=ActivationLedger()).track_activations(lot='/data/big.csv')
+
+        Args:
+            iccids (iterable | None): ICCIDs to follow. Defaults to those confirmed in the ledger.
+            lot (str | None): Only follow the ICCIDs of this lot of the ledger.
+            timeout (float | None): Seconds before giving up. Defaults to DEFAULT_TRACK_TIMEOUT.
+            on_event (callable | None): Called with every ActivationEvent.
+            csv_path (str | None): CSV report. Defaults to TRACKER_CSV_PATH.
+            jsonl_path (str | None): JSONL report. Defaults to TRACKER_JSONL_PATH.
+
+        Returns:
+            TrackingSummary: The completed, failed and still pending ICCIDs.
+        '''
+        from saitro_tracker import (ActivationTracker, TrackingSummary, DEFAULT_TRACK_TIMEOUT,
+                                    TRACKER_CSV_PATH, TRACKER_JSONL_PATH)
+        if not self.ensure_logged_in():
             print('Automation stopped: Login failed.')
-            return
+            return TrackingSummary(pending=list(iccids or []))
 
-        print('[5] Accessing request page...') # Corrected print message
-        self.page.goto(REQUEST_URL)
+        try:
+            tracker = ActivationTracker(self, iccids, lot, on_event=on_event)
+            summary = tracker.run(DEFAULT_TRACK_TIMEOUT if timeout is None else timeout)
+            tracker.write_report(csv_path or TRACKER_CSV_PATH, jsonl_path or TRACKER_JSONL_PATH)
+            return summary
+        finally:
+            self.close()
 
-        print('[6] Waiting for \'Cancel Request\' button to appear...')
-        self.page.wait_for_selector('a.icon-red[data-original-title=\'Cancelar Solicitação\']', timeout=5000)
-        print('[7] Clicking on \'Cancel Request\' button...')
-        self.page.click('a.icon-red[data-original-title=\'Cancelar Solicitação\']')
+    def bulk_set_shopping_cart(self, file_path: IccidSource, batch_size: int = DEFAULT_BATCH_SIZE,
+                               client_info: str = DEFAULT_CLIENT_INFO, apn: str = DEFAULT_APN,
+                               only_batches: Optional[set] = None, close: bool = True,
+                               validate: bool = True, resume: bool = False,
+                               lot: Optional[str] = None) -> BulkUploadReport:
+        '''
+        Uploads a large ICCID file in batches, confirming each batch before sending the next one.
 
-        # Wait for and click the "Yes" button in the confirmation dialog
-        self.page.wait_for_selector('button.btn-send:text(\'Sim\')', timeout=5000)
-        self.page.click('button.btn-send:text(\'Sim\')')
-        print('[] Request successfully cleared.')
+        The file is streamed, so only one batch is held in memory at a time. A batch whose
+        confirmation fails leaves its ICCIDs in the cart, so the cart is cleared before moving
+        on. Failed batches can be retried on their own by passing `report.failed_batches`
+        as `only_batches` on a later call with the same file and batch size.
 
-        # Optional: wait to observe the result before closing the browser
-        self.page.wait_for_timeout(10000)
-        self.close()
+        Every batch is validated on the fly and sent as an in-memory file, so nothing is
+        written to disk.
+
+        Args:
+            file_path (str | bytes | iterable): The absolute or relative path to the ICCID file,
+                                                or the ICCIDs themselves (see set_shopping_cart),
+                                                validated on the fly and never held whole in memory.
+            batch_size (int): Number of ICCIDs per batch. Defaults to DEFAULT_BATCH_SIZE.
+            client_info (str): The client information to fill in the 'Info Cliente' field.
+            apn (str): The APN to select from the dropdown.
+            only_batches (set | None): If given, only the batches with these indexes are processed.
+            close (bool): If True, the browser is closed once every batch has been processed.
+            validate (bool): If True, the ICCIDs are validated and deduplicated while they are
+                             read, and the batches are cut from the valid ones (the batch
+                             indexes then refer to them; a retry validates the file the same
+                             way, so they stay the same).
+            resume (bool): Requires a ledger. If True, the batches of this file already
+                           confirmed with the same batch size are skipped, ICCIDs already
+                           confirmed are dropped from the other batches, and the cart left by
+                           an interrupted batch is reconciled with the next batch (only its
+                           missing ICCIDs are uploaded).
+            lot (str | None): Name of the lot in the ledger. Defaults to the absolute path of the
+                              file. ICCIDs that do not come from a file need a stable name to be
+                              resumed (it defaults to one made of the start time).
+
+        Returns:
+            BulkUploadReport: Which batches succeeded and which failed.
+        '''
+        report = BulkUploadReport(batch_size)
+        from_file = isinstance(file_path, str)
+        if from_file and not os.path.exists(file_path):
+            print(f'Error: File not found at \'{os.path.abspath(file_path)}\'. Automation aborted.')
+            return report
+        try:
+            self._check_options(DEFAULT_PRODUCT_LABEL, apn)
+        except UnknownOptionError as e:
+            print(f'Automation stopped: {e}')
+            if close:
+                self.close()
+            return report
+        # The batches of a lot are recorded against the file given by the caller
+        lot = lot or (os.path.abspath(file_path) if from_file else f'stream-{datetime.now():%Y%m%d-%H%M%S}')
+        resume = resume and self.ledger is not None
+        batch_statuses = self.ledger.batch_statuses(lot, batch_size) if resume else {}
+        try:
+            file_path = _stream_source(file_path, validate)
+            if not self.ensure_logged_in():
+                print('Automation stopped: Login failed.')
+                return report
+            # The interrupted run may have left ICCIDs in the cart
+            reconcile = resume and self.ledger.pending_in_cart(self.cart) > 0
+
+            for batch_index, iccids in iter_iccid_batches(file_path, batch_size):
+                if only_batches is not None and batch_index not in only_batches:
+                    continue
+                if resume:
+                    if batch_statuses.get(batch_index) == BATCH_CONFIRMED:
+                        print(f'--- Batch {batch_index} already confirmed, skipped ---')
+                        report.succeeded.append(batch_index)
+                        continue
+                    iccids = [iccid for iccid in iccids if not self.ledger.is_confirmed(iccid)]
+                print(f'--- Batch {batch_index} ({len(iccids)} ICCIDs) ---')
+                if self.ledger:
+                    self.ledger.set_batch(lot, batch_size, batch_index, BATCH_STARTED, len(iccids))
+                report.iccid_count += len(iccids)
+                if iccids:
+                    result = self._upload_and_confirm_batch(iccids, client_info, apn, lot, batch_index, reconcile)
+                    reconcile = False
+                else:
+                    result = ActionResult('bulk_set_cart', True, message='Every ICCID already confirmed')
+                if self.ledger:
+                    self.ledger.set_batch(lot, batch_size, batch_index, BATCH_CONFIRMED if result else BATCH_FAILED,
+                                          len(iccids), result.message)
+                if result:
+                    report.succeeded.append(batch_index)
+                else:
+                    report.failed[batch_index] = result
+                if iccids:
+                    # Long runs would otherwise grow the memory of the browser batch after batch
+                    self.finish_job()
+            print(f'[] Bulk upload finished: {len(report.succeeded)} batches succeeded, {len(report.failed)} failed.')
+            return report
+        finally:
+            if close:
+                self.close()
+
+    def _upload_and_confirm_batch(self, iccids: list, client_info: str, apn: str,
+                                  lot: Optional[str] = None, batch: Optional[int] = None,
+                                  reconcile: bool = False) -> ActionResult:
+        '''
+        Uploads one batch of ICCIDs and confirms the cart. With reconcile, the cart is read
+        first and only the ICCIDs it is missing are uploaded.
+        '''
+        try:
+            if reconcile:
+                result = self._reconcile_cart(iccids, lot=lot, batch=batch)
+            else:
+                result = self._upload_iccids(iccids, lot=lot, batch=batch)
+            if result:
+                result = self._confirm_cart(client_info, apn)
+        except Exception as e:
+            result = ActionResult('bulk_set_cart', False, message=str(e))
+        if not result:
+            # Do not let the ICCIDs of a failed batch leak into the next one
+            try:
+                self._clear_cart()
+            except Exception as e:
+                print(f'[] Could not clear the cart after a failed batch: {e}')
+        return result
+
+    def pipeline(self, product_label: str = DEFAULT_PRODUCT_LABEL) -> 'ActivationPipeline':
+        '''
+        Starts a pipeline that chains several workflows in this browser session.
+
+        Example:
+            automation.pipeline().clear_cart().set_cart('dummy.csv').confirm_cart().clear_requests().run()
+
+        Args:
+            product_label (str): The product selected on the activation page for every cart step.
+
+        Returns:
+            ActivationPipeline: A pipeline bound to this automation instance.
+        '''
+        return ActivationPipeline(self, product_label)
 
     def close(self):
         '''
@@ -279,9 +1738,143 @@ class SaitroAutomation:
             self.browser.close()
         if self.playwright:
             self.playwright.stop()
+        if self.resource_blocker:
+            report = self.resource_blocker.report()
+            self.resource_blocker.save_sizes()
+            print(f'[] Blocked {report["blocked_requests"]} requests ({report["bytes_saved"]} bytes saved), '
+                  f'allowed {report["allowed_requests"]} ({report["bytes_received"]} bytes received).')
+        if self.owns_lifecycle:
+            self.recorder.collectors.remove(self.lifecycle.prometheus_text)
+        self._release_hooks()
         print('Automation finished. Browser closed.')
         print('-' * 30)
 
+class ActivationPipeline:
+    '''
+    Chains SaitroAutomation workflows (clear cart, upload, confirm, clear requests)
+    so that they run with a single login, in one browser, context and page.
+    The browser is closed only when the whole pipeline has finished.
+    '''
+    def __init__(self, automation: SaitroAutomation, product_label: str = DEFAULT_PRODUCT_LABEL):
+        '''
+        Args:
+            automation (SaitroAutomation): The automation instance whose page runs every step.
+            product_label (str): The product selected on the activation page for every cart step.
+        '''
+        self.automation = automation
+        self.product_label = product_label
+        self.steps = []
+        self.completed_steps = []
+        self.results = []
+        self.apns = []
+
+    def clear_cart(self) -> 'ActivationPipeline':
+        '''
+        Adds a step that clears the shopping cart.
+        '''
+        self.steps.append(('clear_cart', lambda: self.automation._clear_cart(self.product_label)))
+        return self
+
+    def set_cart(self, file_path: IccidSource, validate: bool = True) -> 'ActivationPipeline':
+        '''
+        Adds a step that uploads a CSV file to the shopping cart.
+
+        Args:
+            file_path (str | bytes | iterable): The absolute or relative path to the CSV file to
+                                                upload, or the ICCIDs themselves (sent as an
+                                                in-memory file, see set_shopping_cart).
+            validate (bool): If True, malformed, duplicated and (with a ledger) already
+                             confirmed ICCIDs are removed before the upload.
+        '''
+        def step() -> ActionResult:
+            ledger = self.automation.ledger
+            iccids, lot, error = _upload_source(file_path, validate, ledger.is_confirmed if ledger else None)
+            if error is not None:
+                return error
+            return self.automation._upload_iccids(iccids, self.product_label, lot)
+
+        self.steps.append(('set_cart', step))
+        return self
+
+    def reconcile_cart(self, file_path: IccidSource, validate: bool = True) -> 'ActivationPipeline':
+        '''
+        Adds a step that uploads only the ICCIDs of a file missing from the shopping cart.
+
+        Args:
+            file_path (str | bytes | iterable): The absolute or relative path to the ICCID file,
+                                                or the ICCIDs themselves.
+            validate (bool): If True, the file is validated and deduplicated first.
+        '''
+        def step() -> ActionResult:
+            iccids, lot, error = _upload_source(file_path, validate)
+            if error is not None:
+                return error
+            return self.automation._reconcile_cart(iccids, self.product_label, lot)
+
+        self.steps.append(('reconcile_cart', step))
+        return self
+
+    def confirm_cart(self, client_info: str = DEFAULT_CLIENT_INFO, apn: str = DEFAULT_APN) -> 'ActivationPipeline':
+        '''
+        Adds a step that processes and confirms the shopping cart.
+
+        Args:
+            client_info (str): The client information to fill in the 'Info Cliente' field.
+            apn (str): The APN to select from the dropdown.
+        '''
+        self.steps.append(('confirm_cart', lambda: self.automation._confirm_cart(client_info, apn, self.product_label)))
+        self.apns.append(apn)
+        return self
+
+    def clear_requests(self) -> 'ActivationPipeline':
+        '''
+        Adds a step that cancels the first outstanding request.
+        '''
+        self.steps.append(('clear_requests', self.automation._cancel_request))
+        return self
+
+    def run(self, close: bool = True) -> bool:
+        '''
+        Logs in once and runs every step in order, stopping at the first failure.
+        The ActionResult of every executed step is collected in `results`.
+
+        Args:
+            close (bool): If True, the browser is closed once the pipeline finishes. Defaults to True.
+
+        Returns:
+            bool: True if every step succeeded, False otherwise.
+        '''
+        try:
+            try:
+                # A typo in a product or APN label fails before the first page load
+                self.automation._check_options(self.product_label)
+                for apn in self.apns:
+                    self.automation._check_options(apn=apn)
+            except UnknownOptionError as e:
+                print(f'Automation stopped: {e}')
+                self.results.append(ActionResult('catalog', False, message=str(e)))
+                return False
+            if not self.automation.ensure_logged_in():
+                print('Automation stopped: Login failed.')
+                return False
+            for name, step in self.steps:
+                print(f'--- Pipeline step: {name} ---')
+                try:
+                    result = step()
+                except Exception as e:
+                    print(f'[] Pipeline step \'{name}\' failed: {e}')
+                    self.results.append(ActionResult(name, False, message=str(e)))
+                    return False
+                self.results.append(result)
+                if not result:
+                    print(f'[] Pipeline step \'{name}\' failed.')
+                    return False
+                self.completed_steps.append(name)
+            return True
+        finally:
+            if close:
+                self.automation.close()
+
 # --- Helper functions (from original scripts, not part of SaitroAutomation class) ---
 def get_thanks_names() -> dict:
     '''
@@ -316,10 +1909,9 @@ if __name__ == '__main__':
     # automation.clear_shopping_cart()
 
     # Example: Set Shopping Cart (Uploading a CSV file)
-    # This demonstrates reading the CSV file name dynamically.
+    # From the command line: python saitro_cli.py set-cart dummy.csv
     # automation = SaitroAutomation(headless=False)
-    # csv_file_to_upload = input('Enter the path to the CSV file to upload (e.g., dummy.csv): ')
-    # automation.set_shopping_cart(csv_file_to_upload)
+    # automation.set_shopping_cart('dummy.csv')
 
     # Example: Confirm Shopping Cart
     automation = SaitroAutomation(headless=False)
@@ -329,6 +1921,18 @@ if __name__ == '__main__':
     # automation = SaitroAutomation(headless=False)
     # automation.clear_requests()
 
+    # Example: Full activation in a single browser session
+    # automation = SaitroAutomation(headless=False, reuse_session=True)
+    # automation.pipeline().clear_cart().set_cart('dummy.csv').confirm_cart().clear_requests().run()
+
+    # Example: Skip images, fonts and analytics while automating
+    # automation = SaitroAutomation(headless=True, reuse_session=True, resource_blocker=ResourceBlocker())
+    # automation.clear_requests()
+
+    # Example: Upload only the ICCIDs missing from a partly filled cart
+    # automation = SaitroAutomation(headless=False, reuse_session=True)
+    # automation.reconcile_shopping_cart('dummy.csv')
+
     # Example: Greeting
     # greet_thanks()
     pass # Keep 'pass' if no examples are uncommented
\ No newline at end of file
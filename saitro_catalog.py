@@ -0,0 +1,137 @@
+# saitro_catalog.py
+import os
+import json
+import time
+import difflib
+import threading
+from typing import Optional
+
+# --- Constants and Configuration ---
+CATALOG_PATH = 'saitro_catalog.json'
+CATALOG_TTL = 24 * 60 * 60 # Seconds before the scraped options are considered outdated
+# Names of the <select> elements of the activation page ('id_produto' and 'apns' are HTML attributes, kept as is)
+PRODUCT_SELECT = 'id_produto'
+APN_SELECT = 'apns'
+
+
+class UnknownOptionError(ValueError):
+    '''
+    Raised when a product or APN label is not in the options offered by the platform.
+    '''
+
+
+class ProductCatalog:
+    '''
+    On-disk cache of the label-to-value mappings of the product and APN dropdowns.
+
+    The options are scraped once from the activation page and reused until the TTL expires,
+    so the automation can set the <select> values directly and reject an unknown label
+    (e.g. a typo) before any page is loaded. Entries are kept per platform (scope), so a
+    local stand-in server never pollutes the options of the real one.
+    '''
+    def __init__(self, path: Optional[str] = CATALOG_PATH, ttl: float = CATALOG_TTL, scope: str = 'default'):
+        '''
+        Args:
+            path (str | None): JSON file of the cache. None keeps the catalog in memory only.
+            ttl (float): Lifetime of the scraped options, in seconds.
+            scope (str): Key of the platform the options belong to (e.g. its base URL).
+        '''
+        self.path = path
+        self.ttl = ttl
+        self.scope = scope
+        self._lock = threading.Lock()
+        self._entry = self._load()
+
+    def _load(self) -> dict:
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as catalog_file:
+                    return json.load(catalog_file).get(self.scope, {})
+            except (OSError, ValueError):
+                return {}
+        return {}
+
+    def _save(self):
+        if not self.path:
+            return
+        catalog = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as catalog_file:
+                    catalog = json.load(catalog_file)
+            except (OSError, ValueError):
+                catalog = {}
+        catalog[self.scope] = self._entry
+        temporary_path = f'{self.path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as catalog_file:
+            json.dump(catalog, catalog_file, ensure_ascii=False, indent=2)
+        os.replace(temporary_path, self.path)
+
+    def is_fresh(self) -> bool:
+        '''
+        Tells whether the options were scraped less than `ttl` seconds ago.
+        '''
+        return bool(self._entry) and time.time() - self._entry.get('fetched_at', 0) < self.ttl
+
+    def update(self, selects: dict):
+        '''
+        Stores freshly scraped options.
+
+        Args:
+            selects (dict): Name of each <select> mapped to its {label: value} options.
+        '''
+        with self._lock:
+            # A select missing from the scraped page (e.g. rendered later) keeps its previous options
+            merged = dict(self._entry.get('selects', {}))
+            for name, options in selects.items():
+                if options:
+                    # Placeholder options ('Selecione') have no value
+                    merged[name] = {label.strip(): value for label, value in options.items() if value}
+            self._entry = {'fetched_at': time.time(), 'selects': merged}
+            self._save()
+
+    def invalidate(self):
+        '''
+        Forgets the cached options, forcing a new scrape.
+        '''
+        with self._lock:
+            self._entry = {}
+            self._save()
+
+    def options(self, select_name: str) -> dict:
+        '''
+        Returns:
+            dict: The {label: value} options of a <select>, empty if not cached or outdated.
+        '''
+        if not self.is_fresh():
+            return {}
+        return dict(self._entry['selects'].get(select_name, {}))
+
+    def value(self, select_name: str, label: str) -> Optional[str]:
+        '''
+        Returns the value of an option from the cache.
+
+        Returns:
+            str | None: The option value, None if the options are not cached (or outdated).
+
+        Raises:
+            UnknownOptionError: If the options are cached and the label is not among them.
+        '''
+        options = self.options(select_name)
+        if not options:
+            return None
+        label = label.strip()
+        if label not in options:
+            suggestions = difflib.get_close_matches(label, list(options), n=3)
+            hint = f' Did you mean: {", ".join(repr(suggestion) for suggestion in suggestions)}?' if suggestions else ''
+            raise UnknownOptionError(f'Unknown {select_name} option \'{label}\'.{hint}')
+        return options[label]
+
+    def check(self, select_name: str, label: str):
+        '''
+        Fails fast on a label missing from the cached options (no-op when nothing is cached).
+
+        Raises:
+            UnknownOptionError: If the label is not among the cached options.
+        '''
+        self.value(select_name, label)
@@ -0,0 +1,333 @@
+# saitro_cli.py
+import sys
+import json
+import argparse
+from typing import Optional
+
+# The automation modules only import Playwright once a browser is started, so their defaults
+# are imported here and '--help', 'greet' or a bad argument still answer at once
+from saitro_automation import DEFAULT_PRODUCT_LABEL, DEFAULT_CLIENT_INFO, DEFAULT_APN, DEFAULT_BATCH_SIZE
+from saitro_pool import DEFAULT_CONCURRENCY
+from saitro_daemon import SPOOL_DIR, JOB_ACTIONS
+
+# --- Constants and Configuration ---
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+
+def _automation(args: argparse.Namespace, **kwargs):
+    '''
+    Starts a browser configured from the global options.
+    '''
+    from saitro_automation import SaitroAutomation
+    from saitro_network import ResourceBlocker
+    return SaitroAutomation(
+        headless=args.headless, slow_mo=args.slow_mo, reuse_session=args.reuse_session,
+        resource_blocker=ResourceBlocker() if args.block_resources else None, **kwargs)
+
+
+def _report(result) -> int:
+    '''
+    Prints the outcome of a workflow and converts it to an exit code.
+    '''
+    if hasattr(result, 'action'):
+        print(f'{result.action}: ok={result.ok} status={result.status} ({result.elapsed_ms:.0f} ms) {result.message}')
+    return EXIT_OK if result else EXIT_FAILED
+
+
+def _run_pipeline(args: argparse.Namespace, build) -> int:
+    automation = _automation(args)
+    pipeline = build(automation.pipeline(args.product))
+    ok = pipeline.run()
+    for result in pipeline.results:
+        _report(result)
+    return EXIT_OK if ok else EXIT_FAILED
+
+
+def cmd_clear_cart(args: argparse.Namespace) -> int:
+    return _run_pipeline(args, lambda pipeline: pipeline.clear_cart())
+
+
+def cmd_set_cart(args: argparse.Namespace) -> int:
+    if args.reconcile:
+        return _run_pipeline(args, lambda pipeline: pipeline.reconcile_cart(args.csv, validate=args.validate))
+    return _run_pipeline(args, lambda pipeline: pipeline.set_cart(args.csv, validate=args.validate))
+
+
+def cmd_confirm_cart(args: argparse.Namespace) -> int:
+    return _run_pipeline(args, lambda pipeline: pipeline.confirm_cart(args.client_info, args.apn))
+
+
+def cmd_activate(args: argparse.Namespace) -> int:
+    def build(pipeline):
+        pipeline.clear_cart().set_cart(args.csv, validate=args.validate).confirm_cart(args.client_info, args.apn)
+        return pipeline.clear_requests() if args.clear_requests else pipeline
+    return _run_pipeline(args, build)
+
+
+def cmd_clear_requests(args: argparse.Namespace) -> int:
+    automation = _automation(args)
+    if not args.bulk:
+        return _report(automation.clear_requests())
+
+    from datetime import timedelta
+    from saitro_automation import RequestFilter
+    iccids = None
+    if args.iccids:
+        with open(args.iccids, 'r', encoding='utf-8') as iccid_file:
+            iccids = {line.strip() for line in iccid_file if line.strip()}
+    report = automation.bulk_clear_requests(RequestFilter(
+        older_than=timedelta(days=args.older_than_days) if args.older_than_days is not None else None,
+        statuses=set(args.status) if args.status else None,
+        iccids=iccids,
+    ))
+    print(f'Cancelled: {len(report.cancelled)} | Failed: {len(report.failed)} | Left by the filter: {report.skipped}')
+    return EXIT_OK if report else EXIT_FAILED
+
+
+def cmd_bulk_set_cart(args: argparse.Namespace) -> int:
+    from saitro_ledger import ActivationLedger, LEDGER_PATH
+    ledger_path = args.ledger or (LEDGER_PATH if args.resume else None)
+    ledger = ActivationLedger(ledger_path) if ledger_path else None
+    pool = None
+    try:
+        options = dict(batch_size=args.batch_size, client_info=args.client_info, apn=args.apn,
+                       validate=args.validate, resume=args.resume)
+        if args.accounts and args.pipelined:
+            raise ValueError('--pipelined cannot be combined with --accounts')
+        if args.accounts:
+            # Sharded across the operator accounts, one browser and session each
+            from saitro_accounts import AccountPool, load_accounts
+            pool = AccountPool(load_accounts(args.accounts), headless=args.headless, slow_mo=args.slow_mo, ledger=ledger)
+            run = pool.bulk_set_shopping_cart
+        elif args.pipelined:
+            # Next batch uploaded from a second page while the current one is confirmed
+            from saitro_pipelined import PipelinedBulkUpload
+            run = PipelinedBulkUpload(headless=args.headless, slow_mo=args.slow_mo, ledger=ledger,
+                                      reuse_session=args.reuse_session).run_sync
+        else:
+            run = lambda file_path, **kwargs: _automation(args, ledger=ledger).bulk_set_shopping_cart(file_path, **kwargs)
+        report = run(args.csv, **options)
+        for attempt in range(args.retries):
+            if report:
+                break
+            # Retry only the batches that failed, in a fresh session
+            print(f'Retrying failed batches ({attempt + 1}/{args.retries}): {sorted(report.failed_batches)}')
+            report.merge(run(args.csv, only_batches=report.failed_batches, **options))
+        print(f'Batches: {len(report.succeeded)} confirmed, {len(report.failed)} failed '
+              f'({report.iccid_count} ICCIDs sent).')
+        if ledger:
+            print(f'Ledger: {ledger.summary()}')
+        return EXIT_OK if report else EXIT_FAILED
+    finally:
+        if pool:
+            pool.close()
+        if ledger:
+            ledger.close()
+
+
+def cmd_track(args: argparse.Namespace) -> int:
+    import os
+    from saitro_ledger import ActivationLedger, LEDGER_PATH
+    iccids = None
+    if args.iccids:
+        with open(args.iccids, 'r', encoding='utf-8') as iccid_file:
+            iccids = [line.strip() for line in iccid_file if line.strip()]
+    # The ICCIDs come from the ledger unless given; a given list still gets its batches from it
+    ledger_path = args.ledger or (None if iccids is not None else LEDGER_PATH)
+    ledger = ActivationLedger(ledger_path) if ledger_path else None
+    # Lots of uploaded files are recorded by absolute path
+    lot = os.path.abspath(args.lot) if args.lot and os.path.exists(args.lot) else args.lot
+    try:
+        summary = _automation(args, ledger=ledger).track_activations(
+            iccids, lot, timeout=args.timeout, csv_path=args.report_csv, jsonl_path=args.report_jsonl)
+        print(f'Activations: {len(summary.completed)} completed, {len(summary.failed)} failed, '
+              f'{len(summary.pending)} pending ({summary.polls} polls).')
+        return EXIT_OK if summary else EXIT_FAILED
+    finally:
+        if ledger:
+            ledger.close()
+
+
+def cmd_pool(args: argparse.Namespace) -> int:
+    from saitro_pool import ActivationPool, cart_upload_job
+    from saitro_ledger import ActivationLedger
+    ledger = ActivationLedger(args.ledger) if args.ledger else None
+    try:
+        with ActivationPool(concurrency=args.concurrency, headless=args.headless, slow_mo=args.slow_mo,
+                            isolate_sessions=not args.shared_session, ledger=ledger) as pool:
+            results = pool.run(cart_upload_job(csv_file, args.product, args.client_info, args.apn, validate=args.validate)
+                               for csv_file in args.csv)
+    finally:
+        if ledger:
+            ledger.close()
+    for result in results:
+        print(f'{result.name}: ok={result.ok} ({result.elapsed_ms:.0f} ms) {result.error}')
+    return EXIT_OK if all(result.ok for result in results) else EXIT_FAILED
+
+
+def cmd_daemon(args: argparse.Namespace) -> int:
+    from saitro_daemon import SaitroDaemon, submit_job
+    if args.daemon_command == 'run':
+        SaitroDaemon(args.spool, headless=args.headless, slow_mo=args.slow_mo,
+                     ledger_path=args.ledger).run(once=args.once)
+        return EXIT_OK
+    job_args = {}
+    for argument in args.args:
+        name, value = argument.split('=', 1)
+        try:
+            # Numbers, booleans and lists (e.g. validate=false, statuses='["Pendente"]')
+            job_args[name] = json.loads(value)
+        except ValueError:
+            job_args[name] = value
+    print(submit_job(args.action, args.spool, **job_args))
+    return EXIT_OK
+
+
+def cmd_greet(args: argparse.Namespace) -> int:
+    from saitro_automation import greet_thanks
+    greet_thanks()
+    return EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    '''
+    Returns:
+        argparse.ArgumentParser: The parser of the global options and of every subcommand.
+    '''
+    parser = argparse.ArgumentParser(prog='saitro', description='Saitro activation automation (RPA).')
+    browser = parser.add_mutually_exclusive_group()
+    browser.add_argument('--headless', dest='headless', action='store_true', default=True,
+                         help='Run the browser without a window (default)')
+    browser.add_argument('--headed', dest='headless', action='store_false', help='Show the browser window')
+    parser.add_argument('--slow-mo', type=int, default=0, help='Slow down browser operations, in milliseconds')
+    parser.add_argument('--no-reuse-session', dest='reuse_session', action='store_false',
+                        help='Log in with the form instead of reusing the saved session')
+    parser.add_argument('--block-resources', action='store_true', help='Skip images, fonts and trackers')
+    subparsers = parser.add_subparsers(dest='command', required=True, metavar='command')
+
+    def add_product(subparser):
+        subparser.add_argument('--product', default=DEFAULT_PRODUCT_LABEL, help='Product selected on the activation page')
+
+    def add_confirmation(subparser):
+        subparser.add_argument('--client-info', default=DEFAULT_CLIENT_INFO, help='Text of the \'Info Cliente\' field')
+        subparser.add_argument('--apn', default=DEFAULT_APN, help='APN of the activated lines')
+
+    def add_validation(subparser):
+        subparser.add_argument('--no-validate', dest='validate', action='store_false',
+                               help='Upload the file as is, without removing malformed or duplicated ICCIDs')
+
+    command = subparsers.add_parser('clear-cart', help='Clear the shopping cart')
+    add_product(command)
+    command.set_defaults(handler=cmd_clear_cart)
+
+    command = subparsers.add_parser('set-cart', help='Upload an ICCID file to the shopping cart')
+    command.add_argument('csv', help='ICCID file, one per line')
+    command.add_argument('--reconcile', action='store_true', help='Upload only the ICCIDs missing from the cart')
+    add_product(command)
+    add_validation(command)
+    command.set_defaults(handler=cmd_set_cart)
+
+    command = subparsers.add_parser('confirm-cart', help='Confirm the shopping cart')
+    add_product(command)
+    add_confirmation(command)
+    command.set_defaults(handler=cmd_confirm_cart)
+
+    command = subparsers.add_parser('activate', help='Clear the cart, upload a file and confirm it in one session')
+    command.add_argument('csv', help='ICCID file, one per line')
+    command.add_argument('--clear-requests', action='store_true', help='Also cancel the first outstanding request')
+    add_product(command)
+    add_confirmation(command)
+    add_validation(command)
+    command.set_defaults(handler=cmd_activate)
+
+    command = subparsers.add_parser('clear-requests', help='Cancel outstanding requests')
+    command.add_argument('--bulk', action='store_true', help='Cancel every matching request, across all pages')
+    command.add_argument('--older-than-days', type=float, help='With --bulk: only requests created more than N days ago')
+    command.add_argument('--status', nargs='+', help='With --bulk: only requests showing one of these statuses')
+    command.add_argument('--iccids', help='With --bulk: file with the ICCIDs whose requests must be cancelled')
+    command.set_defaults(handler=cmd_clear_requests)
+
+    command = subparsers.add_parser('bulk-set-cart', help='Upload and confirm a large ICCID file in batches')
+    command.add_argument('csv', help='ICCID file, one per line')
+    command.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='ICCIDs per batch')
+    command.add_argument('--ledger', help='ActivationLedger database recording every ICCID and batch')
+    command.add_argument('--resume', action='store_true', help='Skip the batches already confirmed (uses the ledger)')
+    command.add_argument('--retries', type=int, default=0, help='Times the failed batches are retried')
+    command.add_argument('--accounts', nargs='?', const='accounts.json',
+                         help='Shard the batches across the operator accounts of this file (default: accounts.json)')
+    command.add_argument('--pipelined', action='store_true',
+                         help='Prepare the upload of the next batch while the current one is being confirmed')
+    add_confirmation(command)
+    add_validation(command)
+    command.set_defaults(handler=cmd_bulk_set_cart)
+
+    command = subparsers.add_parser('track', help='Follow the activation requests of confirmed ICCIDs')
+    command.add_argument('--ledger', help='ActivationLedger database of the confirmed ICCIDs (default: saitro_ledger.sqlite3)')
+    command.add_argument('--lot', help='Only the ICCIDs of this lot of the ledger (the uploaded file)')
+    command.add_argument('--iccids', help='File with the ICCIDs to follow, instead of the ledger')
+    command.add_argument('--timeout', type=float, help='Seconds before giving up on the requests still open')
+    command.add_argument('--report-csv', help='CSV report (default: saitro_activation_report.csv)')
+    command.add_argument('--report-jsonl', help='JSONL report (default: saitro_activation_report.jsonl)')
+    command.set_defaults(handler=cmd_track)
+
+    command = subparsers.add_parser('pool', help='Upload and confirm several files concurrently')
+    command.add_argument('csv', nargs='+', help='ICCID files, one job each')
+    command.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Jobs running at once')
+    command.add_argument('--shared-session', action='store_true',
+                         help='Let the workers share one login (and one cart: the jobs then run one at a time)')
+    command.add_argument('--ledger', help='ActivationLedger database: skip confirmed ICCIDs, record the uploaded ones')
+    add_product(command)
+    add_confirmation(command)
+    add_validation(command)
+    command.set_defaults(handler=cmd_pool)
+
+    command = subparsers.add_parser('daemon', help='Run the warm-browser daemon, or queue a job for it')
+    command.add_argument('--spool', default=SPOOL_DIR, help='Spool directory')
+    daemon_commands = command.add_subparsers(dest='daemon_command', required=True, metavar='daemon_command')
+    daemon_command = daemon_commands.add_parser('run', help='Run the daemon')
+    # Also accepted after 'run', as the daemon took it before being a subcommand of this CLI
+    daemon_command.add_argument('--headed', dest='headless', action='store_false', default=argparse.SUPPRESS,
+                                help='Show the browser window')
+    daemon_command.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+    daemon_command.add_argument('--ledger',
+                                help='ActivationLedger database written by the jobs (relative to the spool)')
+    daemon_command = daemon_commands.add_parser('submit', help='Queue a job')
+    daemon_command.add_argument('action', choices=sorted(JOB_ACTIONS))
+    daemon_command.add_argument('args', nargs='*',
+                                help='Job arguments as name=value (e.g. file_path=dummy.csv, relative to the spool)')
+    command.set_defaults(handler=cmd_daemon)
+
+    command = subparsers.add_parser('greet', help='Print the thanks list')
+    command.set_defaults(handler=cmd_greet)
+    return parser
+
+
+def main(argv: Optional[list] = None) -> int:
+    '''
+    Runs one command.
+
+    Example:
+        python saitro_cli.py --headed set-cart dummy.csv --product 'TIM 50MB R&T TIM Comp 30 IOT'
+
+    Args:
+        argv (list | None): Command-line arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        int: EXIT_OK if the command succeeded, EXIT_FAILED otherwise.
+    '''
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except KeyboardInterrupt:
+        print('[] Interrupted.')
+        return EXIT_FAILED
+    except (OSError, ValueError) as e:
+        print(f'Error: {e}')
+        return EXIT_USAGE
+
+
+if __name__ == '__main__':
+    sys.exit(main())
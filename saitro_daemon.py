@@ -0,0 +1,332 @@
+# saitro_daemon.py
+import os
+import json
+import time
+import uuid
+import signal
+import dataclasses
+from datetime import timedelta
+from typing import Optional
+
+from saitro_automation import (
+    SaitroAutomation, ActionResult, RequestFilter, _upload_source,
+    BASE_URL, USER_CREDENTIALS_PATH, LOGIN_STATE_PATH, DEFAULT_PRODUCT_LABEL, DEFAULT_CLIENT_INFO, DEFAULT_APN,
+)
+from saitro_ledger import ActivationLedger
+from saitro_timeouts import TimeoutPolicy, CircuitBreaker, TIMEOUTS_PATH
+from saitro_governor import Governor
+from saitro_lifecycle import ContextLifecycle
+from saitro_metrics import StepRecorder, METRICS_JSONL_PATH
+from saitro_catalog import ProductCatalog, CATALOG_PATH
+
+# --- Constants and Configuration ---
+# Spool directory: jobs are JSON files dropped in 'incoming', moved to 'processing' while they
+# run, then to 'done' or 'failed' together with their result.
+SPOOL_DIR = 'saitro_spool'
+SPOOL_SUBDIRS = ('incoming', 'processing', 'done', 'failed')
+# Job arguments holding a file path (resolved against the spool directory when relative)
+JOB_PATH_ARGS = ('file_path',)
+POLL_INTERVAL = 1.0 # Seconds between two scans of an empty queue
+SESSION_CHECK_INTERVAL = 300 # Idle seconds after which the session is checked before the next job
+
+
+def _job_set_cart(automation: SaitroAutomation, file_path: str, product_label: str = DEFAULT_PRODUCT_LABEL,
+                  validate: bool = True) -> ActionResult:
+    iccids, lot, error = _upload_source(file_path, validate,
+                                        automation.ledger.is_confirmed if automation.ledger else None)
+    if error is not None:
+        return error
+    return automation._upload_iccids(iccids, product_label, lot)
+
+
+def _job_reconcile_cart(automation: SaitroAutomation, file_path: str, product_label: str = DEFAULT_PRODUCT_LABEL,
+                        validate: bool = True) -> ActionResult:
+    iccids, lot, error = _upload_source(file_path, validate)
+    if error is not None:
+        return error
+    return automation._reconcile_cart(iccids, product_label, lot)
+
+
+def _job_clear_requests(automation: SaitroAutomation, bulk: bool = False, older_than_days: Optional[float] = None,
+                        statuses: Optional[list] = None, iccids: Optional[list] = None):
+    if not bulk:
+        return automation._cancel_request()
+    return automation._cancel_requests(RequestFilter(
+        older_than=timedelta(days=older_than_days) if older_than_days is not None else None,
+        statuses=set(statuses) if statuses else None,
+        iccids=set(iccids) if iccids else None,
+    ))
+
+
+# Job actions: name -> function receiving the warm, logged-in automation and the job arguments
+JOB_ACTIONS = {
+    'set_cart': _job_set_cart,
+    'reconcile_cart': _job_reconcile_cart,
+    'clear_cart': lambda automation, product_label=DEFAULT_PRODUCT_LABEL: automation._clear_cart(product_label),
+    'confirm_cart': lambda automation, client_info=DEFAULT_CLIENT_INFO, apn=DEFAULT_APN, product_label=DEFAULT_PRODUCT_LABEL:
+        automation._confirm_cart(client_info, apn, product_label),
+    'clear_requests': _job_clear_requests,
+}
+
+
+def submit_job(action: str, spool_dir: str = SPOOL_DIR, job_id: Optional[str] = None, **args) -> str:
+    '''
+    Queues a job for the daemon.
+
+    Example:
+        submit_job('set_cart', file_path='dummy.csv')
+        submit_job('confirm_cart', apn='furukawaelectric.com.br')
+
+    Args:
+        action (str): One of JOB_ACTIONS.
+        spool_dir (str): Spool directory watched by the daemon.
+        job_id (str | None): Identifier of the job (and of its result file). Defaults to a new one.
+        **args: Arguments of the action.
+
+    Returns:
+        str: The job identifier. The result is written to <spool_dir>/done/<job_id>.json
+             (or failed/) once the job has run.
+
+    Note:
+        The daemon resolves a relative `file_path` against the spool directory, not against
+        the directory the job was submitted from.
+    '''
+    if action not in JOB_ACTIONS:
+        raise ValueError(f'Unknown action \'{action}\'. Expected one of: {", ".join(JOB_ACTIONS)}')
+    job_id = job_id or time.strftime('%Y%m%d%H%M%S-') + uuid.uuid4().hex[:8]
+    incoming = os.path.join(spool_dir, 'incoming')
+    os.makedirs(incoming, exist_ok=True)
+    job_path = os.path.join(incoming, f'{job_id}.json')
+    # Written aside and renamed, so the daemon never reads a half-written job
+    with open(job_path + '.tmp', 'w', encoding='utf-8') as job_file:
+        json.dump({'id': job_id, 'action': action, 'args': args, 'submitted_at': time.time()}, job_file)
+    os.replace(job_path + '.tmp', job_path)
+    return job_id
+
+
+class SaitroDaemon:
+    '''
+    Keeps one authenticated browser warm and runs the jobs of a spool directory back to back.
+
+    Jobs are taken in submission order. A job is claimed by renaming it into 'processing'
+    (atomic, so a submitter never races the daemon), and its result is written to 'done' or
+    'failed'. Run a single daemon per spool: on start, the jobs found in 'processing' are
+    considered interrupted. The browser is restarted if it crashes, and the session is checked again after
+    SESSION_CHECK_INTERVAL seconds without jobs. The learned timeouts and the circuit breaker
+    outlive browser restarts: while the platform keeps timing out, jobs fail at once.
+
+    Every file of the daemon is found under the spool directory, whatever the directory it
+    was started from: the relative file paths of the jobs, and the credentials (user.json),
+    login state, learned timeouts, spans, catalog and ledger.
+    '''
+    def __init__(self, spool_dir: str = SPOOL_DIR, headless: bool = True, slow_mo: int = 0,
+                 poll_interval: float = POLL_INTERVAL, ledger_path: Optional[str] = None):
+        '''
+        Args:
+            spool_dir (str): Spool directory (created if it does not exist).
+            headless (bool): If True, the browser runs in headless mode.
+            slow_mo (int): Slows down Playwright operations, in milliseconds.
+            poll_interval (float): Seconds between two scans of an empty queue.
+            ledger_path (str | None): If given, every job writes to this ActivationLedger
+                                      (relative to the spool directory).
+        '''
+        self.spool_dir = os.path.abspath(spool_dir)
+        self.headless = headless
+        self.slow_mo = slow_mo
+        self.poll_interval = poll_interval
+        for subdir in SPOOL_SUBDIRS:
+            os.makedirs(os.path.join(self.spool_dir, subdir), exist_ok=True)
+        self.state_path = self.resolve(LOGIN_STATE_PATH)
+        self.credentials_path = self.resolve(USER_CREDENTIALS_PATH)
+        self.ledger = ActivationLedger(self.resolve(ledger_path)) if ledger_path else None
+        self.timeout_policy = TimeoutPolicy(self.resolve(TIMEOUTS_PATH))
+        self.circuit_breaker = CircuitBreaker()
+        self.catalog = ProductCatalog(self.resolve(CATALOG_PATH), scope=BASE_URL)
+        # Kept across browser restarts, so a captcha backoff is not reset by a crash
+        self.governor = Governor()
+        # Also kept across restarts, so the recycles and job counts cover the whole run
+        self.lifecycle = ContextLifecycle('daemon')
+        self.recorder = StepRecorder(self.resolve(METRICS_JSONL_PATH))
+        self.recorder.collectors.extend([self.governor.prometheus_text, self.lifecycle.prometheus_text])
+        self.automation = None
+        self.last_activity = 0.0
+        self.running = False
+
+    def resolve(self, path: str) -> str:
+        '''
+        Returns a path relative to the spool directory as an absolute path (absolute paths
+        are returned as they are).
+        '''
+        return os.path.join(self.spool_dir, os.path.expanduser(path))
+
+    def _path(self, subdir: str, name: str) -> str:
+        return os.path.join(self.spool_dir, subdir, name)
+
+    def _job_args(self, job: dict) -> dict:
+        '''
+        Returns the arguments of a job, its file paths resolved against the spool directory.
+        '''
+        args = dict(job.get('args', {}))
+        for name in JOB_PATH_ARGS:
+            if isinstance(args.get(name), str):
+                args[name] = self.resolve(args[name])
+        return args
+
+    def _read_credentials(self) -> dict:
+        '''
+        Reads the credentials of the spool directory (user.json).
+        '''
+        try:
+            with open(self.credentials_path, 'r', encoding='utf-8') as user_file:
+                return json.load(user_file)
+        except FileNotFoundError:
+            raise FileNotFoundError(f'Credential file \'{self.credentials_path}\' not found') from None
+
+    def _start_browser(self) -> bool:
+        self._stop_browser()
+        self.automation = SaitroAutomation(headless=self.headless, slow_mo=self.slow_mo, reuse_session=True,
+                                           state_path=self.state_path, credentials=self._read_credentials(),
+                                           recorder=self.recorder, ledger=self.ledger, catalog=self.catalog,
+                                           timeout_policy=self.timeout_policy, circuit_breaker=self.circuit_breaker,
+                                           governor=self.governor, lifecycle=self.lifecycle)
+        self.last_activity = time.monotonic()
+        return self.automation.ensure_logged_in()
+
+    def _stop_browser(self):
+        if self.automation:
+            try:
+                self.automation.close()
+            except Exception as e:
+                print(f'[] Browser did not close cleanly: {e}')
+            self.automation = None
+
+    def _ensure_ready(self) -> bool:
+        '''
+        Makes sure the warm browser is alive and logged in before a job.
+        '''
+        if not self.automation or not self.automation.browser.is_connected() or self.automation.page.is_closed():
+            print('[] Starting the browser...')
+            return self._start_browser()
+        if time.monotonic() - self.last_activity > SESSION_CHECK_INTERVAL:
+            return self.automation.ensure_logged_in()
+        return True
+
+    def _recover(self):
+        '''
+        Fails the jobs left in 'processing' by a previous daemon that stopped mid-job:
+        they may have been partially applied, so they are not run again blindly.
+        '''
+        for name in sorted(os.listdir(os.path.join(self.spool_dir, 'processing'))):
+            with open(self._path('processing', name), 'r', encoding='utf-8') as job_file:
+                job = json.load(job_file)
+            self._finish(name, job, {'ok': False, 'error': 'Interrupted by a daemon restart'})
+
+    def _claim(self) -> Optional[str]:
+        '''
+        Moves the oldest incoming job to 'processing'.
+
+        Returns:
+            str | None: File name of the claimed job, None if the queue is empty.
+        '''
+        for name in sorted(os.listdir(os.path.join(self.spool_dir, 'incoming'))):
+            if not name.endswith('.json'):
+                continue
+            try:
+                os.rename(self._path('incoming', name), self._path('processing', name))
+                return name
+            except FileNotFoundError:
+                # Claimed by another daemon
+                continue
+        return None
+
+    def _finish(self, name: str, job: dict, outcome: dict):
+        subdir = 'done' if outcome.get('ok') else 'failed'
+        with open(self._path(subdir, name + '.tmp'), 'w', encoding='utf-8') as result_file:
+            json.dump(dict(job, **outcome), result_file, ensure_ascii=False, indent=2, default=str)
+        os.replace(self._path(subdir, name + '.tmp'), self._path(subdir, name))
+        os.remove(self._path('processing', name))
+
+    def run_job(self, job: dict) -> dict:
+        '''
+        Runs one job on the warm browser.
+
+        Returns:
+            dict: 'ok', 'result' (the returned dataclass as a dict) or 'error', and timings.
+        '''
+        started = time.monotonic()
+        outcome = {'started_at': time.time()}
+        try:
+            if job.get('action') not in JOB_ACTIONS:
+                raise ValueError(f'Unknown action \'{job.get("action")}\'')
+            if not self._ensure_ready():
+                raise RuntimeError('Login failed')
+            result = JOB_ACTIONS[job['action']](self.automation, **self._job_args(job))
+            outcome['ok'] = bool(result)
+            outcome['result'] = dataclasses.asdict(result) if dataclasses.is_dataclass(result) else result
+        except Exception as e:
+            outcome['ok'] = False
+            outcome['error'] = str(e)
+            # Leave a clean page for the next job; a dead browser is restarted by _ensure_ready
+            try:
+                if self.automation and self.automation.browser.is_connected():
+                    self.automation._dismiss_open_modal()
+            except Exception:
+                pass
+        outcome['elapsed_ms'] = (time.monotonic() - started) * 1000
+        if self.automation and self.automation.browser.is_connected():
+            try:
+                # Recycle the page or the context before the next job if it grew too much
+                self.automation.finish_job()
+            except Exception as e:
+                print(f'[] Could not recycle the browser context: {e}')
+        outcome['context'] = self.lifecycle.stats()
+        self.last_activity = time.monotonic()
+        return outcome
+
+    def run(self, once: bool = False):
+        '''
+        Processes jobs until stopped (SIGINT/SIGTERM), or until the queue is empty if once=True.
+        '''
+        self.running = True
+        try:
+            signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+        except ValueError:
+            # Not the main thread: rely on stop()
+            pass
+        self._recover()
+        print(f'[] Daemon watching \'{os.path.join(self.spool_dir, "incoming")}\'...')
+        try:
+            while self.running:
+                name = self._claim()
+                if name is None:
+                    if once:
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+                with open(self._path('processing', name), 'r', encoding='utf-8') as job_file:
+                    job = json.load(job_file)
+                print(f'--- Job {job.get("id", name)}: {job.get("action")} ---')
+                outcome = self.run_job(job)
+                self._finish(name, job, outcome)
+                print(f'[] Job {job.get("id", name)} finished (ok={outcome["ok"]}, {outcome["elapsed_ms"]:.0f} ms).')
+        except KeyboardInterrupt:
+            print('[] Daemon interrupted.')
+        finally:
+            self._stop_browser()
+            self.timeout_policy.save()
+            self.recorder.close()
+            if self.ledger:
+                self.ledger.close()
+
+    def stop(self):
+        '''
+        Stops the daemon after the job in progress.
+        '''
+        self.running = False
+
+
+if __name__ == '__main__':
+    # Kept for existing scripts: same as 'python saitro_cli.py daemon ...'
+    import sys
+    from saitro_cli import main
+    sys.exit(main(['daemon'] + sys.argv[1:]))
@@ -0,0 +1,211 @@
+# saitro_governor.py
+import re
+import time
+import threading
+from typing import Optional
+
+# --- Constants and Configuration ---
+# Kinds of operations paced by the governor
+KIND_LOGIN = 'login'           # Login form submissions
+KIND_NAVIGATION = 'navigation' # Page loads and session checks
+KIND_POST = 'post'             # Form/AJAX posts (uploads, confirmations, cancellations)
+
+# Per-account limits of every kind: (operations per minute, burst)
+DEFAULT_RATES = {
+    KIND_LOGIN: (2, 1),
+    KIND_NAVIGATION: (60, 10),
+    KIND_POST: (30, 5),
+}
+UNLIMITED_RATES = {kind: (0, 1) for kind in DEFAULT_RATES}
+
+# Backoff after a captcha or throttling page: the rates are divided by 2 ** level and every
+# operation is paused for BACKOFF_BASE * 2 ** (level - 1) seconds (up to BACKOFF_MAX)
+BACKOFF_BASE = 30.0
+BACKOFF_MAX = 15 * 60.0
+BACKOFF_MAX_LEVEL = 5
+# Quiet seconds (without a new challenge) after which the backoff level goes down by one
+BACKOFF_RECOVERY = 120.0
+
+# Markers of a challenge or throttling page (reCAPTCHA challenge frame, 'too many requests'
+# pages, or the platform's own block messages, in Portuguese), mapped to a reason
+CHALLENGE_MARKERS = (
+    ('captcha', re.compile(r'recaptcha/api2/bframe|g-recaptcha-response[^>]*required|captcha inv[aá]lido', re.I)),
+    ('throttled', re.compile(r'too many requests|rate limit|muitas (tentativas|requisi[cç][oõ]es)|'
+                             r'tente novamente (mais tarde|em alguns minutos)|acesso bloqueado', re.I)),
+)
+THROTTLING_STATUSES = (429,)
+
+
+def detect_challenge(html: str = '', status: Optional[int] = None) -> Optional[str]:
+    '''
+    Tells whether a page (or an HTTP status) is a captcha challenge or a throttling answer.
+
+    Returns:
+        str | None: The reason ('captcha', 'throttled' or 'http_<status>'), None for a normal page.
+    '''
+    if status in THROTTLING_STATUSES:
+        return f'http_{status}'
+    for reason, pattern in CHALLENGE_MARKERS:
+        if html and pattern.search(html):
+            return reason
+    return None
+
+
+class TokenBucket:
+    '''
+    Token bucket: `rate` tokens per second, at most `burst` in reserve.
+    '''
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now: float, rate: float) -> float:
+        '''
+        Takes a token at `rate` (the throttled rate), borrowing it if the bucket is empty.
+
+        Returns:
+            float: Seconds to wait before the token may be used.
+        '''
+        self.rate = rate
+        self._refill(now)
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / rate
+
+
+class Governor:
+    '''
+    Client-side limiter shared by every operation of one account, to stay under the bot
+    protection of the platform.
+
+    Logins, navigations and posts each draw from their own token bucket. When a captcha or
+    throttling page is reported, every operation is paused for a while and the rates are
+    halved; each further challenge doubles the pause and halves the rates again. After
+    BACKOFF_RECOVERY seconds without a challenge, the backoff steps down one level. Share one
+    governor between every automation (threads included) using the same account.
+    '''
+    def __init__(self, name: str = 'default', rates: Optional[dict] = None):
+        '''
+        Args:
+            name (str): Name of the account, used in the metrics.
+            rates (dict | None): Kind mapped to (operations per minute, burst), overriding
+                                 DEFAULT_RATES. A rate of 0 disables the limit of the kind.
+        '''
+        self.name = name
+        self.rates = dict(DEFAULT_RATES, **(rates or {}))
+        self.buckets = {kind: TokenBucket(per_minute / 60.0, burst) for kind, (per_minute, burst) in self.rates.items()}
+        self.level = 0
+        self.blocked_until = 0.0
+        self.last_challenge = 0.0
+        self.challenges = {}
+        self.waited = {kind: 0.0 for kind in self.rates}
+        self.operations = {kind: 0 for kind in self.rates}
+        self._lock = threading.Lock()
+
+    def _recover(self, now: float):
+        while self.level and now - self.last_challenge >= BACKOFF_RECOVERY:
+            self.level -= 1
+            self.last_challenge += BACKOFF_RECOVERY
+            print(f'[] Governor \'{self.name}\': backoff down to level {self.level}.')
+
+    def current_rate(self, kind: str) -> float:
+        '''
+        Returns:
+            float: Operations per minute currently allowed for a kind (0 if unlimited).
+        '''
+        return self.rates[kind][0] / 2 ** self.level
+
+    def acquire(self, kind: str):
+        '''
+        Blocks until an operation of a kind is allowed. Call it outside the timed steps.
+        '''
+        with self._lock:
+            now = time.monotonic()
+            self._recover(now)
+            wait = max(0.0, self.blocked_until - now)
+            rate = self.current_rate(kind) / 60.0
+            if kind in self.buckets and rate:
+                wait = max(wait, self.buckets[kind].reserve(now, rate))
+            self.operations[kind] = self.operations.get(kind, 0) + 1
+            self.waited[kind] = self.waited.get(kind, 0.0) + wait
+        if wait:
+            if wait >= 1:
+                print(f'[] Governor \'{self.name}\': waiting {wait:.1f} s before the next {kind}.')
+            time.sleep(wait)
+
+    def report_challenge(self, reason: str):
+        '''
+        Backs off after a captcha or throttling page: pauses every operation and halves the rates.
+        '''
+        with self._lock:
+            now = time.monotonic()
+            self._recover(now)
+            self.level = min(BACKOFF_MAX_LEVEL, self.level + 1)
+            self.last_challenge = now
+            pause = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self.level - 1))
+            self.blocked_until = max(self.blocked_until, now + pause)
+            self.challenges[reason] = self.challenges.get(reason, 0) + 1
+        print(f'[] Governor \'{self.name}\': {reason} detected. Pausing {pause:.0f} s, '
+              f'rates divided by {2 ** self.level}.')
+
+    def stats(self) -> dict:
+        '''
+        Returns:
+            dict: Backoff level, seconds left in the pause, current rates (per minute),
+                  operations and seconds waited per kind, and challenges per reason.
+        '''
+        with self._lock:
+            now = time.monotonic()
+            self._recover(now)
+            return {
+                'account': self.name,
+                'backoff_level': self.level,
+                'paused_seconds': max(0.0, self.blocked_until - now),
+                'rates': {kind: self.current_rate(kind) for kind in self.rates},
+                'operations': dict(self.operations),
+                'waited_seconds': dict(self.waited),
+                'challenges': dict(self.challenges),
+            }
+
+    def prometheus_text(self) -> str:
+        '''
+        Exports the state of the governor in the Prometheus text format
+        (usable as a StepRecorder collector).
+        '''
+        return governors_prometheus_text([self])
+
+
+def governors_prometheus_text(governors: list, prefix: str = 'saitro') -> str:
+    '''
+    Exports the state of several governors (e.g. one per account) in the Prometheus text
+    format, every metric family grouped once.
+    '''
+    stats = [governor.stats() for governor in governors]
+    families = (
+        ('backoff_level', 'gauge', 'Backoff level of the account (0 when not throttled).',
+         lambda stat: [('', stat['backoff_level'])]),
+        ('paused_seconds', 'gauge', 'Seconds left before the account may operate again.',
+         lambda stat: [('', f'{stat["paused_seconds"]:.3f}')]),
+        ('rate_per_minute', 'gauge', 'Operations per minute currently allowed.',
+         lambda stat: [(f',kind="{kind}"', f'{rate:g}') for kind, rate in stat['rates'].items()]),
+        ('operations_total', 'counter', 'Operations let through by the governor.',
+         lambda stat: [(f',kind="{kind}"', count) for kind, count in stat['operations'].items()]),
+        ('wait_seconds_total', 'counter', 'Time operations were held by the governor.',
+         lambda stat: [(f',kind="{kind}"', f'{waited:.3f}') for kind, waited in stat['waited_seconds'].items()]),
+        ('challenges_total', 'counter', 'Captcha or throttling pages detected.',
+         lambda stat: [(f',reason="{reason}"', count) for reason, count in stat['challenges'].items()]),
+    )
+    lines = []
+    for name, metric_type, help_text, samples in families:
+        lines.append(f'# HELP {prefix}_governor_{name} {help_text}')
+        lines.append(f'# TYPE {prefix}_governor_{name} {metric_type}')
+        for stat in stats:
+            account = stat['account'].replace('\\', '\\\\').replace('"', '\\"')
+            for labels, value in samples(stat):
+                lines.append(f'{prefix}_governor_{name}{{account="{account}"{labels}}} {value}')
+    return '\n'.join(lines) + '\n'
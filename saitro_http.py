@@ -0,0 +1,572 @@
+# saitro_http.py
+import os
+import json
+import time
+import queue
+import uuid
+import http.client
+from http.cookies import SimpleCookie
+from html.parser import HTMLParser
+from typing import Optional
+from urllib.parse import urlencode, urlsplit, urljoin
+
+# The browser (SaitroAutomation) is only started when a captcha forces a fallback
+# (see SaitroHttpAutomation._browser_fallback).
+from saitro_automation import (
+    ActionResult, IccidSource, _interpret_action_payload, _upload_source, encode_iccid_csv,
+    USER_CREDENTIALS_PATH, LOGIN_STATE_PATH, BASE_URL, UPLOAD_FILE_NAME, UPLOAD_MIME_TYPE,
+    DEFAULT_PRODUCT_LABEL, DEFAULT_CLIENT_INFO, DEFAULT_APN,
+)
+from saitro_catalog import ProductCatalog, UnknownOptionError, CATALOG_PATH, PRODUCT_SELECT, APN_SELECT
+from saitro_ledger import ActivationLedger
+from saitro_governor import Governor, KIND_LOGIN, KIND_NAVIGATION, KIND_POST, UNLIMITED_RATES, detect_challenge
+from saitro_session import SessionExpiredError
+
+# --- Constants and Configuration ---
+HTTP_POOL_SIZE = 4 # Keep-alive connections kept open per client
+HTTP_TIMEOUT = 30 # Socket timeout, in seconds
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+# Paths of the pages and form/AJAX endpoints posted by the Saitro front-end.
+# UNVERIFIED: only the page paths are known from the browser flows; the post endpoints
+# were inferred from the front-end (login button data-post='ajax-login', the "Adicionar
+# via Carga" form, the cart modal and the request cancel links), not captured from real
+# traffic. mock_saitro.py serves these same paths, so runs against it do not confirm them.
+# Pass `endpoints` with the paths recorded from the browser (DevTools, network tab) and
+# set HTTP_ENDPOINTS_VERIFIED once they have been checked against the platform.
+HTTP_ENDPOINTS_VERIFIED = False
+HTTP_ENDPOINTS = {
+    'login_page': '/sistema/login/',
+    'login': '/sistema/login/ajax-login/',
+    'activation_page': '/customer_care/ativacao/index/',
+    'upload': '/customer_care/ativacao/carga/',
+    'clear_cart': '/customer_care/ativacao/limpar_carrinho/',
+    'confirm': '/customer_care/ativacao/processar/',
+    'request_page': '/customer_care/solicitacao/index/',
+}
+
+
+class CaptchaChallengeError(Exception):
+    '''
+    Raised when the platform answers with a captcha challenge (or throttles the client)
+    instead of the expected response.
+
+    Attributes:
+        reason (str): The reason given by saitro_governor.detect_challenge.
+    '''
+    def __init__(self, message: str, reason: str = 'captcha'):
+        super().__init__(message)
+        self.reason = reason
+
+
+class HttpResponse:
+    '''
+    A fully read HTTP response (the connection can be reused as soon as it is built).
+    '''
+    def __init__(self, status: int, headers: dict, body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def text(self) -> str:
+        return self.body.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class _FormParser(HTMLParser):
+    '''
+    Extracts the options of the <select> elements and the request cancel links of a page.
+    '''
+    def __init__(self):
+        super().__init__()
+        self.selects = {}
+        self.cancel_links = []
+        self._select_name = None
+        self._option_value = None
+        self._option_label = ''
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'select':
+            self._select_name = attrs.get('name') or attrs.get('id')
+            self.selects.setdefault(self._select_name, {})
+        elif tag == 'option' and self._select_name:
+            self._option_value = attrs.get('value', '')
+            self._option_label = ''
+        elif tag == 'a' and attrs.get('data-original-title') == 'Cancelar Solicitação':
+            link = attrs.get('data-url') or attrs.get('href')
+            if link and link != '#':
+                self.cancel_links.append(link)
+
+    def handle_data(self, data):
+        if self._option_value is not None:
+            self._option_label += data
+
+    def handle_endtag(self, tag):
+        if tag == 'option' and self._select_name and self._option_value is not None:
+            self.selects[self._select_name][self._option_label.strip()] = self._option_value
+            self._option_value = None
+        elif tag == 'select':
+            self._select_name = None
+
+
+def _parse_page(html: str) -> _FormParser:
+    parser = _FormParser()
+    parser.feed(html)
+    return parser
+
+
+def _encode_multipart(fields: dict, files: dict) -> tuple:
+    '''
+    Encodes form fields and files as multipart/form-data.
+
+    Args:
+        fields (dict): Field name mapped to its value.
+        files (dict): Field name mapped to a (file_name, content_bytes, mime_type) tuple.
+
+    Returns:
+        tuple: (body, content_type)
+    '''
+    boundary = f'----saitro{uuid.uuid4().hex}'
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode('utf-8'))
+    for name, (file_name, content, mime_type) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{file_name}"\r\n'
+            f'Content-Type: {mime_type}\r\n\r\n'.encode('utf-8') + content + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode('utf-8'))
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class SaitroHttpClient:
+    '''
+    A pooled keep-alive HTTP client for the Saitro platform, with a cookie jar
+    seeded from the storage state saved by the browser login.
+    '''
+    def __init__(self, base_url: str = BASE_URL, state_path: str = LOGIN_STATE_PATH,
+                 pool_size: int = HTTP_POOL_SIZE, timeout: int = HTTP_TIMEOUT, governor: Optional[Governor] = None):
+        '''
+        Args:
+            base_url (str): Scheme and host of the platform (e.g. a local stand-in server).
+            state_path (str): Playwright storage state whose cookies (gsimtim...) seed the jar.
+            pool_size (int): Maximum number of idle keep-alive connections kept open.
+            timeout (int): Socket timeout, in seconds.
+            governor (Governor | None): If given, paces every request (GETs as navigations).
+        '''
+        parts = urlsplit(base_url)
+        self.base_url = base_url.rstrip('/')
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.timeout = timeout
+        self.state_path = state_path
+        self.governor = governor
+        self.cookies = {}
+        self._connections = queue.LifoQueue(maxsize=pool_size)
+        self.load_cookies()
+
+    def load_cookies(self):
+        '''
+        (Re)loads the cookies of the storage state file that apply to the platform host.
+        '''
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        with open(self.state_path, 'r', encoding='utf-8') as state_file:
+            state = json.load(state_file)
+        for cookie in state.get('cookies', []):
+            domain = cookie.get('domain', '').lstrip('.')
+            if self.host == domain or self.host.endswith('.' + domain):
+                self.cookies[cookie['name']] = cookie['value']
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        try:
+            return self._connections.get_nowait()
+        except queue.Empty:
+            return self._new_connection()
+
+    def _release(self, connection: http.client.HTTPConnection):
+        try:
+            self._connections.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def _store_cookies(self, set_cookie_headers: list):
+        for header in set_cookie_headers:
+            jar = SimpleCookie()
+            jar.load(header)
+            for name, morsel in jar.items():
+                if morsel['max-age'] == '0' or morsel.value in ('', 'deleted'):
+                    self.cookies.pop(name, None)
+                else:
+                    self.cookies[name] = morsel.value
+
+    def request(self, method: str, path: str, body: Optional[bytes] = None, headers: Optional[dict] = None,
+                kind: Optional[str] = None) -> HttpResponse:
+        '''
+        Sends a request over a pooled keep-alive connection. Redirects are not followed.
+
+        Args:
+            method (str): HTTP method.
+            path (str): Path (or absolute URL on the platform host) to request.
+            body (bytes | None): Request body.
+            headers (dict | None): Extra request headers.
+            kind (str | None): Governor kind of the request. Defaults to a post for POST
+                               requests and to a navigation otherwise.
+
+        Returns:
+            HttpResponse: The fully read response.
+        '''
+        if path.startswith('http'):
+            # Redirect locations and pagination links keep their query string (?page=N, ids)
+            parts = urlsplit(path)
+            path = (parts.path or '/') + ('?' + parts.query if parts.query else '')
+        request_headers = {'Connection': 'keep-alive', 'User-Agent': 'saitro-rpa'}
+        if self.cookies:
+            request_headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        request_headers.update(headers or {})
+        if self.governor:
+            self.governor.acquire(kind or (KIND_POST if method == 'POST' else KIND_NAVIGATION))
+        # A pooled connection may have been closed by the server: retry once on a fresh one
+        for attempt in range(2):
+            connection = self._acquire() if attempt == 0 else self._new_connection()
+            try:
+                connection.request(method, path, body=body, headers=request_headers)
+                raw = connection.getresponse()
+                payload = raw.read()
+            except (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                    ConnectionResetError, BrokenPipeError):
+                connection.close()
+                if attempt == 1:
+                    raise
+                continue
+            self._store_cookies(raw.headers.get_all('Set-Cookie') or [])
+            if raw.will_close:
+                connection.close()
+            else:
+                self._release(connection)
+            return HttpResponse(raw.status, {key.lower(): value for key, value in raw.getheaders()}, payload)
+
+    def get(self, path: str) -> HttpResponse:
+        return self.request('GET', path)
+
+    def post_form(self, path: str, fields: dict, kind: Optional[str] = None) -> HttpResponse:
+        return self.request('POST', path, urlencode(fields).encode('utf-8'), {
+            'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
+            'X-Requested-With': 'XMLHttpRequest',
+        }, kind)
+
+    def post_multipart(self, path: str, fields: dict, files: dict) -> HttpResponse:
+        body, content_type = _encode_multipart(fields, files)
+        return self.request('POST', path, body, {
+            'Content-Type': content_type,
+            'X-Requested-With': 'XMLHttpRequest',
+        })
+
+    def close(self):
+        '''
+        Closes every pooled connection.
+        '''
+        while True:
+            try:
+                self._connections.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class SaitroHttpAutomation:
+    '''
+    Browserless backend offering the SaitroAutomation operations by posting the Saitro
+    forms and AJAX endpoints directly.
+
+    The browser (SaitroAutomation) is only started when the platform answers with a captcha
+    challenge: the operation is then replayed in Chromium, and the cookies it saves are
+    loaded back into the HTTP client for the next operations.
+    '''
+    def __init__(self, base_url: str = BASE_URL, state_path: str = LOGIN_STATE_PATH,
+                 endpoints: Optional[dict] = None, browser_fallback: bool = True,
+                 catalog: Optional[ProductCatalog] = None, governor: Optional[Governor] = None,
+                 ledger: Optional[ActivationLedger] = None):
+        '''
+        Args:
+            base_url (str): Scheme and host of the platform.
+            state_path (str): Storage state file shared with the browser backend.
+            endpoints (dict | None): Overrides of HTTP_ENDPOINTS.
+            browser_fallback (bool): If False, a captcha challenge raises CaptchaChallengeError.
+            catalog (ProductCatalog | None): Cache of the product and APN options, shared with
+                                             the browser backend. Defaults to CATALOG_PATH.
+            governor (Governor | None): Paces the requests and backs off on captcha challenges.
+                                        Shared with the browser fallback.
+            ledger (ActivationLedger | None): If given, the ICCIDs it records as confirmed are
+                                              not uploaded again.
+        '''
+        print('-' * 30)
+        print('Robotic Process Automation - Saitro (HTTP)')
+        # No client-side limits against a local stand-in server (mock_saitro.py)
+        self.governor = governor or Governor('default', None if base_url.rstrip('/') == BASE_URL else UNLIMITED_RATES)
+        self.client = SaitroHttpClient(base_url, state_path, governor=self.governor)
+        self.state_path = state_path
+        self.endpoints = dict(HTTP_ENDPOINTS, **(endpoints or {}))
+        if base_url.rstrip('/') == BASE_URL and not HTTP_ENDPOINTS_VERIFIED and not endpoints:
+            print('Warning: the HTTP endpoints were never checked against the platform (see HTTP_ENDPOINTS).')
+        self.browser_fallback = browser_fallback
+        self.catalog = catalog or ProductCatalog(CATALOG_PATH, scope=base_url.rstrip('/'))
+        self.ledger = ledger
+
+    def _get_credentials(self) -> dict:
+        '''
+        Reads user credentials from the user.json file.
+        '''
+        try:
+            with open(USER_CREDENTIALS_PATH, 'r') as user_file:
+                return json.load(user_file)
+        except FileNotFoundError:
+            print(f'Error: Credential file \'{USER_CREDENTIALS_PATH}\' not found.')
+            raise
+
+    def _check(self, response: HttpResponse) -> HttpResponse:
+        '''
+        Raises on login redirects and captcha challenges.
+        '''
+        location = response.headers.get('location', '')
+        if response.status in REDIRECT_STATUSES and self.endpoints['login_page'] in location:
+            raise SessionExpiredError(location)
+        # JSON answers are checked by _result
+        body = '' if 'json' in response.headers.get('content-type', '') else response.text()
+        reason = detect_challenge(body, response.status)
+        if reason:
+            raise CaptchaChallengeError(f'Challenge received ({reason}, HTTP {response.status})', reason)
+        return response
+
+    def _result(self, action: str, response: HttpResponse, started: float) -> ActionResult:
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = None
+        reason = detect_challenge(json.dumps(payload, ensure_ascii=False)) if isinstance(payload, dict) else None
+        if reason:
+            raise CaptchaChallengeError(f'Challenge received on {action} ({reason})', reason)
+        ok, message = _interpret_action_payload(response.status, payload)
+        return ActionResult(action, ok, response.status, message, (time.monotonic() - started) * 1000)
+
+    def is_session_valid(self) -> bool:
+        '''
+        Checks with a single GET of the activation page whether the cookies hold a session.
+        '''
+        response = self.client.get(self.endpoints['activation_page'])
+        body = response.text()
+        return response.status == 200 and 'name="senha"' not in body and "name='senha'" not in body
+
+    def login(self) -> bool:
+        '''
+        Posts the login form. A captcha challenge falls back to the browser login.
+
+        Returns:
+            bool: True if the platform accepted the credentials.
+        '''
+        print('[1] Posting login form...')
+        credentials = self._get_credentials()
+        started = time.monotonic()
+        try:
+            response = self._check(self.client.post_form(self.endpoints['login'], {
+                'login': credentials['user'], 'senha': credentials['pwd'],
+            }, kind=KIND_LOGIN))
+            result = self._result('login', response, started)
+            if result and self.is_session_valid():
+                print('[] Login succeeded (HTTP).')
+                return True
+            print(f'[] Login failed (HTTP): {result.message}')
+            return False
+        except CaptchaChallengeError as e:
+            self.governor.report_challenge(e.reason)
+            print(f'[] {e}. Falling back to the browser login...')
+            return bool(self._browser_fallback('login'))
+
+    def ensure_logged_in(self) -> bool:
+        '''
+        Reuses the cookies of the saved state, logging in only when the session has expired.
+        '''
+        if self.client.cookies and self.is_session_valid():
+            return True
+        return self.login()
+
+    def _select_options(self, select_name: str) -> dict:
+        '''
+        Returns the label-to-value mapping of a <select> of the activation page, from the
+        catalog when it is fresh (the activation page is only fetched to refresh it).
+        '''
+        options = self.catalog.options(select_name)
+        if not options:
+            page = self._check(self.client.get(self.endpoints['activation_page']))
+            if page.status != 200:
+                raise SessionExpiredError(f'Activation page answered {page.status}')
+            self.catalog.update(_parse_page(page.text()).selects)
+            options = self.catalog.options(select_name)
+        return options
+
+    def _option_value(self, select_name: str, label: str) -> str:
+        options = self._select_options(select_name)
+        if label not in options:
+            raise UnknownOptionError(f'Unknown {select_name} option \'{label}\'')
+        return options[label]
+
+    def _product_value(self, product_label: str) -> str:
+        return self._option_value(PRODUCT_SELECT, product_label)
+
+    def _run(self, action: str, operation, *args) -> ActionResult:
+        '''
+        Runs an HTTP operation, re-authenticating once on session expiry and
+        replaying it in the browser on a captcha challenge.
+
+        The saved cookies are used optimistically: an expired session is detected from the
+        redirect to the login page, so no extra validation request is sent per operation.
+        '''
+        if not self.client.cookies and not self.login():
+            return ActionResult('login', False, message='Login failed')
+        try:
+            try:
+                return operation(*args)
+            except SessionExpiredError:
+                print('[] Session expired. Logging in again...')
+                if not self.login():
+                    return ActionResult('login', False, message='Login failed')
+                return operation(*args)
+        except CaptchaChallengeError as e:
+            self.governor.report_challenge(e.reason)
+            print(f'[] {e}. Falling back to the browser...')
+            return self._browser_fallback(action, *args)
+
+    def _browser_fallback(self, action: str, *args):
+        '''
+        Replays an operation in Chromium, then reloads the cookies it saved.
+        '''
+        if not self.browser_fallback:
+            raise CaptchaChallengeError(f'Captcha challenge on {action} and browser fallback is disabled')
+        # Imported lazily: only a captcha challenge pays for starting Playwright
+        from saitro_automation import SaitroAutomation
+        automation = SaitroAutomation(headless=True, reuse_session=True, base_url=self.client.base_url,
+                                      state_path=self.state_path, governor=self.governor)
+        try:
+            if action == 'login':
+                return automation.login()
+            operations = {
+                'set_cart': lambda file_path, product_label: (
+                    automation._upload_cart_file(file_path, product_label) if isinstance(file_path, str)
+                    else automation._upload_iccids(file_path, product_label)),
+                'clear_cart': lambda product_label: automation._clear_cart(product_label),
+                'confirm_cart': lambda client_info, apn, product_label: automation._confirm_cart(client_info, apn, product_label),
+                'clear_requests': lambda: automation._cancel_request(),
+            }
+            if not automation.ensure_logged_in():
+                return ActionResult('login', False, message='Login failed')
+            return operations[action](*args)
+        finally:
+            automation.close()
+            self.client.load_cookies()
+
+    def _set_cart(self, file_path, product_label: str) -> ActionResult:
+        started = time.monotonic()
+        if isinstance(file_path, str):
+            with open(file_path, 'rb') as csv_file:
+                upload = (os.path.basename(file_path), csv_file.read(), UPLOAD_MIME_TYPE)
+        else:
+            # A list of ICCIDs, encoded in memory
+            upload = (UPLOAD_FILE_NAME, encode_iccid_csv(file_path), UPLOAD_MIME_TYPE)
+        response = self._check(self.client.post_multipart(
+            self.endpoints['upload'],
+            {'id_produto': self._product_value(product_label)},
+            {'arquivo': upload},
+        ))
+        return self._result('set_cart', response, started)
+
+    def _clear_cart(self, product_label: str) -> ActionResult:
+        started = time.monotonic()
+        response = self._check(self.client.post_form(
+            self.endpoints['clear_cart'], {'id_produto': self._product_value(product_label)}))
+        return self._result('clear_cart', response, started)
+
+    def _confirm_cart(self, client_info: str, apn: str, product_label: str) -> ActionResult:
+        started = time.monotonic()
+        response = self._check(self.client.post_form(self.endpoints['confirm'], {
+            'id_produto': self._product_value(product_label),
+            'info_cliente': client_info,
+            'apns': self._option_value(APN_SELECT, apn),
+        }))
+        return self._result('confirm_cart', response, started)
+
+    def _clear_requests(self) -> ActionResult:
+        started = time.monotonic()
+        page = self._check(self.client.get(self.endpoints['request_page']))
+        cancel_links = _parse_page(page.text()).cancel_links
+        if not cancel_links:
+            return ActionResult('clear_requests', False, page.status, 'No outstanding request',
+                                (time.monotonic() - started) * 1000)
+        target = urljoin(self.endpoints['request_page'], cancel_links[0])
+        response = self._check(self.client.post_form(target, {}))
+        return self._result('clear_requests', response, started)
+
+    def set_shopping_cart(self, file_path: IccidSource, product_label: str = DEFAULT_PRODUCT_LABEL,
+                          validate: bool = True) -> ActionResult:
+        '''
+        Uploads a CSV file (field 'arquivo') for a product (field 'id_produto').
+
+        Args:
+            file_path (str | bytes | iterable): Path of the CSV file, or the ICCIDs themselves,
+                                                sent as an in-memory file.
+            validate (bool): If True, malformed, duplicated and (with a ledger) already
+                             confirmed ICCIDs are removed before the upload, like
+                             SaitroAutomation.set_shopping_cart does. A file is read and
+                             sent from memory either way.
+
+        Returns:
+            ActionResult: The outcome reported by the server.
+        '''
+        exclude = self.ledger.is_confirmed if self.ledger else None
+        iccids, _, error = _upload_source(file_path, validate, exclude)
+        if error is not None:
+            return error
+        return self._run('set_cart', self._set_cart, iccids, product_label)
+
+    def clear_shopping_cart(self, product_label: str = DEFAULT_PRODUCT_LABEL) -> ActionResult:
+        '''
+        Clears the shopping cart.
+
+        Returns:
+            ActionResult: The outcome reported by the server.
+        '''
+        return self._run('clear_cart', self._clear_cart, product_label)
+
+    def confirm_shopping_cart(self, client_info: str = DEFAULT_CLIENT_INFO, apn: str = DEFAULT_APN,
+                              product_label: str = DEFAULT_PRODUCT_LABEL) -> ActionResult:
+        '''
+        Processes the shopping cart with the client information ('info_cliente') and APN ('apns').
+
+        Returns:
+            ActionResult: The outcome reported by the server.
+        '''
+        return self._run('confirm_cart', self._confirm_cart, client_info, apn, product_label)
+
+    def clear_requests(self) -> ActionResult:
+        '''
+        Cancels the first outstanding request of the requests listing.
+
+        Returns:
+            ActionResult: The outcome reported by the server.
+        '''
+        return self._run('clear_requests', self._clear_requests)
+
+    def close(self):
+        '''
+        Closes the pooled connections.
+        '''
+        self.client.close()
+        print('Automation finished. HTTP connections closed.')
+        print('-' * 30)
@@ -0,0 +1,267 @@
+# saitro_iccid.py
+import os
+import csv
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, Optional
+
+# --- Constants and Configuration ---
+ICCID_MIN_LENGTH = 19
+ICCID_MAX_LENGTH = 20
+# '89' (telecom) + '55' (Brazil): every ICCID issued for the platform starts with it
+ICCID_PREFIX = '8955'
+# Characters removed while normalizing (separators some spreadsheets add)
+ICCID_SEPARATORS = (' ', '-', '.', '\t', '"', '\'')
+# Suffixes of the files written next to the input by clean_iccid_file() (the uploads never write them)
+CLEAN_SUFFIX = '.clean.csv'
+REJECTS_SUFFIX = '.rejects.csv'
+
+# Reject reasons
+REASON_EMPTY = 'empty'
+REASON_NOT_NUMERIC = 'not_numeric'
+REASON_LENGTH = 'length'
+REASON_PREFIX = 'prefix'
+REASON_LUHN = 'luhn'
+REASON_DUPLICATE = 'duplicate'
+REASON_EXCLUDED = 'excluded'
+
+
+def normalize_iccid(raw: str) -> str:
+    '''
+    Normalizes a raw ICCID: keeps the first CSV column and removes blanks, quotes and separators.
+    '''
+    value = raw.strip().split(',', 1)[0].split(';', 1)[0]
+    for separator in ICCID_SEPARATORS:
+        value = value.replace(separator, '')
+    return value
+
+
+def luhn_valid(digits: str) -> bool:
+    '''
+    Checks the Luhn check digit (the last digit) of a numeric string.
+    '''
+    total = 0
+    for position, digit in enumerate(reversed(digits)):
+        value = ord(digit) - 48
+        if position % 2:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return total % 10 == 0
+
+
+def validate_iccid(iccid: str) -> Optional[str]:
+    '''
+    Validates a normalized ICCID.
+
+    Returns:
+        str | None: The reject reason, or None if the ICCID is valid.
+    '''
+    if not iccid:
+        return REASON_EMPTY
+    if not iccid.isdigit() or not iccid.isascii():
+        return REASON_NOT_NUMERIC
+    if not ICCID_MIN_LENGTH <= len(iccid) <= ICCID_MAX_LENGTH:
+        return REASON_LENGTH
+    if not iccid.startswith(ICCID_PREFIX):
+        return REASON_PREFIX
+    if not luhn_valid(iccid):
+        return REASON_LUHN
+    return None
+
+
+class IccidSet:
+    '''
+    Compact set of valid ICCIDs, used to drop duplicates in multi-million-line files.
+
+    A Python set of strings costs over 100 bytes per ICCID. This open-addressing hash table
+    stores each ICCID as one signed 64-bit integer in an array (16 bytes per ICCID at the
+    maximum load factor). A 20-digit ICCID does not fit in 64 bits, but its check digit is
+    determined by the other digits, so the ICCID without it (at most 19 digits, starting with
+    ICCID_PREFIX) is a unique key. Only ICCIDs accepted by validate_iccid() may be added.
+    '''
+    _EMPTY = 0
+    _MAX_LOAD = 0.5
+    _MULTIPLIER = 0x9E3779B97F4A7C15 # Fibonacci hashing
+
+    def __init__(self, capacity: int = 1 << 16):
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self._slots = array('q', bytes(8 * size))
+        self._mask = size - 1
+        self._shift = 64 - size.bit_length() + 1
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _index(self, key: int) -> int:
+        return ((key * self._MULTIPLIER) & 0xFFFFFFFFFFFFFFFF) >> self._shift
+
+    def _insert(self, key: int) -> bool:
+        slots, mask = self._slots, self._mask
+        index = self._index(key) & mask
+        while True:
+            current = slots[index]
+            if current == self._EMPTY:
+                slots[index] = key
+                return True
+            if current == key:
+                return False
+            index = (index + 1) & mask
+
+    def _grow(self):
+        old_slots = self._slots
+        size = len(old_slots) * 2
+        self._slots = array('q', bytes(8 * size))
+        self._mask = size - 1
+        self._shift = 64 - size.bit_length() + 1
+        for key in old_slots:
+            if key != self._EMPTY:
+                self._insert(key)
+
+    def add(self, iccid: str) -> bool:
+        '''
+        Adds a valid ICCID.
+
+        Returns:
+            bool: True if it was not in the set yet, False if it is a duplicate.
+        '''
+        if self._count + 1 > len(self._slots) * self._MAX_LOAD:
+            self._grow()
+        added = self._insert(int(iccid[:-1]))
+        self._count += added
+        return added
+
+    def __contains__(self, iccid: str) -> bool:
+        key = int(iccid[:-1])
+        slots, mask = self._slots, self._mask
+        index = self._index(key) & mask
+        while True:
+            current = slots[index]
+            if current == self._EMPTY:
+                return False
+            if current == key:
+                return True
+            index = (index + 1) & mask
+
+
+@dataclass
+class IccidCleanReport:
+    '''
+    Outcome of the pre-upload validation of an ICCID file.
+
+    Attributes:
+        clean_path (str): File with the accepted ICCIDs, one per line (ready to upload).
+        rejects_path (str): CSV report of the rejected lines (line, value, reason).
+        total (int): Number of non-blank lines read.
+        accepted (int): Number of ICCIDs written to the clean file.
+        rejected (Counter): Number of rejected lines per reason.
+    '''
+    clean_path: str
+    rejects_path: str
+    total: int = 0
+    accepted: int = 0
+    rejected: Counter = field(default_factory=Counter)
+
+    def __bool__(self) -> bool:
+        return self.accepted > 0
+
+
+def iter_clean_iccids(lines: Iterable[str], exclude: Optional[Callable[[str], bool]] = None,
+                      seen: Optional[IccidSet] = None) -> Iterator[tuple]:
+    '''
+    Normalizes, validates and deduplicates a stream of raw ICCID lines.
+
+    Args:
+        lines (iterable): Raw lines (e.g. an open file).
+        exclude (callable | None): Called with every valid ICCID; returning True rejects it
+                                   (e.g. ICCIDs already activated).
+        seen (IccidSet | None): Set of the ICCIDs already accepted, shared between calls.
+
+    Yields:
+        tuple: (line_number, raw_value, iccid, reason) where reason is None for accepted
+               ICCIDs. Blank lines are skipped.
+    '''
+    seen = seen if seen is not None else IccidSet()
+    for line_number, line in enumerate(lines, start=1):
+        raw = line.strip()
+        if not raw:
+            continue
+        iccid = normalize_iccid(raw)
+        reason = validate_iccid(iccid)
+        if reason is None and exclude is not None and exclude(iccid):
+            reason = REASON_EXCLUDED
+        if reason is None and not seen.add(iccid):
+            reason = REASON_DUPLICATE
+        yield line_number, raw, iccid, reason
+
+
+def clean_iccid_file(file_path: str, clean_path: Optional[str] = None, rejects_path: Optional[str] = None,
+                     exclude: Optional[Callable[[str], bool]] = None) -> IccidCleanReport:
+    '''
+    Streams an ICCID file (like dummy.csv) and writes the upload-ready file and a reject report.
+
+    The uploads do not use it: they validate their source in memory (clean_iccids, or
+    iter_clean_iccids while a large file is streamed). It is kept to audit an input file,
+    since the reject report is the only place the rejected lines are listed.
+
+    Memory stays bounded by the deduplication set (16 bytes per ICCID), whatever the file size.
+
+    Args:
+        file_path (str): Path to the raw ICCID file.
+        clean_path (str | None): Output file of the accepted ICCIDs. Defaults to the input
+                                 path with CLEAN_SUFFIX.
+        rejects_path (str | None): Output CSV of the rejected lines. Defaults to the input
+                                   path with REJECTS_SUFFIX.
+        exclude (callable | None): Called with every valid ICCID; returning True rejects it.
+
+    Returns:
+        IccidCleanReport: The counts and the paths of the written files.
+    '''
+    base_path = os.path.splitext(file_path)[0]
+    report = IccidCleanReport(clean_path or base_path + CLEAN_SUFFIX, rejects_path or base_path + REJECTS_SUFFIX)
+    with open(file_path, 'r', encoding='utf-8-sig', errors='replace') as iccid_file, \
+            open(report.clean_path, 'w', encoding='utf-8') as clean_file, \
+            open(report.rejects_path, 'w', encoding='utf-8', newline='') as rejects_file:
+        rejects_writer = csv.writer(rejects_file)
+        rejects_writer.writerow(['line', 'value', 'reason'])
+        for line_number, raw, iccid, reason in iter_clean_iccids(iccid_file, exclude):
+            report.total += 1
+            if reason is None:
+                clean_file.write(iccid + '\n')
+                report.accepted += 1
+            else:
+                rejects_writer.writerow([line_number, raw, reason])
+                report.rejected[reason] += 1
+    print(f'[] ICCID validation: {report.accepted}/{report.total} accepted, '
+          f'{sum(report.rejected.values())} rejected {dict(report.rejected)}.')
+    return report
+
+
+def clean_iccids(lines: Iterable[str], exclude: Optional[Callable[[str], bool]] = None) -> list:
+    '''
+    In-memory counterpart of clean_iccid_file, used by every upload (a file, a database
+    cursor, a message queue...). Nothing is written to disk: the rejected values are only
+    counted.
+
+    Args:
+        lines (iterable): Raw ICCIDs, one per item.
+        exclude (callable | None): Called with every valid ICCID; returning True rejects it.
+
+    Returns:
+        list: The accepted ICCIDs, in order.
+    '''
+    accepted = []
+    rejected = Counter()
+    for _, _, iccid, reason in iter_clean_iccids(lines, exclude):
+        if reason is None:
+            accepted.append(iccid)
+        else:
+            rejected[reason] += 1
+    print(f'[] ICCID validation: {len(accepted)}/{len(accepted) + sum(rejected.values())} accepted, '
+          f'{sum(rejected.values())} rejected {dict(rejected)}.')
+    return accepted
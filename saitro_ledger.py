@@ -0,0 +1,222 @@
+# saitro_ledger.py
+import time
+import sqlite3
+import threading
+from typing import Iterable, Optional
+
+# --- Constants and Configuration ---
+LEDGER_PATH = 'saitro_ledger.sqlite3'
+
+# ICCID statuses
+STATUS_UPLOADED = 'uploaded'   # Sent to the shopping cart, not confirmed yet
+STATUS_CONFIRMED = 'confirmed' # Cart confirmed (activation requested)
+STATUS_CLEARED = 'cleared'     # Removed from the cart before being confirmed
+STATUS_CANCELLED = 'cancelled' # Activation request cancelled
+
+# Batch statuses
+BATCH_STARTED = 'started'
+BATCH_CONFIRMED = 'confirmed'
+BATCH_FAILED = 'failed'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS iccids (
+    iccid TEXT PRIMARY KEY,
+    lot TEXT,
+    batch INTEGER,
+    status TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    cart TEXT,
+    request_status TEXT
+);
+CREATE INDEX IF NOT EXISTS iccids_batch ON iccids (lot, batch);
+CREATE INDEX IF NOT EXISTS iccids_status ON iccids (status);
+CREATE INDEX IF NOT EXISTS iccids_cart ON iccids (cart, status);
+CREATE TABLE IF NOT EXISTS batches (
+    lot TEXT NOT NULL,
+    batch_size INTEGER NOT NULL,
+    batch INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    iccid_count INTEGER NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (lot, batch_size, batch)
+);
+'''
+
+
+class ActivationLedger:
+    '''
+    Embedded SQLite record of what happened to every ICCID and batch, so an interrupted
+    activation can be resumed without re-uploading what was already confirmed.
+
+    The shopping cart is modelled as the ICCIDs in STATUS_UPLOADED: confirming the cart marks
+    them STATUS_CONFIRMED and clearing it marks them STATUS_CLEARED. A lot is the input file an
+    activation comes from; its batches are identified by their index for a given batch size.
+    Every login session has its own cart, identified by the key given by SaitroBase.cart
+    (the account login, plus the session name when an account runs several sessions).
+    Once confirmed, the status of the activation request of an ICCID, as shown on the
+    requests page, is kept in `request_status`. The ledger can be shared between threads.
+    '''
+    def __init__(self, path: str = LEDGER_PATH):
+        '''
+        Args:
+            path (str): SQLite database file. Created if it does not exist.
+        '''
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        columns = {row[1] for row in self._connection.execute('PRAGMA table_info(iccids)')}
+        if columns and 'cart' not in columns:
+            # Ledger written before the multi-account support
+            self._connection.execute('ALTER TABLE iccids ADD COLUMN cart TEXT')
+        if columns and 'request_status' not in columns:
+            # Ledger written before the activation tracker
+            self._connection.execute('ALTER TABLE iccids ADD COLUMN request_status TEXT')
+        self._connection.executescript(SCHEMA)
+
+    def _write(self, statement: str, rows: Iterable[tuple]) -> int:
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute('BEGIN')
+            try:
+                cursor.executemany(statement, rows)
+                count = cursor.rowcount
+                cursor.execute('COMMIT')
+            except BaseException:
+                cursor.execute('ROLLBACK')
+                raise
+            return count
+
+    def record_uploaded(self, iccids: Iterable[str], lot: Optional[str] = None, batch: Optional[int] = None,
+                        cart: Optional[str] = None) -> int:
+        '''
+        Records ICCIDs sent to the shopping cart of an account.
+
+        Returns:
+            int: Number of ICCIDs recorded.
+        '''
+        now = time.time()
+        count = 0
+        def rows():
+            nonlocal count
+            for iccid in iccids:
+                count += 1
+                yield iccid, lot, batch, STATUS_UPLOADED, now, cart
+        self._write('''INSERT INTO iccids (iccid, lot, batch, status, updated_at, cart) VALUES (?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (iccid) DO UPDATE SET lot = excluded.lot, batch = excluded.batch,
+                       status = excluded.status, updated_at = excluded.updated_at, cart = excluded.cart''', rows())
+        return count
+
+    def mark_cart(self, status: str, cart: Optional[str] = None) -> int:
+        '''
+        Moves every ICCID currently in the cart of an account (STATUS_UPLOADED) to a new
+        status, STATUS_CONFIRMED after a confirmation or STATUS_CLEARED after a clean-up.
+
+        Returns:
+            int: Number of ICCIDs updated.
+        '''
+        with self._lock:
+            cursor = self._connection.execute('UPDATE iccids SET status = ?, updated_at = ? WHERE status = ? AND cart IS ?',
+                                              (status, time.time(), STATUS_UPLOADED, cart))
+            return cursor.rowcount
+
+    def record_cancelled(self, iccid: str):
+        '''
+        Records the cancellation of the activation request of an ICCID.
+        '''
+        self._write('''INSERT INTO iccids (iccid, status, updated_at) VALUES (?, ?, ?)
+                       ON CONFLICT (iccid) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at''',
+                    [(iccid, STATUS_CANCELLED, time.time())])
+
+    def set_batch(self, lot: str, batch_size: int, batch: int, status: str, iccid_count: int = 0, message: str = ''):
+        '''
+        Records the status of a batch of a lot.
+        '''
+        self._write('''INSERT INTO batches (lot, batch_size, batch, status, iccid_count, message, updated_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (lot, batch_size, batch) DO UPDATE SET status = excluded.status,
+                       iccid_count = excluded.iccid_count, message = excluded.message,
+                       updated_at = excluded.updated_at''',
+                    [(lot, batch_size, batch, status, iccid_count, message, time.time())])
+
+    def batch_statuses(self, lot: str, batch_size: int) -> dict:
+        '''
+        Returns:
+            dict: Index of every batch recorded for the lot and batch size mapped to its status.
+        '''
+        with self._lock:
+            rows = self._connection.execute('SELECT batch, status FROM batches WHERE lot = ? AND batch_size = ?',
+                                            (lot, batch_size)).fetchall()
+        return dict(rows)
+
+    def status(self, iccid: str) -> Optional[str]:
+        '''
+        Returns:
+            str | None: The last recorded status of an ICCID, None if it was never seen.
+        '''
+        with self._lock:
+            row = self._connection.execute('SELECT status FROM iccids WHERE iccid = ?', (iccid,)).fetchone()
+        return row[0] if row else None
+
+    def is_confirmed(self, iccid: str) -> bool:
+        '''
+        Tells whether an ICCID was already confirmed (usable as the `exclude` filter of
+        saitro_iccid.clean_iccids).
+        '''
+        return self.status(iccid) == STATUS_CONFIRMED
+
+    def confirmed_iccids(self, lot: Optional[str] = None) -> dict:
+        '''
+        Returns:
+            dict: Every confirmed ICCID (of a lot, or of every lot) mapped to its
+                  (lot, batch, request_status).
+        '''
+        query = 'SELECT iccid, lot, batch, request_status FROM iccids WHERE status = ?'
+        parameters = (STATUS_CONFIRMED,)
+        if lot is not None:
+            query += ' AND lot = ?'
+            parameters += (lot,)
+        with self._lock:
+            rows = self._connection.execute(query, parameters).fetchall()
+        return {iccid: (row_lot, batch, request_status) for iccid, row_lot, batch, request_status in rows}
+
+    def set_request_statuses(self, statuses: Iterable[tuple]) -> int:
+        '''
+        Records the status of the activation request of ICCIDs, as shown on the requests page.
+
+        Args:
+            statuses (iterable): (iccid, request_status) tuples.
+
+        Returns:
+            int: Number of ICCIDs updated (ICCIDs unknown to the ledger are ignored).
+        '''
+        now = time.time()
+        return self._write('UPDATE iccids SET request_status = ?, updated_at = ? WHERE iccid = ?',
+                           ((request_status, now, iccid) for iccid, request_status in statuses))
+
+    def pending_in_cart(self, cart: Optional[str] = None) -> int:
+        '''
+        Returns:
+            int: Number of ICCIDs uploaded to the cart of an account but neither confirmed
+                 nor cleared (e.g. after a crash).
+        '''
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM iccids WHERE status = ? AND cart IS ?',
+                                            (STATUS_UPLOADED, cart)).fetchone()[0]
+
+    def summary(self) -> dict:
+        '''
+        Returns:
+            dict: Number of ICCIDs per status.
+        '''
+        with self._lock:
+            return dict(self._connection.execute('SELECT status, COUNT(*) FROM iccids GROUP BY status').fetchall())
+
+    def close(self):
+        '''
+        Closes the database connection.
+        '''
+        with self._lock:
+            self._connection.close()
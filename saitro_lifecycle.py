@@ -0,0 +1,209 @@
+# saitro_lifecycle.py
+import threading
+from typing import Optional
+
+# --- Constants and Configuration ---
+# Jobs (batches, daemon or pool jobs) after which the page, or the whole context, is
+# replaced (0: never)
+PAGE_MAX_JOBS = 25
+CONTEXT_MAX_JOBS = 100
+# JS heap used by the page, in MB, above which the context is replaced (0: never measured)
+MEMORY_WATERMARK_MB = 384.0
+# DOM nodes alive in the renderer above which the page is replaced: the modals and the
+# bootstrap-select menus of the activation page pile up nodes that are never collected
+DOM_NODES_WATERMARK = 150_000
+
+# Scopes of a recycle
+SCOPE_PAGE = 'page'
+SCOPE_CONTEXT = 'context'
+
+# Reasons of a recycle
+REASON_PAGE_JOBS = 'page_jobs'
+REASON_CONTEXT_JOBS = 'context_jobs'
+REASON_MEMORY = 'memory'
+REASON_DOM_NODES = 'dom_nodes'
+
+
+def page_memory(context, page) -> dict:
+    '''
+    Reads the memory counters of a page through the Chrome DevTools Protocol
+    (Performance.getMetrics).
+
+    Returns:
+        dict: 'js_heap_mb', 'js_heap_total_mb', 'dom_nodes', 'documents' and 'listeners'.
+              Empty if the browser is not Chromium or the page is closed.
+    '''
+    if page.is_closed():
+        return {}
+    try:
+        session = context.new_cdp_session(page)
+    except Exception:
+        return {}
+    try:
+        session.send('Performance.enable')
+        metrics = {metric['name']: metric['value'] for metric in session.send('Performance.getMetrics')['metrics']}
+    except Exception:
+        return {}
+    finally:
+        try:
+            session.detach()
+        except Exception:
+            pass
+    return {
+        'js_heap_mb': metrics.get('JSHeapUsedSize', 0) / 2 ** 20,
+        'js_heap_total_mb': metrics.get('JSHeapTotalSize', 0) / 2 ** 20,
+        'dom_nodes': int(metrics.get('Nodes', 0)),
+        'documents': int(metrics.get('Documents', 0)),
+        'listeners': int(metrics.get('JSEventListeners', 0)),
+    }
+
+
+class ContextLifecycle:
+    '''
+    Decides when the page or the browser context of an automation must be replaced during
+    a long run, and keeps the counters of the current context for monitoring.
+
+    Chromium keeps growing while the same page runs batch after batch (modals, select menus,
+    retained JS heap). After every job, the automation reports the memory of its page: the
+    page is replaced after PAGE_MAX_JOBS jobs or when its DOM crosses DOM_NODES_WATERMARK,
+    and the whole context after CONTEXT_MAX_JOBS jobs or when the JS heap crosses
+    MEMORY_WATERMARK_MB. A new context is created from the storage state of the old one, so
+    no login is needed.
+
+    Keep one lifecycle per automation (it follows a single context); it may outlive the
+    automation, e.g. across the browser restarts of the daemon.
+    '''
+    def __init__(self, name: str = 'default', page_max_jobs: int = PAGE_MAX_JOBS,
+                 context_max_jobs: int = CONTEXT_MAX_JOBS, memory_watermark_mb: float = MEMORY_WATERMARK_MB,
+                 dom_nodes_watermark: int = DOM_NODES_WATERMARK):
+        '''
+        Args:
+            name (str): Name of the owner (account, worker), used as the metrics label.
+            page_max_jobs (int): Jobs after which the page is replaced (0: never).
+            context_max_jobs (int): Jobs after which the context is replaced (0: never).
+            memory_watermark_mb (float): JS heap (MB) above which the context is replaced (0: never).
+            dom_nodes_watermark (int): DOM nodes above which the page is replaced (0: never).
+        '''
+        self.name = name
+        self.page_max_jobs = page_max_jobs
+        self.context_max_jobs = context_max_jobs
+        self.memory_watermark_mb = memory_watermark_mb
+        self.dom_nodes_watermark = dom_nodes_watermark
+        self.contexts = 0 # Contexts opened (the current one included)
+        self.pages = 0 # Pages opened (the current one included)
+        self.context_jobs = 0 # Jobs run by the current context
+        self.page_jobs = 0 # Jobs run by the current page
+        self.jobs = 0 # Jobs run by every context
+        self.memory = {} # Last memory reading (kept after a recycle, to show what triggered it)
+        self.peak_js_heap_mb = 0.0
+        self.recycles = {}
+        self._lock = threading.Lock()
+
+    @property
+    def measures_memory(self) -> bool:
+        return bool(self.memory_watermark_mb or self.dom_nodes_watermark)
+
+    def context_opened(self):
+        '''
+        Resets the counters of the current context (and of its page).
+        '''
+        with self._lock:
+            self.contexts += 1
+            self.pages += 1
+            self.context_jobs = self.page_jobs = 0
+
+    def page_opened(self):
+        '''
+        Resets the counters of the current page.
+        '''
+        with self._lock:
+            self.pages += 1
+            self.page_jobs = 0
+
+    def job_done(self, memory: Optional[dict] = None) -> Optional[tuple]:
+        '''
+        Counts a finished job and tells what must be replaced before the next one.
+
+        Args:
+            memory (dict | None): Memory of the page after the job (see page_memory).
+
+        Returns:
+            tuple | None: (SCOPE_PAGE or SCOPE_CONTEXT, reason), None if nothing must be replaced.
+        '''
+        with self._lock:
+            self.jobs += 1
+            self.context_jobs += 1
+            self.page_jobs += 1
+            if memory:
+                self.memory = memory
+                self.peak_js_heap_mb = max(self.peak_js_heap_mb, memory['js_heap_mb'])
+            # The context first: replacing it replaces the page too
+            if self.memory_watermark_mb and memory and memory['js_heap_mb'] > self.memory_watermark_mb:
+                decision = (SCOPE_CONTEXT, REASON_MEMORY)
+            elif self.context_max_jobs and self.context_jobs >= self.context_max_jobs:
+                decision = (SCOPE_CONTEXT, REASON_CONTEXT_JOBS)
+            elif self.dom_nodes_watermark and memory and memory['dom_nodes'] > self.dom_nodes_watermark:
+                decision = (SCOPE_PAGE, REASON_DOM_NODES)
+            elif self.page_max_jobs and self.page_jobs >= self.page_max_jobs:
+                decision = (SCOPE_PAGE, REASON_PAGE_JOBS)
+            else:
+                return None
+            self.recycles[decision[1]] = self.recycles.get(decision[1], 0) + 1
+            return decision
+
+    def stats(self) -> dict:
+        '''
+        Returns:
+            dict: Contexts and pages opened, jobs of the current context and page and in
+                  total, last memory reading, peak JS heap and recycles per reason.
+        '''
+        with self._lock:
+            return {
+                'name': self.name,
+                'contexts': self.contexts,
+                'pages': self.pages,
+                'context_jobs': self.context_jobs,
+                'page_jobs': self.page_jobs,
+                'jobs': self.jobs,
+                'memory': dict(self.memory),
+                'peak_js_heap_mb': self.peak_js_heap_mb,
+                'recycles': dict(self.recycles),
+            }
+
+    def prometheus_text(self) -> str:
+        '''
+        Exports the counters of the current context in the Prometheus text format
+        (usable as a StepRecorder collector).
+        '''
+        return lifecycles_prometheus_text([self])
+
+
+def lifecycles_prometheus_text(lifecycles: list, prefix: str = 'saitro') -> str:
+    '''
+    Exports the counters of several lifecycles (e.g. one per worker) in the Prometheus text
+    format, every metric family grouped once.
+    '''
+    stats = [lifecycle.stats() for lifecycle in lifecycles]
+    families = (
+        ('contexts_total', 'counter', 'Browser contexts opened.',
+         lambda stat: [('', stat['contexts'])]),
+        ('jobs', 'gauge', 'Jobs run by the current context and by its current page.',
+         lambda stat: [(',scope="context"', stat['context_jobs']), (',scope="page"', stat['page_jobs'])]),
+        ('jobs_total', 'counter', 'Jobs run by every context.',
+         lambda stat: [('', stat['jobs'])]),
+        ('js_heap_bytes', 'gauge', 'JS heap used by the page at the last job.',
+         lambda stat: [('', int(stat['memory'].get('js_heap_mb', 0) * 2 ** 20))]),
+        ('dom_nodes', 'gauge', 'DOM nodes alive in the page at the last job.',
+         lambda stat: [('', stat['memory'].get('dom_nodes', 0))]),
+        ('recycles_total', 'counter', 'Pages or contexts replaced, by reason.',
+         lambda stat: [(f',reason="{reason}"', count) for reason, count in stat['recycles'].items()]),
+    )
+    lines = []
+    for name, metric_type, help_text, samples in families:
+        lines.append(f'# HELP {prefix}_context_{name} {help_text}')
+        lines.append(f'# TYPE {prefix}_context_{name} {metric_type}')
+        for stat in stats:
+            owner = stat['name'].replace('\\', '\\\\').replace('"', '\\"')
+            for labels, value in samples(stat):
+                lines.append(f'{prefix}_context_{name}{{owner="{owner}"{labels}}} {value}')
+    return '\n'.join(lines) + '\n'
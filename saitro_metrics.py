@@ -0,0 +1,145 @@
+# saitro_metrics.py
+import os
+import json
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# --- Constants and Configuration ---
+# Default JSONL file where every step span is appended
+METRICS_JSONL_PATH = 'saitro_spans.jsonl'
+# Upper bounds (in seconds) of the step duration histogram buckets
+HISTOGRAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRIC_PREFIX = 'saitro'
+
+
+def _outcome_of(error: BaseException) -> str:
+    '''
+    Classifies an exception raised inside a span ('timeout' for Playwright/socket timeouts).
+    '''
+    return 'timeout' if 'Timeout' in type(error).__name__ else 'error'
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class StepRecorder:
+    '''
+    Records every automation step as a timed span (step, selector, URL, duration, outcome).
+
+    Spans are streamed to a JSONL file as they finish and aggregated in memory as counters
+    and histograms that can be exported in the Prometheus text format. A recorder can be
+    shared by several automation instances (and threads); callables appended to `listeners`
+    are invoked with every finished span, and the text returned by the callables appended to
+    `collectors` is added to the Prometheus export (e.g. the state of a rate governor).
+    '''
+    def __init__(self, jsonl_path: Optional[str] = None, buckets: tuple = HISTOGRAM_BUCKETS):
+        '''
+        Args:
+            jsonl_path (str | None): File where spans are appended, one JSON object per line.
+                                     None keeps the metrics in memory only.
+            buckets (tuple): Upper bounds, in seconds, of the duration histogram buckets.
+        '''
+        self.run_id = uuid.uuid4().hex[:12]
+        self.jsonl_path = jsonl_path
+        self.buckets = tuple(sorted(buckets))
+        self.counts = {}
+        self.histograms = {}
+        self.listeners = []
+        self.collectors = []
+        self._lock = threading.Lock()
+        self._jsonl_file = open(jsonl_path, 'a', encoding='utf-8') if jsonl_path else None
+
+    @contextmanager
+    def span(self, step: str, selector: Optional[str] = None, url: Optional[str] = None) -> Iterator[dict]:
+        '''
+        Times the enclosed block as one step.
+
+        The yielded dict is the span being recorded: set span['outcome'] (e.g. to 'failed')
+        when the block finishes normally but the step did not succeed. Exceptions are
+        recorded as 'timeout' or 'error' and re-raised.
+
+        Args:
+            step (str): Name of the step (e.g. 'login.submit').
+            selector (str | None): Selector the step waits for or acts on.
+            url (str | None): URL the step navigates to or works on.
+        '''
+        span = {'run_id': self.run_id, 'step': step, 'selector': selector, 'url': url, 'outcome': 'ok'}
+        started = time.monotonic()
+        try:
+            yield span
+        except BaseException as e:
+            span['outcome'] = _outcome_of(e)
+            span['error'] = str(e).splitlines()[0] if str(e) else type(e).__name__
+            raise
+        finally:
+            span['duration_ms'] = round((time.monotonic() - started) * 1000, 3)
+            span['ts'] = time.time()
+            self.record(span)
+
+    def record(self, span: dict):
+        '''
+        Aggregates a finished span and appends it to the JSONL file.
+        '''
+        duration = span['duration_ms'] / 1000
+        with self._lock:
+            key = (span['step'], span['outcome'])
+            self.counts[key] = self.counts.get(key, 0) + 1
+            histogram = self.histograms.setdefault(span['step'], {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+            for index, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    histogram['buckets'][index] += 1
+            histogram['sum'] += duration
+            histogram['count'] += 1
+            if self._jsonl_file:
+                self._jsonl_file.write(json.dumps(span, ensure_ascii=False) + '\n')
+                self._jsonl_file.flush()
+        for listener in self.listeners:
+            listener(span)
+
+    def prometheus_text(self) -> str:
+        '''
+        Exports the aggregated spans in the Prometheus text exposition format.
+
+        Returns:
+            str: A step counter (by outcome) and a step duration histogram.
+        '''
+        lines = [
+            f'# HELP {METRIC_PREFIX}_step_total Automation steps executed, by outcome.',
+            f'# TYPE {METRIC_PREFIX}_step_total counter',
+        ]
+        with self._lock:
+            for (step, outcome), count in sorted(self.counts.items()):
+                lines.append(f'{METRIC_PREFIX}_step_total{{step="{_escape_label(step)}",outcome="{outcome}"}} {count}')
+            lines.append(f'# HELP {METRIC_PREFIX}_step_duration_seconds Duration of the automation steps.')
+            lines.append(f'# TYPE {METRIC_PREFIX}_step_duration_seconds histogram')
+            for step, histogram in sorted(self.histograms.items()):
+                label = _escape_label(step)
+                for bound, count in zip(self.buckets, histogram['buckets']):
+                    lines.append(f'{METRIC_PREFIX}_step_duration_seconds_bucket{{step="{label}",le="{bound}"}} {count}')
+                lines.append(f'{METRIC_PREFIX}_step_duration_seconds_bucket{{step="{label}",le="+Inf"}} {histogram["count"]}')
+                lines.append(f'{METRIC_PREFIX}_step_duration_seconds_sum{{step="{label}"}} {histogram["sum"]:.6f}')
+                lines.append(f'{METRIC_PREFIX}_step_duration_seconds_count{{step="{label}"}} {histogram["count"]}')
+        return '\n'.join(lines) + '\n' + ''.join(collector() for collector in self.collectors)
+
+    def write_prometheus(self, path: str):
+        '''
+        Writes the Prometheus text export to a file (e.g. for the node_exporter textfile collector).
+        '''
+        temporary_path = path + '.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as metrics_file:
+            metrics_file.write(self.prometheus_text())
+        # Atomic replace, so a scraper never reads a half-written file
+        os.replace(temporary_path, path)
+
+    def close(self):
+        '''
+        Closes the JSONL file.
+        '''
+        with self._lock:
+            if self._jsonl_file:
+                self._jsonl_file.close()
+                self._jsonl_file = None
@@ -0,0 +1,166 @@
+# saitro_network.py
+from __future__ import annotations
+
+import os
+import re
+import json
+from collections import Counter
+from typing import TYPE_CHECKING, Iterable, Optional
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    from playwright.sync_api import BrowserContext, Request, Response, Route
+
+# --- Constants and Configuration ---
+# Resource types never needed by the automation
+BLOCKED_RESOURCE_TYPES = ('image', 'font', 'media')
+# URLs always blocked: trackers and theme assets the forms do not need
+BLOCKED_URL_PATTERNS = (
+    r'google-analytics\.com',
+    r'googletagmanager\.com',
+    r'doubleclick\.net',
+    r'facebook\.(net|com)',
+    r'hotjar\.com',
+    r'bootstrap-select[^/]*\.css',
+)
+# Always allowed, whatever the rules above say: the reCAPTCHA used by the login form and
+# the JS the forms depend on, even when served from a CDN (the tooltip plugin sets the
+# data-original-title attributes our selectors use, and bootstrap-select renders the APN
+# dropdown). Scripts of the platform itself are never third-party, so they are kept too.
+ALLOWED_URL_PATTERNS = (
+    r'google\.com/recaptcha',
+    r'gstatic\.com/recaptcha',
+    r'jquery[^/]*\.js',
+    r'bootstrap[^/]*\.js',
+    r'tooltip[^/]*\.js',
+)
+FIRST_PARTY_DOMAIN = 'saitro.com'
+# Sizes of the resources seen while they were allowed, used to estimate the bytes saved
+RESOURCE_SIZES_PATH = 'resource_sizes.json'
+
+
+class ResourceBlocker:
+    '''
+    Blocks the requests the automation does not need (images, fonts, analytics...)
+    on a BrowserContext, and reports how many requests and bytes were saved.
+
+    Every third-party host is logged the first time one of its requests is blocked, so a CDN
+    asset the page turns out to need shows up in the output instead of failing silently.
+
+    Bytes saved are an estimate: a blocked resource is never downloaded, so its size is taken
+    from RESOURCE_SIZES_PATH, which is filled whenever that resource is seen while allowed
+    (e.g. a run with enabled=False).
+    '''
+    def __init__(self, blocked_types: Iterable[str] = BLOCKED_RESOURCE_TYPES,
+                 blocked_patterns: Iterable[str] = BLOCKED_URL_PATTERNS,
+                 allowed_patterns: Iterable[str] = ALLOWED_URL_PATTERNS,
+                 block_third_party: bool = False, block_stylesheets: bool = False,
+                 enabled: bool = True, sizes_path: Optional[str] = RESOURCE_SIZES_PATH,
+                 first_party_domains: Iterable[str] = (FIRST_PARTY_DOMAIN,)):
+        '''
+        Args:
+            blocked_types (iterable): Playwright resource types to block.
+            blocked_patterns (iterable): Regular expressions of URLs to block.
+            allowed_patterns (iterable): Regular expressions of URLs never blocked.
+            block_third_party (bool): If True, every request outside FIRST_PARTY_DOMAIN that is
+                                      not allow-listed is blocked. Off by default: the theme
+                                      may load assets it needs from CDNs that are not listed
+                                      in ALLOWED_URL_PATTERNS.
+            block_stylesheets (bool): If True, stylesheets are blocked too. Off by default,
+                                      since visibility checks depend on the theme CSS.
+            enabled (bool): If False, nothing is blocked but sizes are still recorded.
+            sizes_path (str | None): File where resource sizes are cached between runs.
+            first_party_domains (iterable): Hosts (and their subdomains) that are not third-party,
+                                            e.g. '127.0.0.1' for a local stand-in server.
+        '''
+        self.blocked_types = set(blocked_types)
+        if block_stylesheets:
+            self.blocked_types.add('stylesheet')
+        self.blocked_patterns = [re.compile(pattern) for pattern in blocked_patterns]
+        self.allowed_patterns = [re.compile(pattern) for pattern in allowed_patterns]
+        self.block_third_party = block_third_party
+        self.enabled = enabled
+        self.first_party_domains = tuple(first_party_domains)
+        self.sizes_path = sizes_path
+        self.known_sizes = self._load_sizes()
+        self.blocked = Counter()
+        self.blocked_hosts = Counter() # Third-party hosts only
+        self.allowed = Counter()
+        self.bytes_saved = 0
+        self.bytes_received = 0
+
+    def _load_sizes(self) -> dict:
+        if self.sizes_path and os.path.exists(self.sizes_path):
+            with open(self.sizes_path, 'r', encoding='utf-8') as sizes_file:
+                return json.load(sizes_file)
+        return {}
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        '''
+        Tells whether a request must be blocked.
+
+        Args:
+            url (str): URL of the request.
+            resource_type (str): Playwright resource type ('image', 'script', 'document'...).
+        '''
+        if not self.enabled or resource_type == 'document':
+            return False
+        if any(pattern.search(url) for pattern in self.allowed_patterns):
+            return False
+        if resource_type in self.blocked_types:
+            return True
+        if any(pattern.search(url) for pattern in self.blocked_patterns):
+            return True
+        return self.block_third_party and not self._is_first_party(url) and url.startswith('http')
+
+    def _is_first_party(self, url: str) -> bool:
+        host = urlsplit(url).hostname or ''
+        return any(host == domain or host.endswith('.' + domain) for domain in self.first_party_domains)
+
+    def _handle_route(self, route: Route, request: Request):
+        if self.should_block(request.url, request.resource_type):
+            self.blocked[request.resource_type] += 1
+            if request.url.startswith('http') and not self._is_first_party(request.url):
+                host = urlsplit(request.url).hostname
+                if not self.blocked_hosts[host]:
+                    print(f'[] Blocking requests to the third-party host \'{host}\' (first: {request.resource_type} {request.url})')
+                self.blocked_hosts[host] += 1
+            self.bytes_saved += self.known_sizes.get(request.url, 0)
+            route.abort('blockedbyclient')
+        else:
+            route.fallback()
+
+    def _on_response(self, response: Response):
+        self.allowed[response.request.resource_type] += 1
+        size = response.headers.get('content-length')
+        if size and size.isdigit():
+            self.bytes_received += int(size)
+            self.known_sizes[response.url] = int(size)
+
+    def attach(self, context: BrowserContext):
+        '''
+        Installs the blocking rules on every page of a context.
+        '''
+        context.route('**/*', self._handle_route)
+        context.on('response', self._on_response)
+
+    def report(self) -> dict:
+        '''
+        Returns the requests blocked (per resource type) and the bytes saved and received.
+        '''
+        return {
+            'blocked_requests': sum(self.blocked.values()),
+            'blocked_by_type': dict(self.blocked),
+            'blocked_hosts': dict(self.blocked_hosts),
+            'allowed_requests': sum(self.allowed.values()),
+            'bytes_saved': self.bytes_saved,
+            'bytes_received': self.bytes_received,
+        }
+
+    def save_sizes(self):
+        '''
+        Persists the resource sizes learned during this run.
+        '''
+        if self.sizes_path:
+            with open(self.sizes_path, 'w', encoding='utf-8') as sizes_file:
+                json.dump(self.known_sizes, sizes_file)
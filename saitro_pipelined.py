@@ -0,0 +1,260 @@
+# saitro_pipelined.py
+import os
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from saitro_automation import (
+    ActionResult, BulkUploadReport, IccidSource, iter_iccid_batches, upload_payload, _stream_source,
+    BASE_URL, LOGIN_STATE_PATH, DEFAULT_PRODUCT_LABEL, DEFAULT_CLIENT_INFO, DEFAULT_APN, DEFAULT_BATCH_SIZE,
+)
+from saitro_async import AsyncSaitroAutomation
+from saitro_ledger import ActivationLedger, BATCH_STARTED, BATCH_CONFIRMED, BATCH_FAILED, STATUS_CONFIRMED, STATUS_CLEARED
+from saitro_governor import Governor
+from saitro_catalog import ProductCatalog, UnknownOptionError, CATALOG_PATH, PRODUCT_SELECT, APN_SELECT
+from saitro_metrics import StepRecorder
+from saitro_timeouts import TimeoutPolicy, CircuitBreaker
+
+# --- Constants and Configuration ---
+# Batches read and encoded ahead of the upload page
+DEFAULT_PREFETCH = 2
+# Uploaded batches waiting for the confirmation page. The cart holds one batch at a time, so
+# a larger queue would only keep the upload page waiting on the cart lock instead of here.
+UPLOADED_QUEUE_SIZE = 1
+
+
+class PipelinedBulkUpload:
+    '''
+    Bulk upload that overlaps consecutive batches instead of running them one after the other.
+
+    Three stages, linked by bounded queues, run in one event loop:
+    - the reader cuts the file in batches and encodes each one as an in-memory file,
+    - the upload page (re)opens the activation page and the upload modal, then submits the batch,
+    - the confirmation page reloads the activation page, processes the cart, fills the client
+      information and the APN and confirms it.
+    Both pages share one authenticated context. The platform keeps a single cart per session,
+    so the upload of a batch is only submitted once the cart of the previous batch has been
+    confirmed (or cleared): that is the cart lock. Everything before the submit runs while the
+    previous batch is being confirmed. When the confirmation falls behind, the full queues
+    hold the reader and the upload page back.
+
+    The pages are AsyncSaitroAutomation instances: their steps are recorded, use the learned
+    timeouts and the circuit breaker, and a session expiring mid-run is renewed once for
+    both pages before the interrupted step is replayed.
+
+    Example:
+        report = PipelinedBulkUpload(headless=True, ledger=ledger).run_sync('big.csv', batch_size=500)
+    '''
+    def __init__(self, headless: bool = True, slow_mo: int = 0, product_label: str = DEFAULT_PRODUCT_LABEL,
+                 ledger: Optional[ActivationLedger] = None, cart: Optional[str] = None,
+                 governor: Optional[Governor] = None, prefetch: int = DEFAULT_PREFETCH,
+                 base_url: str = BASE_URL, state_path: str = LOGIN_STATE_PATH, reuse_session: bool = True,
+                 recorder: Optional[StepRecorder] = None, catalog: Optional[ProductCatalog] = None,
+                 timeout_policy: Optional[TimeoutPolicy] = None, circuit_breaker: Optional[CircuitBreaker] = None):
+        '''
+        Args:
+            headless (bool): If True, the browser runs in headless mode.
+            slow_mo (int): Slows down Playwright operations, in milliseconds.
+            product_label (str): The product the ICCIDs are activated with.
+            ledger (ActivationLedger | None): If given, every ICCID and batch is recorded (needed to resume).
+            cart (str | None): Key of the cart in the ledger. Defaults to the one of the upload
+                               page (the account login, see SaitroBase.cart).
+            governor (Governor | None): Paces the logins, navigations and posts of the account.
+            prefetch (int): Batches the reader may prepare ahead of the upload page.
+            base_url (str): Scheme and host of the platform (or of a local stand-in server).
+            state_path (str): File where the login storage state is saved and read back.
+            reuse_session (bool): If True, the saved login state is reused when still valid.
+            recorder, catalog, timeout_policy, circuit_breaker: See SaitroAutomation. Default
+                to the ones of the upload page, created for the run.
+        '''
+        self.headless = headless
+        self.slow_mo = slow_mo
+        self.product_label = product_label
+        self.ledger = ledger
+        self.cart = cart
+        self.governor = governor
+        self.prefetch = prefetch
+        self.base_url = base_url
+        self.state_path = state_path
+        self.reuse_session = reuse_session
+        self.recorder = recorder
+        self.catalog = catalog
+        self.timeout_policy = timeout_policy
+        self.circuit_breaker = circuit_breaker
+
+    async def run(self, file_path: IccidSource, batch_size: int = DEFAULT_BATCH_SIZE,
+                  client_info: str = DEFAULT_CLIENT_INFO, apn: str = DEFAULT_APN,
+                  only_batches: Optional[set] = None, validate: bool = True,
+                  resume: bool = False, lot: Optional[str] = None) -> BulkUploadReport:
+        '''
+        Uploads and confirms a large ICCID file in batches, two pages working at once.
+
+        Takes the same arguments and gives the same report as
+        SaitroAutomation.bulk_set_shopping_cart, so the failed batches can be retried with
+        either. With resume, a cart left by an interrupted run is cleared first: its ICCIDs
+        are not confirmed, so they are uploaded again with their batch.
+
+        Returns:
+            BulkUploadReport: Which batches succeeded and which failed.
+        '''
+        report = BulkUploadReport(batch_size)
+        from_file = isinstance(file_path, str)
+        if from_file and not os.path.exists(file_path):
+            print(f'Error: File not found at \'{os.path.abspath(file_path)}\'. Automation aborted.')
+            return report
+        # Fails fast on a product or APN unknown to the cached catalog, before the browser starts
+        catalog = self.catalog or ProductCatalog(CATALOG_PATH, scope=self.base_url.rstrip('/'))
+        try:
+            catalog.check(PRODUCT_SELECT, self.product_label)
+            catalog.check(APN_SELECT, apn)
+        except UnknownOptionError as e:
+            print(f'Automation stopped: {e}')
+            return report
+        lot = lot or (os.path.abspath(file_path) if from_file else f'stream-{datetime.now():%Y%m%d-%H%M%S}')
+        resume = resume and self.ledger is not None
+        batch_statuses = self.ledger.batch_statuses(lot, batch_size) if resume else {}
+        # Validated while the reader stage streams it: nothing is written to disk
+        file_path = _stream_source(file_path, validate)
+
+        uploader = await AsyncSaitroAutomation.create(
+            headless=self.headless, slow_mo=self.slow_mo, reuse_session=self.reuse_session,
+            base_url=self.base_url, state_path=self.state_path, governor=self.governor, recorder=self.recorder,
+            catalog=catalog, timeout_policy=self.timeout_policy, circuit_breaker=self.circuit_breaker)
+        try:
+            if not await uploader.ensure_logged_in():
+                print('Automation stopped: Login failed.')
+                return report
+            confirmer = await uploader.new_page()
+            self.cart = self.cart or uploader.cart
+            if resume and self.ledger.pending_in_cart(self.cart) > 0:
+                print('[] Clearing the cart left by the interrupted run...')
+                if await confirmer._clear_cart(self.product_label):
+                    self.ledger.mark_cart(STATUS_CLEARED, self.cart)
+
+            batches = asyncio.Queue(maxsize=self.prefetch)
+            uploaded = asyncio.Queue(maxsize=UPLOADED_QUEUE_SIZE)
+            cart_lock = asyncio.Semaphore(1)
+            stages = [
+                asyncio.create_task(self._read_batches(file_path, batch_size, only_batches, resume,
+                                                       batch_statuses, lot, batches, report)),
+                asyncio.create_task(self._upload_batches(uploader, lot, batch_size, batches, uploaded, cart_lock, report)),
+                asyncio.create_task(self._confirm_batches(confirmer, client_info, apn, lot, batch_size,
+                                                          uploaded, cart_lock, report)),
+            ]
+            # A stage that raises would leave the others waiting on its queue forever
+            done, pending = await asyncio.wait(stages, return_when=asyncio.FIRST_EXCEPTION)
+            for stage in pending:
+                stage.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for stage in done:
+                if stage.exception():
+                    raise stage.exception()
+            report.succeeded.sort()
+            print(f'[] Pipelined upload finished: {len(report.succeeded)} batches succeeded, {len(report.failed)} failed.')
+            return report
+        finally:
+            await uploader.close()
+
+    def run_sync(self, file_path: str, **kwargs) -> BulkUploadReport:
+        '''
+        Runs `run()` in a new event loop, for callers that are not async.
+        '''
+        return asyncio.run(self.run(file_path, **kwargs))
+
+    async def _read_batches(self, file_path: IccidSource, batch_size: int, only_batches: Optional[set], resume: bool,
+                            batch_statuses: dict, lot: str, batches: asyncio.Queue, report: BulkUploadReport):
+        '''
+        Reader stage: puts (batch_index, iccids, payload) on `batches`, then None.
+        '''
+        for batch_index, iccids in iter_iccid_batches(file_path, batch_size):
+            if only_batches is not None and batch_index not in only_batches:
+                continue
+            if resume:
+                if batch_statuses.get(batch_index) == BATCH_CONFIRMED:
+                    print(f'--- Batch {batch_index} already confirmed, skipped ---')
+                    report.succeeded.append(batch_index)
+                    continue
+                iccids = [iccid for iccid in iccids if not self.ledger.is_confirmed(iccid)]
+                if not iccids:
+                    self.ledger.set_batch(lot, batch_size, batch_index, BATCH_CONFIRMED, 0,
+                                          'Every ICCID already confirmed')
+                    report.succeeded.append(batch_index)
+                    continue
+            # Blocks while the upload page is `prefetch` batches behind
+            await batches.put((batch_index, iccids, upload_payload(iccids)))
+        await batches.put(None)
+
+    async def _upload_batches(self, uploader: AsyncSaitroAutomation, lot: str, batch_size: int,
+                              batches: asyncio.Queue, uploaded: asyncio.Queue, cart_lock: asyncio.Semaphore,
+                              report: BulkUploadReport):
+        '''
+        Upload stage: puts (batch_index, iccids, submitted, result) on `uploaded`, then None.
+        The cart lock is taken before every submit and released by the confirmation stage.
+        '''
+        while True:
+            item = await batches.get()
+            if item is None:
+                break
+            batch_index, iccids, payload = item
+            submitted = False
+            try:
+                # Runs while the previous batch is being confirmed
+                await uploader._open_upload(self.product_label)
+            except Exception as e:
+                # E.g. the session expired: the guarded submit opens the modal again
+                print(f'[] Could not prepare batch {batch_index} ahead: {e}')
+            # Held by every batch put on `uploaded`, until the confirmation stage releases it
+            await cart_lock.acquire()
+            try:
+                print(f'--- Batch {batch_index} ({len(iccids)} ICCIDs) ---')
+                if self.ledger:
+                    self.ledger.set_batch(lot, batch_size, batch_index, BATCH_STARTED, len(iccids))
+                report.iccid_count += len(iccids)
+                submitted = True
+                result = await uploader._send_upload(payload, self.product_label)
+            except Exception as e:
+                result = ActionResult('bulk_set_cart', False, message=str(e))
+            if result and self.ledger:
+                self.ledger.record_uploaded(iccids, lot, batch_index, self.cart)
+            # Blocks while the confirmation page is still busy with the batch before
+            await uploaded.put((batch_index, iccids, submitted, result))
+        await uploaded.put(None)
+
+    async def _confirm_batches(self, confirmer: AsyncSaitroAutomation, client_info: str, apn: str, lot: str,
+                               batch_size: int, uploaded: asyncio.Queue, cart_lock: asyncio.Semaphore,
+                               report: BulkUploadReport):
+        '''
+        Confirmation stage: confirms every uploaded batch, or clears the cart after a failed
+        one, then releases the cart lock for the next upload.
+        '''
+        while True:
+            item = await uploaded.get()
+            if item is None:
+                break
+            batch_index, iccids, submitted, result = item
+            try:
+                if result:
+                    try:
+                        # The cart was changed from the upload page
+                        result = await confirmer._confirm_cart(client_info, apn, self.product_label, reload=True)
+                    except Exception as e:
+                        result = ActionResult('bulk_set_cart', False, message=str(e))
+                if result:
+                    if self.ledger:
+                        self.ledger.mark_cart(STATUS_CONFIRMED, self.cart)
+                elif submitted:
+                    # Do not let the ICCIDs of a failed batch leak into the next one
+                    try:
+                        if await confirmer._clear_cart(self.product_label) and self.ledger:
+                            self.ledger.mark_cart(STATUS_CLEARED, self.cart)
+                    except Exception as e:
+                        print(f'[] Could not clear the cart after a failed batch: {e}')
+            finally:
+                cart_lock.release()
+            if self.ledger:
+                self.ledger.set_batch(lot, batch_size, batch_index, BATCH_CONFIRMED if result else BATCH_FAILED,
+                                      len(iccids), result.message)
+            if result:
+                report.succeeded.append(batch_index)
+            else:
+                report.failed[batch_index] = result
@@ -0,0 +1,305 @@
+# saitro_pool.py
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+from saitro_automation import (
+    SaitroAutomation, ActionResult, LOGIN_STATE_PATH, _upload_source,
+    DEFAULT_PRODUCT_LABEL, DEFAULT_CLIENT_INFO, DEFAULT_APN,
+)
+from saitro_ledger import ActivationLedger
+from saitro_metrics import StepRecorder, METRICS_JSONL_PATH
+from saitro_timeouts import TimeoutPolicy, CircuitBreaker, TIMEOUTS_PATH
+from saitro_governor import Governor
+from saitro_lifecycle import ContextLifecycle, lifecycles_prometheus_text
+
+# --- Constants and Configuration ---
+DEFAULT_CONCURRENCY = 4
+# Remote debugging port of the shared Chromium instance the workers connect to
+DEFAULT_DEBUG_PORT = 9222
+# Login storage state of each isolated worker ({index} is replaced by the worker index): its
+# own file, so its session guard, and its cart, are never shared with another worker
+WORKER_STATE_PATH = 'tim_login_state.worker-{index}.json'
+# Session name of each isolated worker, which keys its cart in the ledger
+WORKER_SESSION_NAME = 'worker-{index}'
+
+
+@dataclass
+class ActivationJob:
+    '''
+    A unit of work for the pool.
+
+    Attributes:
+        name (str): Name of the job, reported in its result.
+        run (callable): Function receiving a logged-in SaitroAutomation (whose page is dedicated
+                        to the worker) and returning the job result.
+        uses_cart (bool): True if the job changes the shopping cart. On a shared session, such
+                          jobs run one at a time (the cart belongs to the session).
+    '''
+    name: str
+    run: Callable[[SaitroAutomation], Any]
+    uses_cart: bool = True
+
+
+@dataclass
+class JobResult:
+    '''
+    Outcome of one job run by the pool.
+
+    Attributes:
+        name (str): Name of the job.
+        ok (bool): False if the job raised or returned a falsy result.
+        result (Any): Value returned by the job.
+        error (str): Error message if the job raised.
+        worker (int): Index of the worker that ran the job.
+        elapsed_ms (float): Time spent running the job, in milliseconds.
+    '''
+    name: str
+    ok: bool
+    result: Any = None
+    error: str = ''
+    worker: int = -1
+    elapsed_ms: float = 0.0
+
+
+def cart_upload_job(file_path: str, product_label: str = DEFAULT_PRODUCT_LABEL,
+                    client_info: str = DEFAULT_CLIENT_INFO, apn: str = DEFAULT_APN,
+                    name: Optional[str] = None, validate: bool = True) -> ActivationJob:
+    '''
+    Builds a job that uploads a CSV batch and confirms it for a product/APN combination.
+
+    Like SaitroAutomation.set_shopping_cart, the file is validated and deduplicated in memory
+    and sent as an in-memory file. With a ledger, the ICCIDs it already records as confirmed
+    are dropped too, and the uploaded ICCIDs are recorded under the file as their lot.
+
+    Args:
+        file_path (str): The CSV file to upload.
+        product_label (str): The product to select on the activation page.
+        client_info (str): The client information to fill in the 'Info Cliente' field.
+        apn (str): The APN to select from the dropdown.
+        name (str | None): Name of the job. Defaults to the file path and product.
+        validate (bool): If True, malformed, duplicated and already confirmed ICCIDs are
+                         removed before the upload.
+
+    Returns:
+        ActivationJob: The job, ready to be submitted to ActivationPool.run().
+    '''
+    def run(automation: SaitroAutomation) -> ActionResult:
+        automation._check_options(product_label, apn)
+        iccids, lot, error = _upload_source(file_path, validate,
+                                            automation.ledger.is_confirmed if automation.ledger else None)
+        if error is not None:
+            return error
+        result = automation._upload_iccids(iccids, product_label, lot)
+        if not result:
+            return result
+        return automation._confirm_cart(client_info, apn, product_label)
+
+    return ActivationJob(name or f'{file_path} [{product_label} / {apn}]', run)
+
+
+class ActivationPool:
+    '''
+    Runs activation jobs concurrently on one Chromium instance.
+
+    The pool launches a single Chromium with remote debugging enabled and starts one worker
+    thread per concurrency slot. Each worker attaches to that browser over CDP (sync Playwright
+    objects cannot be shared between threads) and opens its own isolated context, created from
+    the storage state of a single login. Jobs are taken from a shared queue, so at most
+    `concurrency` jobs run at a time.
+
+    Every login session has its own shopping cart, which the ledger keys by the account
+    login (see SaitroBase.cart). By default every worker logs in on its own session, named
+    after the worker, so concurrent cart jobs never see each other's ICCIDs, on the
+    platform or in the ledger. With isolate_sessions=False the workers share a single login,
+    and so a single cart: the jobs that use the cart are serialized by a pool-wide cart lock
+    (upload and confirmation run as one unit).
+    '''
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, headless: bool = True, slow_mo: int = 0,
+                 debug_port: int = DEFAULT_DEBUG_PORT, isolate_sessions: bool = True,
+                 recorder: Optional[StepRecorder] = None, timeout_policy: Optional[TimeoutPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None, governor: Optional[Governor] = None,
+                 ledger: Optional[ActivationLedger] = None):
+        '''
+        Args:
+            concurrency (int): Number of worker contexts (maximum jobs running at once).
+            headless (bool): If True, the shared browser runs in headless mode.
+            slow_mo (int): Slows down Playwright operations of every worker, in milliseconds.
+            debug_port (int): Remote debugging port used by the workers to attach to the browser.
+            isolate_sessions (bool): If True (default), each worker logs in on its own and has
+                                     its own cart. If False, the workers reuse one shared
+                                     login (and cart), and only one cart job runs at a time.
+            recorder (StepRecorder | None): Recorder shared by every worker, so the step metrics
+                                            of all contexts are aggregated together. Defaults to
+                                            a recorder appending to METRICS_JSONL_PATH.
+            timeout_policy (TimeoutPolicy | None): Timeouts learned from the steps of every
+                                                   worker. Defaults to the policy persisted in
+                                                   TIMEOUTS_PATH.
+            circuit_breaker (CircuitBreaker | None): Shared by the workers, so once the platform
+                                                     stops answering every queued job fails fast.
+            governor (Governor | None): Rate limits shared by the workers. They use one account,
+                                        so the limits apply to the pool as a whole.
+            ledger (ActivationLedger | None): Written by every worker; the cart jobs also skip
+                                              the ICCIDs it records as confirmed.
+        '''
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+        self.concurrency = concurrency
+        self.slow_mo = slow_mo
+        self.isolate_sessions = isolate_sessions
+        self.ledger = ledger
+        # One cart per session: on a shared session, cart jobs must not interleave
+        self.cart_lock = threading.Lock()
+        self.owns_recorder = recorder is None
+        self.recorder = recorder or StepRecorder(METRICS_JSONL_PATH)
+        self.owns_timeout_policy = timeout_policy is None
+        self.timeout_policy = timeout_policy or TimeoutPolicy(TIMEOUTS_PATH)
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        # Registered once for all the workers (their automations do not add them again)
+        self.listeners = [listener for listener in (self.timeout_policy.observe, self.circuit_breaker.observe)
+                          if listener not in self.recorder.listeners]
+        self.recorder.listeners.extend(self.listeners)
+        self.governor = governor or Governor()
+        self.recorder.collectors.append(self.governor.prometheus_text)
+        # One per worker: every worker context is recycled on its own
+        self.lifecycles = [ContextLifecycle(f'worker-{worker_index}') for worker_index in range(concurrency)]
+        self.recorder.collectors.append(self.prometheus_text)
+        self.cdp_endpoint = f'http://127.0.0.1:{debug_port}'
+        from playwright.sync_api import sync_playwright
+        self.playwright = sync_playwright().start()
+        # The single Chromium instance shared by every worker context
+        self.browser = self.playwright.chromium.launch(
+            headless=headless, args=[f'--remote-debugging-port={debug_port}'])
+
+    def _authenticate(self) -> bool:
+        '''
+        Logs in once (or validates the saved session) so that every worker context
+        can be created from a fresh storage state.
+        '''
+        automation = SaitroAutomation(slow_mo=self.slow_mo, reuse_session=True, cdp_endpoint=self.cdp_endpoint,
+                                      recorder=self.recorder, timeout_policy=self.timeout_policy,
+                                      circuit_breaker=self.circuit_breaker, governor=self.governor)
+        try:
+            return automation.ensure_logged_in()
+        finally:
+            automation.close()
+
+    def _worker(self, worker_index: int, jobs: queue.Queue, results: list):
+        '''
+        Worker thread: opens a dedicated context and runs jobs until the queue is empty.
+        '''
+        automation = None
+        # An isolated worker reuses the session it saved itself, never the one of another
+        # worker, and confirms or clears only its own cart in the ledger
+        state_path = WORKER_STATE_PATH.format(index=worker_index) if self.isolate_sessions else LOGIN_STATE_PATH
+        session_name = WORKER_SESSION_NAME.format(index=worker_index) if self.isolate_sessions else None
+        try:
+            automation = SaitroAutomation(slow_mo=self.slow_mo, reuse_session=True, state_path=state_path,
+                                          session_name=session_name,
+                                          cdp_endpoint=self.cdp_endpoint, recorder=self.recorder,
+                                          timeout_policy=self.timeout_policy, circuit_breaker=self.circuit_breaker,
+                                          governor=self.governor, lifecycle=self.lifecycles[worker_index],
+                                          ledger=self.ledger)
+            logged_in = automation.ensure_logged_in()
+        except Exception as e:
+            logged_in = False
+            print(f'[] Worker {worker_index} could not start: {e}')
+        try:
+            while True:
+                try:
+                    job_index, job = jobs.get_nowait()
+                except queue.Empty:
+                    return
+                if not logged_in:
+                    results[job_index] = JobResult(job.name, False, error='Worker login failed', worker=worker_index)
+                    continue
+                started = time.monotonic()
+                cart_lock = self.cart_lock if job.uses_cart and not self.isolate_sessions else None
+                try:
+                    if cart_lock:
+                        cart_lock.acquire()
+                    value = job.run(automation)
+                    results[job_index] = JobResult(job.name, bool(value), value, worker=worker_index,
+                                                   elapsed_ms=(time.monotonic() - started) * 1000)
+                except Exception as e:
+                    results[job_index] = JobResult(job.name, False, error=str(e), worker=worker_index,
+                                                   elapsed_ms=(time.monotonic() - started) * 1000)
+                finally:
+                    if cart_lock:
+                        cart_lock.release()
+                print(f'[] Worker {worker_index} finished \'{job.name}\' (ok={results[job_index].ok}).')
+                try:
+                    automation.finish_job()
+                except Exception as e:
+                    # The next job fails on its own if the context is really gone
+                    print(f'[] Worker {worker_index} could not recycle its context: {e}')
+        finally:
+            if automation:
+                automation.close()
+
+    def run(self, jobs: Iterable[ActivationJob]) -> list:
+        '''
+        Runs the jobs across the worker contexts and waits for all of them.
+
+        Args:
+            jobs (iterable): The ActivationJob instances to run.
+
+        Returns:
+            list: One JobResult per job, in submission order.
+        '''
+        pending = queue.Queue()
+        job_count = 0
+        for job_index, job in enumerate(jobs):
+            pending.put((job_index, job))
+            job_count += 1
+        results = [None] * job_count
+        if not job_count:
+            return results
+
+        if not self.isolate_sessions and not self._authenticate():
+            print('Automation stopped: Login failed.')
+            return [JobResult(job.name, False, error='Login failed') for _, job in list(pending.queue)]
+
+        workers = [
+            threading.Thread(target=self._worker, args=(worker_index, pending, results), daemon=True)
+            for worker_index in range(min(self.concurrency, job_count))
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        succeeded = sum(1 for result in results if result and result.ok)
+        print(f'[] Pool finished: {succeeded}/{job_count} jobs succeeded.')
+        return results
+
+    def prometheus_text(self) -> str:
+        '''
+        Exports the context counters of every worker in the Prometheus text format.
+        '''
+        return lifecycles_prometheus_text(self.lifecycles)
+
+    def close(self):
+        '''
+        Closes the shared browser and stops the Playwright instance.
+        '''
+        if self.browser:
+            self.browser.close()
+        if self.playwright:
+            self.playwright.stop()
+        for listener in self.listeners:
+            self.recorder.listeners.remove(listener)
+        self.recorder.collectors.remove(self.governor.prometheus_text)
+        self.recorder.collectors.remove(self.prometheus_text)
+        if self.owns_timeout_policy:
+            self.timeout_policy.save()
+        if self.owns_recorder:
+            self.recorder.close()
+
+    def __enter__(self) -> 'ActivationPool':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
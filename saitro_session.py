@@ -0,0 +1,105 @@
+# saitro_session.py
+import os
+import asyncio
+import threading
+from typing import Awaitable, Callable, Optional
+
+# --- Constants and Configuration ---
+# Seconds between two attempts of a coroutine to take the guard held by another worker
+ASYNC_LOCK_POLL_INTERVAL = 0.05
+# Statuses of an AJAX post whose session is no longer authenticated
+# (419: expired CSRF token or session, as answered by PHP frameworks)
+AUTH_FAILURE_STATUSES = (401, 403, 419)
+
+
+class SessionExpiredError(Exception):
+    '''
+    Raised when the platform redirects to the login page (or answers with the login form).
+    '''
+
+
+class SessionGuard:
+    '''
+    Single-flight re-authentication shared by every automation using the same login state file.
+
+    When the session expires, every worker using it notices it at about the same time. The
+    first one to call `refresh()` logs in and saves the new state; the others wait for it and
+    then load the saved state instead of logging in too. Every login bumps `generation`, so a
+    worker can tell whether the session it lost has already been replaced.
+    '''
+    _guards = {}
+    _guards_lock = threading.Lock()
+
+    def __init__(self):
+        self.generation = 0
+        self.reauthentications = 0 # Logins performed by refresh()
+        self.shared_refreshes = 0 # Refreshes served by the login of another worker
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_state(cls, state_path: str) -> 'SessionGuard':
+        '''
+        Returns the guard of a login state file (the same instance for every caller in the process).
+        '''
+        key = os.path.abspath(state_path)
+        with cls._guards_lock:
+            return cls._guards.setdefault(key, cls())
+
+    def refresh(self, seen: int, login: Callable[[], bool], reload: Callable[[], bool],
+                shared: bool = True) -> Optional[int]:
+        '''
+        Replaces an expired session, logging in only if no other worker already did.
+
+        Args:
+            seen (int): Generation of the session that expired.
+            login (callable): Logs in and saves the login state; returns True on success.
+            reload (callable): Loads the login state saved by another worker; returns True
+                               if that session is valid.
+            shared (bool): False for a worker that owns its session (and its cart): it always
+                           logs in itself and never loads the session of another worker.
+
+        Returns:
+            int | None: The generation of the new session, None if the login failed.
+        '''
+        with self._lock:
+            if shared and self.generation != seen and reload():
+                self.shared_refreshes += 1
+                return self.generation
+            if not login():
+                return None
+            self.generation += 1
+            self.reauthentications += 1
+            return self.generation
+
+    async def refresh_async(self, seen: int, login: Callable[[], Awaitable[bool]],
+                            reload: Callable[[], Awaitable[bool]], shared: bool = True) -> Optional[int]:
+        '''
+        Coroutine counterpart of `refresh()`, for the async automations (login and reload are
+        coroutine functions). The guard is polled instead of waited on, so the event loop
+        keeps running while another worker (a thread or a coroutine) logs in.
+        '''
+        while not self._lock.acquire(blocking=False):
+            await asyncio.sleep(ASYNC_LOCK_POLL_INTERVAL)
+        try:
+            if shared and self.generation != seen and await reload():
+                self.shared_refreshes += 1
+                return self.generation
+            if not await login():
+                return None
+            self.generation += 1
+            self.reauthentications += 1
+            return self.generation
+        finally:
+            self._lock.release()
+
+    def stats(self) -> dict:
+        '''
+        Returns:
+            dict: Generation of the current session, logins performed and refreshes shared.
+        '''
+        with self._lock:
+            return {
+                'generation': self.generation,
+                'reauthentications': self.reauthentications,
+                'shared_refreshes': self.shared_refreshes,
+            }
@@ -0,0 +1,214 @@
+# saitro_timeouts.py
+import os
+import json
+import math
+import time
+import threading
+from collections import deque
+from typing import Optional
+
+# --- Constants and Configuration ---
+TIMEOUTS_PATH = 'saitro_timeouts.json'
+TIMEOUT_WINDOW = 200 # Latest durations kept per step
+TIMEOUT_MIN_SAMPLES = 20 # Below this, the hard-coded timeout of the step is used
+TIMEOUT_PERCENTILE = 99
+TIMEOUT_FACTOR = 3.0 # Learned timeout = percentile x factor...
+TIMEOUT_FLOOR = 1000 # ...never below this (milliseconds)...
+TIMEOUT_CEILING = 60000 # ...nor above this (milliseconds)
+SAVE_EVERY = 50 # Durations observed between two writes of the percentiles file
+
+# Circuit breaker: consecutive timed out steps before failing fast, and how long it stays open
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 60.0 # Seconds
+
+# Circuit breaker states
+BREAKER_CLOSED = 'closed'
+BREAKER_OPEN = 'open'
+BREAKER_HALF_OPEN = 'half_open'
+
+
+def percentile(sorted_values: list, rank: float) -> float:
+    '''
+    Nearest-rank percentile of an already sorted list (0 for an empty list).
+    '''
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(rank / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class CircuitOpenError(RuntimeError):
+    '''
+    Raised instead of starting a step while the circuit breaker is open.
+    '''
+
+
+class TimeoutPolicy:
+    '''
+    Per-step timeouts learned from the durations the steps actually take.
+
+    Fed with the spans of a StepRecorder (append `observe` to its listeners), it keeps the
+    latest durations of every step and derives the step timeout from a high percentile of
+    them, times a safety factor, within a floor and a ceiling. Until a step has enough
+    samples, its hard-coded timeout is used. Timed out steps are kept as samples (their
+    duration is the timeout itself), so the timeouts grow when the platform slows down.
+    The window and its percentiles are persisted, so a new run starts from what was learned.
+    '''
+    def __init__(self, path: Optional[str] = TIMEOUTS_PATH, window: int = TIMEOUT_WINDOW,
+                 min_samples: int = TIMEOUT_MIN_SAMPLES, rank: float = TIMEOUT_PERCENTILE,
+                 factor: float = TIMEOUT_FACTOR, floor: int = TIMEOUT_FLOOR, ceiling: int = TIMEOUT_CEILING):
+        '''
+        Args:
+            path (str | None): JSON file of the learned durations. None keeps them in memory only.
+            window (int): Number of latest durations kept per step.
+            min_samples (int): Samples needed before the learned timeout replaces the default.
+            rank (float): Percentile of the durations the timeout is derived from.
+            factor (float): Multiplier applied to the percentile.
+            floor (int): Minimum timeout, in milliseconds.
+            ceiling (int): Maximum timeout, in milliseconds.
+        '''
+        self.path = path
+        self.window = window
+        self.min_samples = min_samples
+        self.rank = rank
+        self.factor = factor
+        self.floor = floor
+        self.ceiling = ceiling
+        self.samples = {}
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as timeouts_file:
+                steps = json.load(timeouts_file).get('steps', {})
+        except (OSError, ValueError):
+            return
+        for step, stats in steps.items():
+            self.samples[step] = deque(stats.get('samples', []), maxlen=self.window)
+
+    def observe(self, span: dict):
+        '''
+        Records the duration of a finished span (StepRecorder listener).
+        '''
+        if span['outcome'] == 'error':
+            # Failed before waiting (e.g. a missing file): says nothing about latency
+            return
+        with self._lock:
+            self.samples.setdefault(span['step'], deque(maxlen=self.window)).append(span['duration_ms'])
+            self._unsaved += 1
+            save = self._unsaved >= SAVE_EVERY
+        if save:
+            self.save()
+
+    def timeout(self, step: str, default: int) -> int:
+        '''
+        Returns the timeout to use for a step.
+
+        Args:
+            step (str): Name of the step (as recorded in the spans).
+            default (int): Hard-coded timeout used until enough durations were observed.
+
+        Returns:
+            int: The timeout, in milliseconds.
+        '''
+        with self._lock:
+            samples = sorted(self.samples.get(step, ()))
+        if len(samples) < self.min_samples:
+            return default
+        return int(min(self.ceiling, max(self.floor, percentile(samples, self.rank) * self.factor)))
+
+    def stats(self) -> dict:
+        '''
+        Returns:
+            dict: For every step, its sample count, p50, p90, p99 and current timeout (None
+                  while the default is used), in milliseconds.
+        '''
+        with self._lock:
+            steps = {step: sorted(samples) for step, samples in self.samples.items()}
+        return {step: {
+            'count': len(samples),
+            'p50': percentile(samples, 50),
+            'p90': percentile(samples, 90),
+            'p99': percentile(samples, 99),
+            'timeout': self.timeout(step, None),
+        } for step, samples in steps.items()}
+
+    def save(self):
+        '''
+        Writes the durations and the percentiles derived from them to the JSON file.
+        '''
+        if not self.path:
+            return
+        stats = self.stats()
+        with self._lock:
+            steps = {step: dict(stats[step], samples=list(samples)) for step, samples in self.samples.items()}
+            self._unsaved = 0
+        temporary_path = f'{self.path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as timeouts_file:
+            json.dump({'updated_at': time.time(), 'steps': steps}, timeouts_file, indent=2)
+        os.replace(temporary_path, self.path)
+
+
+class CircuitBreaker:
+    '''
+    Fails fast once the platform stops answering.
+
+    Fed with the spans of a StepRecorder (append `observe` to its listeners), it opens after
+    `threshold` consecutive timed out steps. While open, `check()` raises CircuitOpenError, so
+    the next jobs fail at once instead of each waiting for its own timeouts. After `cooldown`
+    seconds steps are let through again (half-open): the first answer closes the circuit,
+    a new timeout re-opens it at once.
+    '''
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        '''
+        Args:
+            threshold (int): Consecutive timed out steps that open the circuit.
+            cooldown (float): Seconds the circuit stays open before a trial step.
+        '''
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    def observe(self, span: dict):
+        '''
+        Counts consecutive timeouts from a finished span (StepRecorder listener).
+        '''
+        with self._lock:
+            if span['outcome'] == 'timeout':
+                self.failures += 1
+                if self.state == BREAKER_HALF_OPEN or self.failures >= self.threshold:
+                    if self.state != BREAKER_OPEN:
+                        self.trips += 1
+                        print(f'[] Circuit breaker open: {self.failures} consecutive timeouts '
+                              f'(last step \'{span["step"]}\'). Failing fast for {self.cooldown:.0f} s.')
+                    self.state = BREAKER_OPEN
+                    self.opened_at = time.monotonic()
+            elif span['outcome'] in ('ok', 'failed'):
+                # The platform answered (even with an error): it is reachable
+                self.failures = 0
+                self.state = BREAKER_CLOSED
+
+    def check(self):
+        '''
+        Lets a step start, or raises while the circuit is open.
+
+        Raises:
+            CircuitOpenError: If the circuit is open and the cooldown has not elapsed.
+        '''
+        with self._lock:
+            if self.state != BREAKER_OPEN:
+                return
+            remaining = self.cooldown - (time.monotonic() - self.opened_at)
+            if remaining > 0:
+                raise CircuitOpenError(f'Circuit breaker open after {self.failures} consecutive timeouts, '
+                                       f'retry in {remaining:.0f} s')
+            # Cooldown elapsed: try again
+            self.state = BREAKER_HALF_OPEN
@@ -0,0 +1,409 @@
+# saitro_tracker.py
+import re
+import csv
+import json
+import time
+from datetime import datetime
+from dataclasses import dataclass, field, asdict
+from urllib.parse import urlsplit
+from typing import Callable, Iterable, Optional
+
+from saitro_automation import SaitroAutomation, ICCID_PATTERN, NEXT_PAGE_SELECTOR, LOGIN_PATH
+from saitro_governor import KIND_NAVIGATION
+from saitro_session import SessionExpiredError
+
+# --- Constants and Configuration ---
+TRACKER_CSV_PATH = 'saitro_activation_report.csv'
+TRACKER_JSONL_PATH = 'saitro_activation_report.jsonl'
+# Polling interval, in seconds: back to the minimum while the listing changes, multiplied by
+# TRACK_BACKOFF after every poll without a change, up to the maximum
+TRACK_MIN_INTERVAL = 5.0
+TRACK_MAX_INTERVAL = 120.0
+TRACK_BACKOFF = 2.0
+DEFAULT_TRACK_TIMEOUT = 2 * 60 * 60.0 # Seconds before giving up on the requests still open
+TRACK_MAX_PAGES = 50 # Listing pages fetched per poll, at most
+
+# States of a tracked ICCID
+STATE_UNSEEN = 'unseen'       # Confirmed, no request listed yet
+STATE_PENDING = 'pending'     # Request listed, not finished
+STATE_COMPLETED = 'completed' # Activation done
+STATE_FAILED = 'failed'       # Activation refused, failed or cancelled
+FINAL_STATES = (STATE_COMPLETED, STATE_FAILED)
+
+# Request statuses of the listing (in Portuguese) mapped to a final state; anything else is pending
+COMPLETED_STATUS_PATTERN = re.compile(r'\b(ativad[oa]|conclu[ií]d[oa]|finalizad[oa]|sucesso|realizad[oa])\b', re.I)
+FAILED_STATUS_PATTERN = re.compile(r'\b(erro|falh\w*|rejeitad[oa]|recusad[oa]|cancelad[oa]|inv[aá]lid[oa])\b', re.I)
+# A negated completion ('não ativado', 'sem sucesso') is a refusal, not a completion
+NEGATED_STATUS_PATTERN = re.compile(r'\b(n[ãa]o|sem)\s+(foi\s+)?(ativad[oa]|conclu[ií]d[oa]|finalizad[oa]|sucesso|realizad[oa])\b', re.I)
+
+# Event kinds
+EVENT_ICCID = 'iccid' # The request of an ICCID reached a final state
+EVENT_BATCH = 'batch' # Every ICCID of a batch reached a final state
+
+# Fetches the pages of the listing from within the page (same session, no navigation and no
+# rendering: the HTML is only parsed) and diffs the rows against the snapshot kept by the
+# previous poll in the page, so only the new and changed rows are sent back.
+# The listing shows the newest requests first, so the walk stops as soon as it has nothing
+# left to find: once every awaited ICCID (request already listed, still open) has been seen,
+# and either every unseen ICCID too, or a page shows nothing new (the requests of the unseen
+# ICCIDs, once created, appear before it). The snapshot entries of the pages left unvisited
+# are kept: only a walk that reached the last page reports removed rows.
+TRACK_REQUESTS_SCRIPT = '''async ({url, nextSelector, loginPath, maxPages, iccidPattern, awaited, unseen}) => {
+    const snapshot = window.__saitroRequests || new Map();
+    const current = new Map();
+    const changed = [];
+    const parser = new DOMParser();
+    const iccidRegex = new RegExp(iccidPattern);
+    const awaitedLeft = new Set(awaited);
+    const unseenLeft = new Set(unseen);
+    let statusColumn = -1;
+    let pages = 0;
+    let next = url;
+    while (next && pages < maxPages) {
+        const response = await fetch(next, {credentials: 'same-origin'});
+        if (response.url.includes(loginPath)) {
+            return {expired: true};
+        }
+        const doc = parser.parseFromString(await response.text(), 'text/html');
+        if (doc.querySelector("input[name='senha']")) {
+            return {expired: true};
+        }
+        pages += 1;
+        if (statusColumn < 0) {
+            const headers = Array.from(doc.querySelectorAll('table thead th'), th => th.textContent.trim().toLowerCase());
+            statusColumn = headers.findIndex(header => header.includes('status') || header.includes('situa'));
+        }
+        let pageChanged = false;
+        for (const row of doc.querySelectorAll('table tbody tr')) {
+            const cells = Array.from(row.cells, cell => cell.textContent.trim());
+            if (!cells.some(Boolean)) {
+                continue;
+            }
+            const key = row.dataset.id || cells.join(' | ');
+            const signature = cells.join('\\u0001');
+            current.set(key, signature);
+            if (snapshot.get(key) !== signature) {
+                changed.push({key, cells});
+                pageChanged = true;
+            }
+            const match = cells.join(' ').match(iccidRegex);
+            if (match) {
+                awaitedLeft.delete(match[0]);
+                unseenLeft.delete(match[0]);
+            }
+        }
+        const link = doc.querySelector(nextSelector);
+        const href = link && link.getAttribute('href');
+        next = href && !href.startsWith('#') && !href.startsWith('javascript') ? new URL(href, response.url).href : null;
+        if (!awaitedLeft.size && (!unseenLeft.size || (snapshot.size && !pageChanged))) {
+            break;
+        }
+    }
+    const complete = !next;
+    let removed = [];
+    if (complete) {
+        removed = Array.from(snapshot.keys()).filter(key => !current.has(key));
+    } else {
+        // Rows of the pages not fetched this time: unknown, not removed
+        for (const [key, signature] of snapshot) {
+            if (!current.has(key)) {
+                current.set(key, signature);
+            }
+        }
+    }
+    window.__saitroRequests = current;
+    return {changed, removed, total: current.size, pages, statusColumn, complete,
+            truncated: !complete && pages >= maxPages && awaitedLeft.size > 0};
+}'''
+
+
+def classify_status(status: str) -> str:
+    '''
+    Maps the status of a request, as shown on the listing, to STATE_COMPLETED,
+    STATE_FAILED or STATE_PENDING.
+    '''
+    if FAILED_STATUS_PATTERN.search(status) or NEGATED_STATUS_PATTERN.search(status):
+        return STATE_FAILED
+    if COMPLETED_STATUS_PATTERN.search(status):
+        return STATE_COMPLETED
+    return STATE_PENDING
+
+
+@dataclass
+class TrackedIccid:
+    '''
+    Activation request of one confirmed ICCID.
+
+    Attributes:
+        iccid (str): The ICCID.
+        lot (str | None): Lot it was uploaded with (from the ledger).
+        batch (int | None): Batch of the lot it was uploaded with.
+        request (str | None): Row of the listing showing its request (its id, or its cells).
+        status (str): Status of the request, as shown on the listing.
+        state (str): STATE_UNSEEN, STATE_PENDING, STATE_COMPLETED or STATE_FAILED.
+        first_seen (float | None): When the request was first listed (epoch seconds).
+        finished_at (float | None): When the request reached a final state (epoch seconds).
+    '''
+    iccid: str
+    lot: Optional[str] = None
+    batch: Optional[int] = None
+    request: Optional[str] = None
+    status: str = ''
+    state: str = STATE_UNSEEN
+    first_seen: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+@dataclass
+class ActivationEvent:
+    '''
+    Completion event emitted by the tracker.
+
+    Attributes:
+        kind (str): EVENT_ICCID or EVENT_BATCH.
+        state (str): STATE_COMPLETED or STATE_FAILED (a batch fails if any of its ICCIDs failed).
+        iccid (str | None): The ICCID (EVENT_ICCID only).
+        lot (str | None): Lot of the ICCID or batch.
+        batch (int | None): Batch of the ICCID, or the batch itself.
+        status (str): Status shown on the listing (EVENT_ICCID only).
+        at (float): When the event was detected (epoch seconds).
+    '''
+    kind: str
+    state: str
+    iccid: Optional[str] = None
+    lot: Optional[str] = None
+    batch: Optional[int] = None
+    status: str = ''
+    at: float = field(default_factory=time.time)
+
+
+@dataclass
+class TrackingSummary:
+    '''
+    Outcome of a tracking run.
+
+    Attributes:
+        completed (list): ICCIDs whose activation completed.
+        failed (list): ICCIDs whose activation failed.
+        pending (list): ICCIDs still open (or never listed) when the tracking stopped.
+        polls (int): Number of polls of the listing.
+    '''
+    completed: list = field(default_factory=list)
+    failed: list = field(default_factory=list)
+    pending: list = field(default_factory=list)
+    polls: int = 0
+
+    def __bool__(self) -> bool:
+        return not self.failed and not self.pending
+
+
+class ActivationTracker:
+    '''
+    Follows the activation requests of confirmed ICCIDs on the requests page.
+
+    Every poll runs one script in the page: it fetches the pages of the listing with the
+    session of the page, parses them without rendering them, and only sends back the rows
+    that changed since the previous poll. Those rows are mapped to the tracked ICCIDs (and,
+    through the ledger, to their lot and batch). An event is emitted when an ICCID, and when
+    a whole batch, reaches a final state. The interval grows while nothing changes and
+    drops back to the minimum as soon as the listing moves.
+    '''
+    def __init__(self, automation: SaitroAutomation, iccids: Optional[Iterable[str]] = None,
+                 lot: Optional[str] = None, min_interval: float = TRACK_MIN_INTERVAL,
+                 max_interval: float = TRACK_MAX_INTERVAL,
+                 on_event: Optional[Callable[[ActivationEvent], None]] = None):
+        '''
+        Args:
+            automation (SaitroAutomation): Logged-in automation whose page polls the listing.
+            iccids (iterable | None): ICCIDs to follow. Defaults to the ICCIDs confirmed in
+                                      the ledger of the automation (of `lot` if given).
+            lot (str | None): Only follow the ICCIDs of this lot of the ledger.
+            min_interval (float): Shortest interval between two polls, in seconds.
+            max_interval (float): Longest interval between two polls, in seconds.
+            on_event (callable | None): Called with every ActivationEvent.
+
+        Raises:
+            ValueError: If no ICCID is given and the automation has no ledger.
+        '''
+        ledger = automation.ledger
+        if iccids is None and ledger is None:
+            raise ValueError('Give the ICCIDs to track or an automation with a ledger')
+        known = ledger.confirmed_iccids(lot) if ledger else {}
+        self.automation = automation
+        self.tracked = {}
+        for iccid in (known if iccids is None else iccids):
+            iccid_lot, batch, _ = known.get(iccid, (None, None, None))
+            self.tracked[iccid] = TrackedIccid(iccid, iccid_lot, batch)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.listeners = [on_event] if on_event else []
+        self.events = []
+        self.polls = 0
+        self._changed = 0 # Rows changed or removed by the last poll
+        self._finished_batches = set()
+        self._warned_truncated = False
+
+    @property
+    def done(self) -> bool:
+        '''
+        True once every tracked ICCID reached a final state.
+        '''
+        return all(item.state in FINAL_STATES for item in self.tracked.values())
+
+    def _fetch_changes(self) -> dict:
+        '''
+        Runs the listing script in the page, renewing the session once if it expired.
+        '''
+        page = self.automation.page
+        for attempt in range(2):
+            if urlsplit(page.url).netloc != urlsplit(self.automation.request_url).netloc:
+                # The script fetches with the session of the page: it must be on the platform
+                self.automation.governor.acquire(KIND_NAVIGATION)
+                page.goto(self.automation.request_url)
+            self.automation.governor.acquire(KIND_NAVIGATION)
+            with self.automation._step('track.poll', url=self.automation.request_url) as span:
+                changes = page.evaluate(TRACK_REQUESTS_SCRIPT, {
+                    'url': self.automation.request_url, 'nextSelector': NEXT_PAGE_SELECTOR,
+                    'loginPath': LOGIN_PATH, 'maxPages': TRACK_MAX_PAGES, 'iccidPattern': ICCID_PATTERN.pattern,
+                    'awaited': [item.iccid for item in self.tracked.values() if item.state == STATE_PENDING],
+                    'unseen': [item.iccid for item in self.tracked.values() if item.state == STATE_UNSEEN],
+                })
+                if changes.get('expired'):
+                    span['outcome'] = 'failed'
+            if not changes.get('expired'):
+                return changes
+            print('[] Session expired while tracking. Logging in again...')
+            if attempt or not self.automation._reauthenticate():
+                break
+        raise SessionExpiredError('The session expired and the login failed')
+
+    def poll(self) -> list:
+        '''
+        Polls the listing once and processes the rows that changed.
+
+        Returns:
+            list: The ActivationEvent objects emitted by this poll.
+        '''
+        changes = self._fetch_changes()
+        self.polls += 1
+        now = time.time()
+        status_column = changes['statusColumn']
+        events = []
+        updates = []
+        touched_batches = set()
+        for row in changes['changed']:
+            cells = row['cells']
+            iccid = next((match.group(0) for match in map(ICCID_PATTERN.search, cells) if match), None)
+            item = self.tracked.get(iccid)
+            if item is None:
+                continue
+            if 0 <= status_column < len(cells):
+                status = cells[status_column]
+            else:
+                status = next((cell for cell in reversed(cells) if cell), '')
+            item.request = row['key']
+            item.first_seen = item.first_seen or now
+            if status == item.status:
+                continue
+            item.status = status
+            updates.append((iccid, status))
+            state = classify_status(status)
+            if state == item.state:
+                continue
+            item.state = state
+            if state in FINAL_STATES:
+                item.finished_at = now
+                events.append(ActivationEvent(EVENT_ICCID, state, iccid, item.lot, item.batch, status, now))
+                touched_batches.add((item.lot, item.batch))
+        for lot, batch in touched_batches:
+            if batch is None or (lot, batch) in self._finished_batches:
+                continue
+            states = [item.state for item in self.tracked.values() if item.lot == lot and item.batch == batch]
+            if all(state in FINAL_STATES for state in states):
+                self._finished_batches.add((lot, batch))
+                state = STATE_FAILED if STATE_FAILED in states else STATE_COMPLETED
+                events.append(ActivationEvent(EVENT_BATCH, state, lot=lot, batch=batch, at=now))
+        if updates and self.automation.ledger:
+            self.automation.ledger.set_request_statuses(updates)
+
+        self._changed = len(changes['changed']) + len(changes['removed'])
+        finished = sum(item.state in FINAL_STATES for item in self.tracked.values())
+        print(f'[] Poll {self.polls}: {len(changes["changed"])} rows changed ({changes["total"]} known, '
+              f'{changes["pages"]} pages{"" if changes["complete"] else ", stopped early"}), '
+              f'{finished}/{len(self.tracked)} activations finished.')
+        if changes['truncated'] and not self._warned_truncated:
+            self._warned_truncated = True
+            print(f'[] Warning: open requests are listed beyond the first {TRACK_MAX_PAGES} pages; '
+                  f'they are not followed (raise TRACK_MAX_PAGES).')
+        for event in events:
+            if event.kind == EVENT_BATCH:
+                print(f'[] Batch {event.batch} of \'{event.lot}\' finished: {event.state}.')
+            for listener in self.listeners:
+                listener(event)
+        self.events.extend(events)
+        return events
+
+    def run(self, timeout: Optional[float] = DEFAULT_TRACK_TIMEOUT) -> TrackingSummary:
+        '''
+        Polls the listing until every tracked ICCID reached a final state, or the timeout.
+
+        Args:
+            timeout (float | None): Seconds before giving up. None waits until the end.
+
+        Returns:
+            TrackingSummary: The completed, failed and still pending ICCIDs.
+        '''
+        print(f'[] Tracking the activation of {len(self.tracked)} ICCIDs...')
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        interval = self.min_interval
+        while self.tracked:
+            self.poll()
+            if self.done:
+                break
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                print(f'[] Tracking timed out after {timeout:.0f} s.')
+                break
+            # Poll again soon while requests move, less and less often while nothing does
+            interval = self.min_interval if self._changed else min(self.max_interval, interval * TRACK_BACKOFF)
+            wait = interval if remaining is None else min(interval, remaining)
+            # Lets Playwright dispatch its events while waiting
+            self.automation.page.wait_for_timeout(wait * 1000)
+        return self.summary()
+
+    def summary(self) -> TrackingSummary:
+        '''
+        Returns:
+            TrackingSummary: The ICCIDs by final state so far.
+        '''
+        summary = TrackingSummary(polls=self.polls)
+        for item in self.tracked.values():
+            if item.state == STATE_COMPLETED:
+                summary.completed.append(item.iccid)
+            elif item.state == STATE_FAILED:
+                summary.failed.append(item.iccid)
+            else:
+                summary.pending.append(item.iccid)
+        return summary
+
+    def write_report(self, csv_path: Optional[str] = TRACKER_CSV_PATH, jsonl_path: Optional[str] = TRACKER_JSONL_PATH):
+        '''
+        Writes the final state of every tracked ICCID as CSV and/or JSONL (one line each).
+        '''
+        def timestamp(value: Optional[float]) -> str:
+            return datetime.fromtimestamp(value).isoformat(timespec='seconds') if value else ''
+
+        rows = [asdict(item) for item in self.tracked.values()]
+        if csv_path:
+            columns = list(TrackedIccid.__dataclass_fields__)
+            with open(csv_path, 'w', encoding='utf-8', newline='') as csv_file:
+                writer = csv.DictWriter(csv_file, fieldnames=columns)
+                writer.writeheader()
+                for row in rows:
+                    writer.writerow(dict(row, first_seen=timestamp(row['first_seen']),
+                                         finished_at=timestamp(row['finished_at'])))
+        if jsonl_path:
+            with open(jsonl_path, 'w', encoding='utf-8') as jsonl_file:
+                for row in rows:
+                    jsonl_file.write(json.dumps(row, ensure_ascii=False) + '\n')
+        print(f'[] Activation report written: {", ".join(path for path in (csv_path, jsonl_path) if path)}.')
@@ -14,9 +14,6 @@ def get_credentials():
     return data
 
 
-print('-' * 30)
-print('Robotic Process Automation - RPA')
-
 def set_cart():
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=False, slow_mo=100)
@@ -68,7 +65,9 @@ def set_cart():
         page.set_input_files("input[type='file'][name='arquivo']", file_path)
 
         print("[11] Clicando no botão 'Enviar'...")
-        page.click("button#send")
+        # Aguarda a resposta do servidor ao envio do arquivo
+        with page.expect_response(lambda r: r.request.method == "POST" and "/customer_care/" in r.url, timeout=30000):
+            page.click("button#send")
 
         print("[✅] Arquivo enviado com sucesso.")
 
@@ -103,12 +102,8 @@ def set_cart():
         # page.click("button.btn-send >> text=Sim")
 
         # print("[✅] Confirmação final concluída com sucesso.")
-
-        # Opcional: esperar para ver resultado
-        page.wait_for_timeout(10000)
         browser.close()
 
-set_cart()
 
 def get_thks_names():
     with open('thanks.json', 'r') as thk:
@@ -121,6 +116,9 @@ def greeting():
     for n in data["names"]:
         print(n)
 
-greeting()
-
-
+# Executa apenas quando chamado diretamente (o import não dispara o fluxo)
+if __name__ == "__main__":
+    print('-' * 30)
+    print('Robotic Process Automation - RPA')
+    set_cart()
+    greeting()
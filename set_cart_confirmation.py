@@ -14,9 +14,6 @@ def get_credentials():
     return data
 
 
-print('-' * 30)
-print('Robotic Process Automation - RPA')
-
 def confirm_cart():
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=False, slow_mo=100)
@@ -82,15 +79,13 @@ def confirm_cart():
         page.click('button[id="submitButton"]')
         page.wait_for_selector("button.btn-send >> text=Sim", timeout=5000)
 
-        page.click("button.btn-send >> text=Sim")
+        # Aguarda a resposta do servidor à confirmação
+        with page.expect_response(lambda r: r.request.method == "POST" and "/customer_care/" in r.url, timeout=30000):
+            page.click("button.btn-send >> text=Sim")
 
         print("[✅] Confirmação final concluída com sucesso.")
-
-        # Opcional: esperar para ver resultado
-        page.wait_for_timeout(10000)
         browser.close()
 
-confirm_cart()
 
 def get_thks_names():
     with open('thanks.json', 'r') as thk:
@@ -103,6 +98,9 @@ def greeting():
     for n in data["names"]:
         print(n)
 
-greeting()
-
-
+# Executa apenas quando chamado diretamente (o import não dispara o fluxo)
+if __name__ == "__main__":
+    print('-' * 30)
+    print('Robotic Process Automation - RPA')
+    confirm_cart()
+    greeting()
@@ -0,0 +1,120 @@
+# tests/test_saitro_governor.py
+import pytest
+
+import saitro_governor
+from saitro_governor import (
+    Governor, TokenBucket, detect_challenge, KIND_LOGIN, KIND_NAVIGATION, KIND_POST,
+    BACKOFF_BASE, BACKOFF_MAX, BACKOFF_MAX_LEVEL, BACKOFF_RECOVERY,
+)
+
+
+class FakeClock:
+    '''
+    Stands for the time module of saitro_governor: sleeping moves the clock forward.
+    '''
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(saitro_governor, 'time', clock)
+    return clock
+
+
+def test_token_bucket_burst_then_rate(clock):
+    bucket = TokenBucket(rate=1.0, burst=2)
+    assert bucket.reserve(clock.now, 1.0) == 0
+    assert bucket.reserve(clock.now, 1.0) == 0
+    assert bucket.reserve(clock.now, 1.0) == pytest.approx(1.0)
+    assert bucket.reserve(clock.now, 1.0) == pytest.approx(2.0)
+    # Refilled over time, never above the burst
+    assert bucket.reserve(clock.now + 100, 1.0) == 0
+    assert bucket.tokens == pytest.approx(1.0)
+
+
+def test_token_bucket_uses_the_throttled_rate(clock):
+    bucket = TokenBucket(rate=1.0, burst=1)
+    bucket.reserve(clock.now, 1.0)
+    assert bucket.reserve(clock.now, 0.25) == pytest.approx(4.0)
+
+
+def test_acquire_paces_a_kind(clock):
+    governor = Governor('test', {KIND_POST: (60, 2)})
+    for _ in range(4):
+        governor.acquire(KIND_POST)
+    assert clock.slept == [pytest.approx(1.0), pytest.approx(1.0)]
+    assert governor.operations[KIND_POST] == 4
+    assert governor.waited[KIND_POST] == pytest.approx(2.0)
+
+
+def test_rate_zero_is_unlimited(clock):
+    governor = Governor('test', {KIND_NAVIGATION: (0, 1)})
+    for _ in range(100):
+        governor.acquire(KIND_NAVIGATION)
+    assert clock.slept == []
+
+
+def test_challenge_pauses_and_halves_the_rates(clock):
+    governor = Governor('test')
+    governor.report_challenge('captcha')
+    assert governor.level == 1
+    assert governor.current_rate(KIND_POST) == saitro_governor.DEFAULT_RATES[KIND_POST][0] / 2
+    assert governor.stats()['paused_seconds'] == BACKOFF_BASE
+
+    governor.report_challenge('throttled')
+    assert governor.level == 2
+    assert governor.stats()['paused_seconds'] == 2 * BACKOFF_BASE
+    assert governor.challenges == {'captcha': 1, 'throttled': 1}
+
+    governor.acquire(KIND_LOGIN)
+    assert clock.slept == [2 * BACKOFF_BASE]
+
+
+def test_backoff_is_capped(clock):
+    governor = Governor('test')
+    for _ in range(BACKOFF_MAX_LEVEL + 3):
+        governor.report_challenge('captcha')
+    assert governor.level == BACKOFF_MAX_LEVEL
+    assert governor.stats()['paused_seconds'] <= BACKOFF_MAX
+
+
+def test_backoff_recovers_one_level_per_quiet_period(clock):
+    governor = Governor('test')
+    governor.report_challenge('captcha')
+    governor.report_challenge('captcha')
+    clock.now += BACKOFF_RECOVERY - 1
+    assert governor.stats()['backoff_level'] == 2
+    clock.now += 1
+    assert governor.stats()['backoff_level'] == 1
+    clock.now += BACKOFF_RECOVERY
+    assert governor.stats()['backoff_level'] == 0
+    assert governor.current_rate(KIND_POST) == saitro_governor.DEFAULT_RATES[KIND_POST][0]
+
+
+def test_new_challenge_restarts_the_recovery(clock):
+    governor = Governor('test')
+    governor.report_challenge('captcha')
+    clock.now += BACKOFF_RECOVERY - 1
+    governor.report_challenge('captcha')
+    clock.now += BACKOFF_RECOVERY - 1
+    assert governor.stats()['backoff_level'] == 2
+
+
+@pytest.mark.parametrize('html, status, reason', [
+    ('<iframe src="https://www.google.com/recaptcha/api2/bframe">', None, 'captcha'),
+    ('<p>Muitas tentativas, tente novamente mais tarde</p>', None, 'throttled'),
+    ('', 429, 'http_429'),
+    ('<p>Carrinho</p>', 200, None),
+])
+def test_detect_challenge(html, status, reason):
+    assert detect_challenge(html, status) == reason
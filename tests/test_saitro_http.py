@@ -0,0 +1,173 @@
+# tests/test_saitro_http.py
+import json
+
+import pytest
+
+import saitro_http
+from mock_saitro import MockSaitroServer, MOCK_PRODUCTS, MOCK_APNS, MOCK_REQUESTS_PAGE_SIZE
+from saitro_catalog import ProductCatalog, UnknownOptionError
+from saitro_http import SaitroHttpAutomation, CaptchaChallengeError, HttpResponse
+from saitro_ledger import ActivationLedger, STATUS_CONFIRMED
+from saitro_session import SessionExpiredError
+
+ICCIDS = ['89555480000057782381', '89555480000066712270', '89555480000066712296'] # From dummy.csv
+PRODUCT = MOCK_PRODUCTS['101']
+APN = MOCK_APNS['1']
+
+
+@pytest.fixture
+def server():
+    with MockSaitroServer(credentials=('rpa', 'secret')) as server:
+        yield server
+
+
+@pytest.fixture
+def credentials(tmp_path, monkeypatch):
+    user_file = tmp_path / 'user.json'
+    user_file.write_text(json.dumps({'user': 'rpa', 'pwd': 'secret'}))
+    monkeypatch.setattr(saitro_http, 'USER_CREDENTIALS_PATH', str(user_file))
+
+
+def _automation(server, tmp_path, **kwargs) -> SaitroHttpAutomation:
+    catalog = ProductCatalog(str(tmp_path / 'catalog.json'), scope=server.base_url)
+    return SaitroHttpAutomation(base_url=server.base_url, state_path=str(tmp_path / 'state.json'),
+                                catalog=catalog, browser_fallback=False, **kwargs)
+
+
+def test_cart_workflow(server, credentials, tmp_path):
+    automation = _automation(server, tmp_path)
+    try:
+        assert automation.set_shopping_cart(iter(ICCIDS), PRODUCT)
+        assert server.state.cart == ICCIDS
+        assert automation.confirm_shopping_cart('RPA', APN, PRODUCT)
+        assert server.state.cart == []
+        assert [request['iccid'] for request in server.state.requests] == ICCIDS
+        assert automation.clear_requests()
+        assert [request['status'] for request in server.state.requests].count('Cancelada') == 1
+    finally:
+        automation.close()
+
+
+def test_csv_file_upload(server, credentials, tmp_path):
+    csv_file = tmp_path / 'iccids.csv'
+    csv_file.write_text('\n'.join(ICCIDS) + '\n')
+    automation = _automation(server, tmp_path)
+    try:
+        assert automation.set_shopping_cart(str(csv_file), PRODUCT)
+        assert server.state.cart == ICCIDS
+        assert automation.clear_shopping_cart(PRODUCT)
+        assert server.state.cart == []
+    finally:
+        automation.close()
+
+
+def test_csv_file_is_validated(server, credentials, tmp_path):
+    csv_file = tmp_path / 'iccids.csv'
+    csv_file.write_text('\n'.join(ICCIDS + [ICCIDS[0], '89555480000057782382', 'iccid']) + '\n')
+    ledger = ActivationLedger(str(tmp_path / 'ledger.sqlite3'))
+    ledger.record_uploaded(ICCIDS[:1])
+    ledger.mark_cart(STATUS_CONFIRMED)
+    automation = _automation(server, tmp_path, ledger=ledger)
+    try:
+        assert automation.set_shopping_cart(str(csv_file), PRODUCT)
+        assert server.state.cart == ICCIDS[1:]
+    finally:
+        automation.close()
+        ledger.close()
+
+
+def test_expired_session_logs_in_again(server, credentials, tmp_path):
+    automation = _automation(server, tmp_path)
+    try:
+        assert automation.set_shopping_cart(ICCIDS[:1], PRODUCT)
+        server.state.expire_sessions()
+        assert automation.set_shopping_cart(ICCIDS[1:], PRODUCT)
+        assert server.state.cart == ICCIDS
+        assert server.state.hits['/sistema/login/ajax-login/'] == 2
+    finally:
+        automation.close()
+
+
+def test_absolute_url_keeps_its_query(server, credentials, tmp_path):
+    server.state.requests.extend({'id': str(index + 1), 'iccid': f'8955548000000000{index:04d}', 'status': 'Pendente'}
+                                 for index in range(MOCK_REQUESTS_PAGE_SIZE + 1))
+    automation = _automation(server, tmp_path)
+    try:
+        assert automation.login()
+        page = automation.client.get(server.base_url + '/customer_care/solicitacao/index/?page=2')
+        # Newest first: the oldest request is alone on the second page
+        assert '89555480000000000000' in page.text()
+        assert f'8955548000000000{MOCK_REQUESTS_PAGE_SIZE:04d}' not in page.text()
+    finally:
+        automation.close()
+
+
+@pytest.mark.parametrize('status', [301, 302, 303, 307, 308])
+def test_login_redirects_expire_the_session(server, tmp_path, status):
+    automation = _automation(server, tmp_path)
+    try:
+        with pytest.raises(SessionExpiredError):
+            automation._check(HttpResponse(status, {'location': '/sistema/login/'}, b''))
+    finally:
+        automation.close()
+
+
+def test_wrong_credentials(server, tmp_path, monkeypatch):
+    user_file = tmp_path / 'user.json'
+    user_file.write_text(json.dumps({'user': 'rpa', 'pwd': 'wrong'}))
+    monkeypatch.setattr(saitro_http, 'USER_CREDENTIALS_PATH', str(user_file))
+    automation = _automation(server, tmp_path)
+    try:
+        result = automation.clear_shopping_cart(PRODUCT)
+        assert not result
+        assert result.action == 'login'
+    finally:
+        automation.close()
+
+
+def test_unknown_product(server, credentials, tmp_path):
+    automation = _automation(server, tmp_path)
+    try:
+        with pytest.raises(UnknownOptionError):
+            automation.set_shopping_cart(ICCIDS, 'No such product')
+        assert server.state.cart == []
+    finally:
+        automation.close()
+
+
+def test_captcha_without_browser_fallback(credentials, tmp_path):
+    with MockSaitroServer(captcha=True) as server:
+        automation = _automation(server, tmp_path)
+        try:
+            with pytest.raises(CaptchaChallengeError):
+                automation.login()
+            assert automation.governor.stats()['backoff_level'] == 1
+        finally:
+            automation.close()
+
+
+def test_word_captcha_is_not_a_challenge(server, tmp_path):
+    automation = _automation(server, tmp_path)
+    try:
+        page = HttpResponse(200, {'content-type': 'text/html'},
+                            b'<html><body><div class="g-recaptcha"></div><p>Captcha</p></body></html>')
+        assert automation._check(page) is page
+        result = automation._result('set_cart', HttpResponse(
+            200, {'content-type': 'application/json'}, b'{"status": true, "msg": "Campo captcha removido"}'), 0)
+        assert result
+    finally:
+        automation.close()
+
+
+@pytest.mark.parametrize('status, body', [
+    (200, b'<iframe src="https://www.google.com/recaptcha/api2/bframe"></iframe>'),
+    (200, b'<p>Muitas tentativas. Tente novamente mais tarde.</p>'),
+    (429, b''),
+])
+def test_challenge_pages(server, tmp_path, status, body):
+    automation = _automation(server, tmp_path)
+    try:
+        with pytest.raises(CaptchaChallengeError):
+            automation._check(HttpResponse(status, {'content-type': 'text/html'}, body))
+    finally:
+        automation.close()
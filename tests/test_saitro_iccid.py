@@ -0,0 +1,101 @@
+# tests/test_saitro_iccid.py
+import csv
+
+import pytest
+
+from saitro_iccid import (
+    IccidSet, luhn_valid, normalize_iccid, validate_iccid, clean_iccids, clean_iccid_file,
+    REASON_EMPTY, REASON_NOT_NUMERIC, REASON_LENGTH, REASON_PREFIX, REASON_LUHN, REASON_DUPLICATE, REASON_EXCLUDED,
+)
+
+
+def make_iccid(body: str) -> str:
+    '''
+    Appends the Luhn check digit to an ICCID without it.
+    '''
+    return next(body + digit for digit in '0123456789' if luhn_valid(body + digit))
+
+
+ICCID_A = make_iccid('895510000000000001')
+ICCID_B = make_iccid('895510000000000002')
+ICCID_C = make_iccid('8955100000000000003')
+
+
+def test_luhn_valid():
+    assert luhn_valid('79927398713')
+    assert not luhn_valid('79927398710')
+    assert luhn_valid(ICCID_A)
+    assert not luhn_valid(ICCID_A[:-1] + str((int(ICCID_A[-1]) + 1) % 10))
+
+
+@pytest.mark.parametrize('raw, iccid', [
+    ('  8955 1000-0000.0000 01 ', '895510000000000001'),
+    ('"8955100000000000001";ativo', '8955100000000000001'),
+    ('8955100000000000001,foo,bar', '8955100000000000001'),
+])
+def test_normalize_iccid(raw, iccid):
+    assert normalize_iccid(raw) == iccid
+
+
+@pytest.mark.parametrize('iccid, reason', [
+    (ICCID_A, None),
+    (ICCID_C, None),
+    ('', REASON_EMPTY),
+    ('8955abc', REASON_NOT_NUMERIC),
+    ('８９５５' + ICCID_A[4:], REASON_NOT_NUMERIC),
+    (ICCID_A[:-2], REASON_LENGTH),
+    (ICCID_C + '0', REASON_LENGTH),
+    (make_iccid('891110000000000001'), REASON_PREFIX),
+    (ICCID_A[:-1] + str((int(ICCID_A[-1]) + 1) % 10), REASON_LUHN),
+])
+def test_validate_iccid(iccid, reason):
+    assert validate_iccid(iccid) == reason
+
+
+def test_iccid_set_drops_duplicates():
+    seen = IccidSet()
+    assert seen.add(ICCID_A)
+    assert not seen.add(ICCID_A)
+    assert seen.add(ICCID_C)
+    assert len(seen) == 2
+    assert ICCID_A in seen and ICCID_C in seen
+    assert ICCID_B not in seen
+
+
+def test_iccid_set_grows():
+    seen = IccidSet(capacity=4)
+    iccids = [make_iccid(f'8955{index:014d}') for index in range(1000)]
+    assert all(seen.add(iccid) for iccid in iccids)
+    assert len(seen) == 1000
+    assert all(iccid in seen for iccid in iccids)
+    assert not any(seen.add(iccid) for iccid in iccids)
+    assert make_iccid(f'8955{1000:014d}') not in seen
+
+
+def test_clean_iccids_excludes_and_deduplicates():
+    lines = [ICCID_A, 'not an iccid', ICCID_B, ICCID_A, '', ICCID_C]
+    assert clean_iccids(lines) == [ICCID_A, ICCID_B, ICCID_C]
+    assert clean_iccids(lines, exclude=lambda iccid: iccid == ICCID_B) == [ICCID_A, ICCID_C]
+
+
+def test_clean_iccid_file(tmp_path):
+    source = tmp_path / 'lot.csv'
+    source.write_text(f'﻿{ICCID_A}\n\n{ICCID_A}\nabc\n{ICCID_B};x\n{ICCID_C}\n', encoding='utf-8')
+
+    report = clean_iccid_file(str(source), exclude=lambda iccid: iccid == ICCID_C)
+
+    assert report
+    assert report.clean_path == str(tmp_path / 'lot.clean.csv')
+    assert report.rejects_path == str(tmp_path / 'lot.rejects.csv')
+    assert (report.total, report.accepted) == (5, 2)
+    assert report.rejected == {REASON_DUPLICATE: 1, REASON_NOT_NUMERIC: 1, REASON_EXCLUDED: 1}
+    assert (tmp_path / 'lot.clean.csv').read_text(encoding='utf-8').split() == [ICCID_A, ICCID_B]
+    with open(report.rejects_path, newline='', encoding='utf-8') as rejects_file:
+        rows = list(csv.reader(rejects_file))
+    assert [row[-1] for row in rows[1:]] == [REASON_DUPLICATE, REASON_NOT_NUMERIC, REASON_EXCLUDED]
+
+
+def test_clean_iccid_file_without_valid_iccid(tmp_path):
+    source = tmp_path / 'empty.csv'
+    source.write_text('abc\n123\n', encoding='utf-8')
+    assert not clean_iccid_file(str(source))
@@ -0,0 +1,90 @@
+# tests/test_saitro_ledger.py
+import pytest
+
+from saitro_ledger import (
+    ActivationLedger, STATUS_UPLOADED, STATUS_CONFIRMED, STATUS_CLEARED, STATUS_CANCELLED,
+    BATCH_STARTED, BATCH_CONFIRMED, BATCH_FAILED,
+)
+
+LOT = '/data/lot.csv'
+CART_A = 'operator.a'
+CART_B = 'operator.b/worker-1'
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = ActivationLedger(str(tmp_path / 'ledger.sqlite3'))
+    yield ledger
+    ledger.close()
+
+
+def test_mark_cart_only_moves_its_own_cart(ledger):
+    ledger.record_uploaded(['a1', 'a2'], LOT, 0, cart=CART_A)
+    ledger.record_uploaded(['b1'], LOT, 1, cart=CART_B)
+    assert (ledger.pending_in_cart(CART_A), ledger.pending_in_cart(CART_B)) == (2, 1)
+
+    assert ledger.mark_cart(STATUS_CONFIRMED, CART_A) == 2
+
+    assert [ledger.status(iccid) for iccid in ('a1', 'a2', 'b1')] == [STATUS_CONFIRMED, STATUS_CONFIRMED, STATUS_UPLOADED]
+    assert (ledger.pending_in_cart(CART_A), ledger.pending_in_cart(CART_B)) == (0, 1)
+    assert ledger.mark_cart(STATUS_CLEARED, CART_B) == 1
+    assert ledger.status('b1') == STATUS_CLEARED
+    assert ledger.mark_cart(STATUS_CONFIRMED, CART_A) == 0
+
+
+def test_cart_none_is_its_own_cart(ledger):
+    ledger.record_uploaded(['x1'], LOT, 0)
+    ledger.record_uploaded(['a1'], LOT, 1, cart=CART_A)
+    assert ledger.mark_cart(STATUS_CLEARED) == 1
+    assert (ledger.status('x1'), ledger.status('a1')) == (STATUS_CLEARED, STATUS_UPLOADED)
+
+
+def test_reupload_moves_an_iccid_to_the_new_cart(ledger):
+    ledger.record_uploaded(['a1'], LOT, 0, cart=CART_A)
+    ledger.mark_cart(STATUS_CLEARED, CART_A)
+    ledger.record_uploaded(['a1'], LOT, 3, cart=CART_B)
+    assert ledger.status('a1') == STATUS_UPLOADED
+    assert (ledger.pending_in_cart(CART_A), ledger.pending_in_cart(CART_B)) == (0, 1)
+
+
+def test_batches_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'ledger.sqlite3')
+    ledger = ActivationLedger(path)
+    ledger.set_batch(LOT, 100, 0, BATCH_STARTED)
+    ledger.set_batch(LOT, 100, 0, BATCH_CONFIRMED, 100)
+    ledger.set_batch(LOT, 100, 1, BATCH_FAILED, 100, 'Timeout')
+    ledger.set_batch(LOT, 100, 2, BATCH_STARTED)
+    ledger.set_batch(LOT, 50, 0, BATCH_CONFIRMED, 50)
+    ledger.record_uploaded(['a1', 'a2'], LOT, 0, cart=CART_A)
+    ledger.mark_cart(STATUS_CONFIRMED, CART_A)
+    ledger.close()
+
+    ledger = ActivationLedger(path)
+    try:
+        assert ledger.batch_statuses(LOT, 100) == {0: BATCH_CONFIRMED, 1: BATCH_FAILED, 2: BATCH_STARTED}
+        # Batches are identified by their index for a given batch size
+        assert ledger.batch_statuses(LOT, 50) == {0: BATCH_CONFIRMED}
+        assert ledger.batch_statuses('/data/other.csv', 100) == {}
+        assert ledger.is_confirmed('a1') and not ledger.is_confirmed('unknown')
+    finally:
+        ledger.close()
+
+
+def test_confirmed_iccids_and_request_statuses(ledger):
+    ledger.record_uploaded(['a1', 'a2'], LOT, 0, cart=CART_A)
+    ledger.record_uploaded(['o1'], '/data/other.csv', 0, cart=CART_A)
+    ledger.mark_cart(STATUS_CONFIRMED, CART_A)
+    ledger.record_uploaded(['a3'], LOT, 1, cart=CART_A)
+
+    assert ledger.set_request_statuses([('a1', 'Ativado'), ('unknown', 'Ativado')]) == 1
+    assert ledger.confirmed_iccids(LOT) == {'a1': (LOT, 0, 'Ativado'), 'a2': (LOT, 0, None)}
+    assert set(ledger.confirmed_iccids()) == {'a1', 'a2', 'o1'}
+
+
+def test_record_cancelled(ledger):
+    ledger.record_uploaded(['a1'], LOT, 0, cart=CART_A)
+    ledger.mark_cart(STATUS_CONFIRMED, CART_A)
+    ledger.record_cancelled('a1')
+    ledger.record_cancelled('unknown')
+    assert ledger.summary() == {STATUS_CANCELLED: 2}
+    assert not ledger.is_confirmed('a1')
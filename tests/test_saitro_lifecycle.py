@@ -0,0 +1,76 @@
+# tests/test_saitro_lifecycle.py
+import pytest
+
+from saitro_lifecycle import (
+    ContextLifecycle, SCOPE_PAGE, SCOPE_CONTEXT,
+    REASON_PAGE_JOBS, REASON_CONTEXT_JOBS, REASON_MEMORY, REASON_DOM_NODES,
+)
+
+
+def memory(js_heap_mb: float = 50.0, dom_nodes: int = 1000) -> dict:
+    return {'js_heap_mb': js_heap_mb, 'dom_nodes': dom_nodes}
+
+
+def run_jobs(lifecycle: ContextLifecycle, count: int, reading: dict = None) -> list:
+    '''
+    Runs jobs like an automation does, replacing the page or context when asked.
+    '''
+    decisions = []
+    for _ in range(count):
+        decision = lifecycle.job_done(reading)
+        decisions.append(decision)
+        if decision and decision[0] == SCOPE_CONTEXT:
+            lifecycle.context_opened()
+        elif decision:
+            lifecycle.page_opened()
+    return decisions
+
+
+def test_page_and_context_job_limits():
+    lifecycle = ContextLifecycle(page_max_jobs=3, context_max_jobs=7, memory_watermark_mb=0, dom_nodes_watermark=0)
+    lifecycle.context_opened()
+    decisions = run_jobs(lifecycle, 7)
+    assert decisions == [None, None, (SCOPE_PAGE, REASON_PAGE_JOBS), None, None, (SCOPE_PAGE, REASON_PAGE_JOBS),
+                         (SCOPE_CONTEXT, REASON_CONTEXT_JOBS)]
+    stats = lifecycle.stats()
+    assert (stats['contexts'], stats['pages'], stats['jobs'], stats['context_jobs']) == (2, 4, 7, 0)
+    assert stats['recycles'] == {REASON_PAGE_JOBS: 2, REASON_CONTEXT_JOBS: 1}
+
+
+def test_zero_limits_never_recycle():
+    lifecycle = ContextLifecycle(page_max_jobs=0, context_max_jobs=0, memory_watermark_mb=0, dom_nodes_watermark=0)
+    assert not lifecycle.measures_memory
+    assert run_jobs(lifecycle, 500, memory(js_heap_mb=10_000, dom_nodes=10_000_000)) == [None] * 500
+    assert lifecycle.recycles == {}
+
+
+@pytest.mark.parametrize('reading, decision', [
+    (memory(dom_nodes=50), None),
+    (memory(dom_nodes=200), (SCOPE_PAGE, REASON_DOM_NODES)),
+    (memory(js_heap_mb=200), (SCOPE_CONTEXT, REASON_MEMORY)),
+    # The context first: replacing it replaces the page too
+    (memory(js_heap_mb=200, dom_nodes=200), (SCOPE_CONTEXT, REASON_MEMORY)),
+    (None, None),
+    ({}, None),
+])
+def test_memory_watermarks(reading, decision):
+    lifecycle = ContextLifecycle(page_max_jobs=0, context_max_jobs=0, memory_watermark_mb=100, dom_nodes_watermark=100)
+    assert lifecycle.job_done(reading) == decision
+
+
+def test_context_jobs_win_over_the_page():
+    lifecycle = ContextLifecycle(page_max_jobs=2, context_max_jobs=2, memory_watermark_mb=100, dom_nodes_watermark=100)
+    assert run_jobs(lifecycle, 2, memory(dom_nodes=50)) == [None, (SCOPE_CONTEXT, REASON_CONTEXT_JOBS)]
+    assert lifecycle.job_done(memory(dom_nodes=500)) == (SCOPE_PAGE, REASON_DOM_NODES)
+
+
+def test_memory_reading_is_kept():
+    lifecycle = ContextLifecycle(memory_watermark_mb=100)
+    lifecycle.job_done(memory(js_heap_mb=80))
+    lifecycle.job_done(memory(js_heap_mb=150))
+    lifecycle.context_opened()
+    lifecycle.job_done()
+    stats = lifecycle.stats()
+    assert stats['memory']['js_heap_mb'] == 150
+    assert stats['peak_js_heap_mb'] == 150
+    assert stats['recycles'] == {REASON_MEMORY: 1}
@@ -0,0 +1,104 @@
+# tests/test_saitro_timeouts.py
+import pytest
+
+from saitro_timeouts import (
+    TimeoutPolicy, CircuitBreaker, CircuitOpenError, percentile,
+    BREAKER_CLOSED, BREAKER_OPEN, BREAKER_HALF_OPEN,
+)
+
+
+def span(step: str = 'upload', duration_ms: float = 100, outcome: str = 'ok') -> dict:
+    return {'step': step, 'duration_ms': duration_ms, 'outcome': outcome}
+
+
+def test_percentile():
+    assert percentile([], 99) == 0.0
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile(list(range(1, 101)), 99) == 99
+    assert percentile([5], 99) == 5
+
+
+def test_timeout_uses_the_default_until_enough_samples():
+    policy = TimeoutPolicy(None, min_samples=3, factor=2, floor=0)
+    policy.observe(span(duration_ms=500))
+    policy.observe(span(duration_ms=700))
+    assert policy.timeout('upload', 9000) == 9000
+    policy.observe(span(duration_ms=600))
+    assert policy.timeout('upload', 9000) == 1400
+    assert policy.timeout('confirm', 9000) == 9000
+
+
+def test_timeout_is_bounded():
+    policy = TimeoutPolicy(None, min_samples=1, factor=3, floor=1000, ceiling=5000)
+    policy.observe(span('fast', 10))
+    policy.observe(span('slow', 4000))
+    assert policy.timeout('fast', 30000) == 1000
+    assert policy.timeout('slow', 30000) == 5000
+
+
+def test_timeout_follows_the_window():
+    policy = TimeoutPolicy(None, window=3, min_samples=3, factor=1, floor=0)
+    for duration in (9000, 100, 100, 100):
+        policy.observe(span(duration_ms=duration))
+    assert policy.timeout('upload', 30000) == 100
+
+
+def test_timeout_counts_timeouts_but_not_errors():
+    policy = TimeoutPolicy(None, min_samples=1, factor=1, floor=0)
+    policy.observe(span(duration_ms=5, outcome='error'))
+    assert policy.timeout('upload', 30000) == 30000
+    policy.observe(span(duration_ms=8000, outcome='timeout'))
+    assert policy.timeout('upload', 30000) == 8000
+
+
+def test_learned_timeouts_are_persisted(tmp_path):
+    path = str(tmp_path / 'timeouts.json')
+    policy = TimeoutPolicy(path, min_samples=2, factor=1, floor=0)
+    policy.observe(span(duration_ms=300))
+    policy.observe(span(duration_ms=400))
+    policy.save()
+    assert TimeoutPolicy(path, min_samples=2, factor=1, floor=0).timeout('upload', 30000) == 400
+
+
+def test_breaker_opens_after_consecutive_timeouts():
+    breaker = CircuitBreaker(threshold=3, cooldown=60)
+    breaker.observe(span(outcome='timeout'))
+    breaker.observe(span(outcome='timeout'))
+    breaker.observe(span(outcome='ok'))
+    breaker.observe(span(outcome='timeout'))
+    breaker.observe(span(outcome='timeout'))
+    assert breaker.state == BREAKER_CLOSED
+    breaker.check()
+
+    breaker.observe(span(outcome='timeout'))
+    assert (breaker.state, breaker.trips) == (BREAKER_OPEN, 1)
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+def test_breaker_half_open_trial():
+    breaker = CircuitBreaker(threshold=1, cooldown=60)
+    breaker.observe(span(outcome='timeout'))
+    breaker.opened_at -= 61
+    breaker.check()
+    assert breaker.state == BREAKER_HALF_OPEN
+
+    # A new timeout re-opens it at once
+    breaker.observe(span(outcome='timeout'))
+    assert (breaker.state, breaker.trips) == (BREAKER_OPEN, 2)
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    # Any answer, even an error reported by the platform, closes it
+    breaker.opened_at -= 61
+    breaker.check()
+    breaker.observe(span(outcome='failed'))
+    assert (breaker.state, breaker.failures) == (BREAKER_CLOSED, 0)
+
+
+def test_breaker_ignores_local_errors():
+    breaker = CircuitBreaker(threshold=2)
+    breaker.observe(span(outcome='timeout'))
+    breaker.observe(span(outcome='error'))
+    breaker.observe(span(outcome='timeout'))
+    assert breaker.state == BREAKER_OPEN
@@ -0,0 +1,24 @@
+# tests/test_saitro_tracker.py
+import pytest
+
+from saitro_tracker import classify_status, STATE_COMPLETED, STATE_FAILED, STATE_PENDING
+
+
+@pytest.mark.parametrize('status, state', [
+    ('Ativado', STATE_COMPLETED),
+    ('Ativação concluída', STATE_COMPLETED),
+    ('Finalizada com sucesso', STATE_COMPLETED),
+    ('Erro na ativação', STATE_FAILED),
+    ('Falhou', STATE_FAILED),
+    ('Cancelada', STATE_FAILED),
+    ('ICCID inválido', STATE_FAILED),
+    ('Não ativado', STATE_FAILED),
+    ('NAO CONCLUIDO', STATE_FAILED),
+    ('Não foi realizada', STATE_FAILED),
+    ('Processada sem sucesso', STATE_FAILED),
+    ('Pendente', STATE_PENDING),
+    ('Em processamento', STATE_PENDING),
+    ('', STATE_PENDING),
+])
+def test_classify_status(status, state):
+    assert classify_status(status) == state